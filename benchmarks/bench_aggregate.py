@@ -0,0 +1,210 @@
+# benchmarks/bench_aggregate.py
+"""
+Offline end-to-end benchmark of `job_aggregator.aggregate.run`: Adzuna pages come
+from a local fake server (benchmarks.fake_provider) and DynamoDB is mocked by moto,
+so nothing leaves the machine. Reports jobs/sec, p50/p95 per stage and peak RSS,
+and writes a JSON result per commit that `--compare` diffs against another one.
+
+    python -m benchmarks.bench_aggregate --total 2000 --latency-ms 20 --out benchmarks/results
+    python -m benchmarks.bench_aggregate --compare benchmarks/results/<baseline>.json
+
+Run it with the same PYTHONPATH as the tests (services/*/src and libs/*/src).
+"""
+
+from __future__ import annotations
+
+import argparse, asyncio, functools, json, math, os, platform, resource, statistics, subprocess, sys, time
+
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from .fake_provider import FakeConfig, FakeProviderServer
+
+TABLE = "bench-jobs"
+
+def _bench_env():
+    os.environ.update({
+        "JOBS_TABLE_NAME": TABLE,
+        "AWS_ACCESS_KEY_ID": "bench", "AWS_SECRET_ACCESS_KEY": "bench",
+        "AWS_DEFAULT_REGION": os.getenv("AWS_DEFAULT_REGION", "eu-central-1"),
+        "SECRETS_OFFLINE": "true", "ADZUNA_APP_ID": "bench", "ADZUNA_APP_KEY": "bench",
+        "AGG_HTTP_CACHE": "off",
+        "AGG_ADZUNA_RATE": "0",  # measure the pipeline, not the politeness delay
+        "AGG_SNAPSHOT": "0", "AGG_WATERMARK": "0",  # every repeat is a full crawl
+    })
+    os.environ.pop("AWS_ENDPOINT_URL", None)
+
+def _create_table():
+    import boto3
+    ddb = boto3.client("dynamodb")
+    if TABLE in ddb.list_tables()["TableNames"]:
+        ddb.delete_table(TableName=TABLE)
+    ddb.create_table(
+        TableName=TABLE,
+        KeySchema=[{"AttributeName": "source", "KeyType": "HASH"},
+                   {"AttributeName": "source_job_id", "KeyType": "RANGE"}],
+        AttributeDefinitions=[{"AttributeName": "source", "AttributeType": "S"},
+                              {"AttributeName": "source_job_id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"n": 0, "p50": 0.0, "p95": 0.0}
+    ordered = sorted(samples)
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)], 3)
+    return {"n": len(ordered), "p50": pick(0.50), "p95": pick(0.95)}
+
+class StageTimer:
+    """Collects per-call wall time (ms) of wrapped callables, keyed by stage name."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+
+    def add(self, stage: str, ms: float):
+        self.samples.setdefault(stage, []).append(ms)
+
+    def wrap(self, stage: str, fn: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def timed_async(*a, **kw):
+                start = time.perf_counter()
+                try:
+                    return await fn(*a, **kw)
+                finally:
+                    self.add(stage, (time.perf_counter() - start) * 1000)
+            return timed_async
+
+        @functools.wraps(fn)
+        def timed(*a, **kw):
+            start = time.perf_counter()
+            try:
+                return fn(*a, **kw)
+            finally:
+                self.add(stage, (time.perf_counter() - start) * 1000)
+        return timed
+
+async def _run_once(server: FakeProviderServer, cfg: FakeConfig, timer: StageTimer) -> Dict[str, Any]:
+    from job_aggregator import aggregate, http_client, storage
+    from job_aggregator.models import Query, RunStats
+    from providers import adzuna, resilience
+
+    resilience.reset()
+    storage._fingerprints.clear()
+    storage._last_seen.clear()
+    adzuna.ADZUNA_BASE = server.base_url
+
+    client = http_client.new_client()
+    provider = adzuna.AdzunaProvider(client)
+    provider.fetch_page = timer.wrap("page", provider.fetch_page)
+    provider._parse = timer.wrap("parse", provider._parse)
+
+    originals = {name: getattr(aggregate, name) for name in ("annotate_keywords", "fingerprint", "classify_changes")}
+    for name, fn in originals.items():
+        setattr(aggregate, name, timer.wrap(name, fn))
+
+    pages = math.ceil(server.total() / cfg.per_page)
+    query = Query(q="python", crawl=True, results_per_page=cfg.per_page, max_pages=pages)
+    stats = RunStats()
+    start = time.perf_counter()
+    try:
+        await aggregate.run(query, client=client, providers=[provider], stats=stats)
+    finally:
+        elapsed = time.perf_counter() - start
+        for name, fn in originals.items():
+            setattr(aggregate, name, fn)
+        await client.aclose()
+
+    for ms in stats.writes.batch_ms:
+        timer.add("write_batch", ms)
+    return {
+        "seconds": round(elapsed, 3),
+        "jobs": stats.unique,
+        "written": stats.written,
+        "jobs_per_sec": round(stats.unique / elapsed, 1) if elapsed else 0.0,
+        "write_retries": stats.writes.retries,
+        "write_failed": stats.writes.failed,
+    }
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def bench(cfg: FakeConfig, repeat: int = 3) -> Dict[str, Any]:
+    _bench_env()
+    from moto import mock_aws
+
+    runs: List[Dict[str, Any]] = []
+    timer = StageTimer()
+    with mock_aws(), FakeProviderServer(cfg) as server:
+        for _ in range(repeat):
+            _create_table()
+            runs.append(asyncio.run(_run_once(server, cfg, timer)))
+        requests, errors = server.requests, server.errors
+
+    return {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "params": {**asdict(cfg), "repeat": repeat},
+        "jobs_per_sec": statistics.median(r["jobs_per_sec"] for r in runs),
+        "runs": runs,
+        "stages": {stage: _percentiles(ms) for stage, ms in sorted(timer.samples.items())},
+        "http": {"requests": requests, "errors": errors},
+        # ru_maxrss is KiB on Linux; the whole process, including moto
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> bool:
+    """Prints the deltas; False when jobs/sec dropped by more than `tolerance`."""
+    if current["params"] != baseline["params"]:
+        print(f"[warn] parameters differ from the baseline: {baseline['params']}")
+
+    def delta(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"{'metric':<28}{baseline['commit']:>12}{current['commit']:>12}{'delta':>10}")
+    rows = [("jobs/sec", baseline["jobs_per_sec"], current["jobs_per_sec"]),
+            ("peak RSS (MB)", baseline["peak_rss_mb"], current["peak_rss_mb"])]
+    for stage in sorted(set(current["stages"]) | set(baseline["stages"])):
+        old, new = baseline["stages"].get(stage, {}), current["stages"].get(stage, {})
+        for q in ("p50", "p95"):
+            rows.append((f"{stage} {q} (ms)", old.get(q, 0.0), new.get(q, 0.0)))
+    for name, old, new in rows:
+        print(f"{name:<28}{old:>12}{new:>12}{delta(new, old):>10}")
+
+    ok = current["jobs_per_sec"] >= baseline["jobs_per_sec"] * (1 - tolerance)
+    if not ok:
+        print(f"[ERROR] jobs/sec regressed more than {tolerance:.0%}")
+    return ok
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    defaults = FakeConfig()
+    for f in fields(FakeConfig):
+        ap.add_argument(f"--{f.name.replace('_', '-')}", type=type(getattr(defaults, f.name)) if f.name != "payload" else str,
+                        default=getattr(defaults, f.name))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", help="directory for <commit>.json")
+    ap.add_argument("--compare", help="baseline result JSON")
+    ap.add_argument("--tolerance", type=float, default=0.10)
+    args = ap.parse_args(argv)
+
+    cfg = FakeConfig(**{f.name: getattr(args, f.name) for f in fields(FakeConfig)})
+    result = bench(cfg, args.repeat)
+    print(json.dumps(result, indent=2))
+
+    if args.out:
+        out = Path(args.out)
+        out.mkdir(parents=True, exist_ok=True)
+        (out / f"{result['commit']}.json").write_text(json.dumps(result, indent=2))
+    if args.compare:
+        return 0 if compare(result, json.loads(Path(args.compare).read_text()), args.tolerance) else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# benchmarks/bench_cold_start.py
+"""
+Cold-start cost of the aggregator Lambda: each sample is a fresh interpreter that
+imports the handler module and builds the provider list, as the first invocation of
+a new container does. Reports the median milliseconds of both steps and which
+provider modules ended up imported.
+
+    python -m benchmarks.bench_cold_start --samples 15
+"""
+
+from __future__ import annotations
+
+import argparse, json, os, statistics, subprocess, sys
+
+from pathlib import Path
+
+_PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import job_aggregator.handler
+t1 = time.perf_counter()
+from providers import available_providers
+names = [p.name for p in available_providers()]
+t2 = time.perf_counter()
+mods = sorted(m for m in sys.modules if m.startswith("providers."))
+print(json.dumps({"handler_import_ms": (t1 - t0) * 1000, "providers_ms": (t2 - t1) * 1000,
+                  "providers": names, "provider_modules": mods}))
+"""
+
+def _env() -> dict:
+    root = Path(__file__).resolve().parents[1]
+    paths = [str(p) for p in (*root.glob("services/*/src"), *root.glob("libs/*/src"))]
+    return {**os.environ, "PYTHONPATH": os.pathsep.join(paths + [os.environ.get("PYTHONPATH", "")]),
+            "JOBS_TABLE_NAME": os.getenv("JOBS_TABLE_NAME", "bench-jobs"),
+            "AWS_DEFAULT_REGION": os.getenv("AWS_DEFAULT_REGION", "eu-central-1"),
+            "SECRETS_OFFLINE": "true", "PYTHONDONTWRITEBYTECODE": "1"}
+
+def sample() -> dict:
+    out = subprocess.run([sys.executable, "-c", _PROBE], env=_env(), capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def bench(samples: int = 15) -> dict:
+    sample()  # warm the OS page cache and .pyc files so samples are comparable
+    runs = [sample() for _ in range(samples)]
+    return {
+        "samples": samples,
+        "handler_import_ms": round(statistics.median(r["handler_import_ms"] for r in runs), 1),
+        "providers_ms": round(statistics.median(r["providers_ms"] for r in runs), 1),
+        "providers": runs[-1]["providers"],
+        "provider_modules": runs[-1]["provider_modules"],
+    }
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="aggregator cold-start benchmark")
+    ap.add_argument("--samples", type=int, default=15)
+    args = ap.parse_args(argv)
+    print(json.dumps(bench(args.samples), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+# benchmarks/fake_provider.py
+
+from __future__ import annotations
+
+import json, random, threading, time
+
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List
+from urllib.parse import parse_qs, urlsplit
+
+_TITLES = ["Backend Engineer", "Python Developer", "Data Engineer", "DevOps Engineer", "Frontend Developer",
+           "Platform Engineer", "ML Engineer", "Site Reliability Engineer", "Full Stack Developer", "QA Engineer"]
+_COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Wonka", "Tyrell", "Cyberdyne"]
+_CITIES = ["Bucharest", "Cluj-Napoca", "Iasi", "Timisoara", "Brasov", "Remote"]
+_TERMS = ["python", "django", "fastapi", "aws", "lambda", "k8s", "docker", "terraform", "postgresql", "redis",
+          "kafka", "react", "typescript", "node.js", "c#", ".net", "go", "rust", "ci/cd", "graphql", "spark",
+          "airflow", "snowflake", "gcp", "azure", "java", "spring", "kotlin", "linux", "grafana"]
+_FILLER = ["we", "are", "looking", "for", "an", "engineer", "to", "join", "our", "team", "and", "build",
+           "reliable", "services", "with", "experience", "in", "strong", "ownership", "of", "production", "systems"]
+
+@dataclass
+class FakeConfig:
+    total: int = 1000          # jobs behind each query
+    per_page: int = 50
+    desc_words: int = 200
+    latency_ms: float = 20.0
+    error_rate: float = 0.0    # share of requests answered with a 503
+    seed: int = 7
+    payload: str | None = None  # recorded Adzuna response (JSON) replayed instead of synthetic rows
+
+def _description(rng: random.Random, words: int) -> str:
+    tokens = [rng.choice(_TERMS) if rng.random() < 0.15 else rng.choice(_FILLER) for _ in range(words)]
+    paras = [" ".join(tokens[i:i + 40]) for i in range(0, len(tokens), 40)]
+    return "".join(f"<p>{p}.</p>" for p in paras)
+
+def synthetic_row(i: int, cfg: FakeConfig) -> dict:
+    """Adzuna-shaped result; deterministic per (seed, i) so runs are comparable."""
+    rng = random.Random(cfg.seed * 1_000_003 + i)
+    return {
+        "id": str(i),
+        "title": rng.choice(_TITLES),
+        "company": {"display_name": rng.choice(_COMPANIES)},
+        "location": {"display_name": rng.choice(_CITIES)},
+        "redirect_url": f"https://jobs.example.com/ad/{i}",
+        "description": _description(rng, cfg.desc_words),
+        "created": f"2025-0{1 + i % 9}-{10 + i % 18}T08:00:00Z",
+        "salary_min": 3000 + (i % 50) * 100,
+        "salary_max": 6000 + (i % 50) * 100,
+        "category": {"label": "IT Jobs"},
+    }
+
+def _recorded_rows(path: str) -> List[dict]:
+    data = json.loads(Path(path).read_text())
+    return data.get("results", data) if isinstance(data, dict) else data
+
+class FakeProviderServer:
+    """
+    Adzuna-compatible search API on 127.0.0.1 (`/<country>/search/<page>`), serving
+    synthetic or recorded rows with configurable page size, latency and error rate.
+    Threaded, so concurrent page fetches overlap like they do against the real API.
+    """
+
+    def __init__(self, cfg: FakeConfig):
+        self.cfg = cfg
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(cfg.seed)
+        self._rows = _recorded_rows(cfg.payload) if cfg.payload else None
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def total(self) -> int:
+        return len(self._rows) if self._rows is not None else self.cfg.total
+
+    def rows(self, page: int, per_page: int) -> List[dict]:
+        start = (page - 1) * per_page
+        end = min(start + per_page, self.total())
+        if self._rows is not None:
+            return self._rows[start:end]
+        return [synthetic_row(i, self.cfg) for i in range(start, end)]
+
+    def _fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            failed = self._rng.random() < self.cfg.error_rate
+            self.errors += failed
+            return failed
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                params = parse_qs(parts.query)
+                time.sleep(server.cfg.latency_ms / 1000)
+                if server._fail():
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                try:
+                    page = int(parts.path.rstrip("/").rsplit("/", 1)[-1])
+                    per_page = int(params.get("results_per_page", [server.cfg.per_page])[0])
+                except ValueError:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = json.dumps({"count": server.total(), "results": server.rows(page, per_page)}).encode()
+                self.send_response(200)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def __enter__(self) -> "FakeProviderServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -1 +1 @@
-__all__ = ["secrets_loader"]
\ No newline at end of file
+__all__ = ["secrets_loader", "keywords", "descriptions", "corpus_stats"]
\ No newline at end of file
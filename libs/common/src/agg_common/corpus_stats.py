@@ -0,0 +1,118 @@
+# libs/common/src/agg_common/corpus_stats.py
+"""
+Document frequencies of normalized job terms, persisted as one gzip JSON object in
+S3 so the matcher does not recount them over the whole corpus per request. The
+aggregator applies deltas as it inserts, rewrites and removes jobs, and compaction
+recounts from a table scan. Every write bumps `version`. Updates are conditional
+on the ETag they read (S3 conditional writes) and retried on conflict, so
+concurrent aggregator runs do not lose each other's deltas.
+"""
+import gzip
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from . import keywords as kw
+
+KEY = "corpus/df.json.gz"
+_CONFLICT_CODES = {"PreconditionFailed", "ConditionalRequestConflict"}
+
+def idf_weight(n: int, df: int) -> float:
+    """Smoothed idf the matcher scores with; `n` is the corpus size."""
+    n = n or 1
+    return math.log((n + 1) / (df + 1)) + 1.0
+
+@dataclass
+class CorpusStats:
+    n: int = 0
+    df: Dict[str, int] = field(default_factory=dict)
+    version: int = 0
+    normalizer: int = kw.VERSION
+
+    def apply(self, added: Iterable[Iterable[str]] = (), removed: Iterable[Iterable[str]] = ()) -> None:
+        """Counts the term sets of jobs that entered (`added`) and left (`removed`) the corpus."""
+        for terms in added:
+            self.n += 1
+            for t in terms:
+                self.df[t] = self.df.get(t, 0) + 1
+        for terms in removed:
+            self.n = max(0, self.n - 1)
+            for t in terms:
+                left = self.df.get(t, 0) - 1
+                if left > 0:
+                    self.df[t] = left
+                else:
+                    self.df.pop(t, None)
+
+    def idf(self) -> Dict[str, float]:
+        return {t: idf_weight(self.n, d) for t, d in self.df.items()}
+
+def item_terms(item: Dict[str, Any]) -> Set[str]:
+    """Normalized terms of a stored job item: the ingest-time set if current, else recomputed."""
+    norm = item.get("keywords_norm")
+    version = item.get("keywords_version")
+    if norm is not None and version is not None and int(version) == kw.VERSION:
+        return set(norm)
+    return kw.normalize_keywords(item.get("keywords") or ())
+
+def encode(stats: CorpusStats) -> bytes:
+    payload = {"version": stats.version, "normalizer": stats.normalizer, "n": stats.n, "df": stats.df}
+    return gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), mtime=0)
+
+def decode(data: bytes) -> Optional[CorpusStats]:
+    """None for a table counted with another keyword normalizer: its terms no longer match."""
+    payload = json.loads(gzip.decompress(data))
+    if payload.get("normalizer") != kw.VERSION:
+        return None
+    return CorpusStats(n=payload["n"], df=payload["df"], version=payload["version"], normalizer=payload["normalizer"])
+
+def _error_code(e: Exception) -> str:
+    return getattr(e, "response", {}).get("Error", {}).get("Code", "")
+
+def load(s3_client: Any, bucket: str, etag: Optional[str] = None) -> Tuple[Optional[CorpusStats], Optional[str]]:
+    """
+    (stats, etag) of the stored table. With the `etag` of a copy already held, an
+    unchanged table is not downloaded again and (None, etag) comes back. A missing
+    table is (None, None).
+    """
+    kwargs: Dict[str, Any] = {"Bucket": bucket, "Key": KEY}
+    if etag:
+        kwargs["IfNoneMatch"] = etag
+    try:
+        obj = s3_client.get_object(**kwargs)
+    except Exception as e:
+        code = _error_code(e)
+        if code in ("304", "NotModified"):
+            return None, etag
+        if code in ("NoSuchKey", "404"):
+            return None, None
+        raise
+    return decode(obj["Body"].read()), obj.get("ETag")
+
+def update(s3_client: Any, bucket: str, change: Callable[[CorpusStats], Optional[CorpusStats]],
+           attempts: int = 5, *, existing_only: bool = False) -> Optional[CorpusStats]:
+    """
+    Read-modify-write of the table: `change` edits the stats it gets (or returns a
+    replacement), the version is bumped and the write only lands if nobody wrote in
+    between; otherwise it starts over from a fresh read. Deltas pass `existing_only`:
+    counted onto a missing (or other-normalizer) table they would be wrong, so that
+    is left to the next full recount.
+    """
+    for _ in range(attempts):
+        current, etag = load(s3_client, bucket)
+        if current is None and existing_only:
+            return None
+        stats = current or CorpusStats()
+        stats = change(stats) or stats
+        stats.version = (current.version if current else 0) + 1
+        stats.normalizer = kw.VERSION
+        cond = {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+        try:
+            s3_client.put_object(Bucket=bucket, Key=KEY, Body=encode(stats), **cond)
+            return stats
+        except Exception as e:
+            if _error_code(e) not in _CONFLICT_CODES:
+                raise
+    print(f"[warn] corpus stats: gave up after {attempts} conflicting writes")
+    return None
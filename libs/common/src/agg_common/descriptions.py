@@ -0,0 +1,87 @@
+# libs/common/src/agg_common/descriptions.py
+"""
+Job descriptions live outside the hot jobs-table attributes: the aggregator stores
+them sanitized and gzip-compressed, either in S3 (item keeps `description_ref`) or
+as a binary `description_z` attribute. Readers call `load` only for a job detail.
+"""
+import gzip
+import html
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+_ALLOWED = {"p", "br", "ul", "ol", "li", "strong", "b", "em", "i", "u", "a", "h1", "h2", "h3", "h4", "h5", "h6",
+            "blockquote", "code", "pre", "hr"}
+_VOID = {"br", "hr"}
+# Dropped together with everything inside them.
+_DROP = {"script", "style", "iframe", "object", "embed", "noscript", "template", "svg", "form"}
+_SAFE_HREF = re.compile(r"^(https?:|mailto:)", re.I)
+_SPACE = re.compile(r"[ \t\r\f\v]*\n[\s]*|[ \t\r\f\v]{2,}")
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _DROP:
+            self.skip += 1
+            return
+        if self.skip or tag not in _ALLOWED:
+            return
+        if tag == "a":
+            href = dict(attrs).get("href") or ""
+            if _SAFE_HREF.match(href.strip()):
+                self.out.append(f'<a href="{html.escape(href.strip())}" rel="nofollow noopener">')
+                return
+        self.out.append(f"<{tag}>")
+
+    def handle_startendtag(self, tag, attrs):
+        if not self.skip and tag in _VOID:
+            self.out.append(f"<{tag}>")
+
+    def handle_endtag(self, tag):
+        if tag in _DROP:
+            self.skip = max(0, self.skip - 1)
+            return
+        if not self.skip and tag in _ALLOWED and tag not in _VOID:
+            self.out.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if not self.skip:
+            self.out.append(html.escape(data, quote=False))
+
+def sanitize_html(text: str) -> str:
+    """Whitelist of formatting tags, no attributes but http(s)/mailto hrefs, scripts and styles removed."""
+    p = _Sanitizer()
+    p.feed(text)
+    p.close()
+    return _SPACE.sub(lambda m: "\n" if "\n" in m.group(0) else " ", "".join(p.out)).strip()
+
+def compress(text: str) -> bytes:
+    return gzip.compress(text.encode("utf-8"), compresslevel=6, mtime=0)
+
+def decompress(data: bytes) -> str:
+    return gzip.decompress(data).decode("utf-8")
+
+def s3_key(source: str, source_job_id: str) -> str:
+    return f"descriptions/{quote(source, safe='')}/{quote(source_job_id, safe='')}.html.gz"
+
+def s3_ref(bucket: str, key: str) -> str:
+    return f"s3://{bucket}/{key}"
+
+def load(item: Dict[str, Any], s3_client: Any = None) -> Optional[str]:
+    """Description of a stored job item, whichever way it was written (inline, compressed or S3)."""
+    if item.get("description") is not None:
+        return item["description"]
+    blob = item.get("description_z")
+    if blob is not None:
+        return decompress(getattr(blob, "value", blob))
+    ref = item.get("description_ref")
+    if ref and s3_client is not None:
+        bucket, _, key = ref[len("s3://"):].partition("/")
+        obj = s3_client.get_object(Bucket=bucket, Key=key)
+        return decompress(obj["Body"].read())
+    return None
@@ -0,0 +1,138 @@
+# libs/common/src/agg_common/keywords.py
+"""
+Keyword extraction and normalization shared by the aggregator (at ingest) and the
+matcher (for CV keywords and job items stored before normalization moved to ingest).
+Bump VERSION whenever the output of `normalize_keywords` changes, so stored
+normalized sets are recomputed instead of being compared against new ones.
+"""
+import html
+import re
+from typing import Iterable, Optional, Set
+
+VERSION = 1
+
+_WORD = re.compile(r"[a-z0-9+#.-]+")
+
+STOPWORDS = {
+    "and","or","of","the","a","an","to","in","for","with","on","at","by","from","as",
+    "using","use","used","usage","experience","experiences","skills","skill","strong",
+    "good","best","better","great","plus","junior","senior","lead","leading","team",
+    "teams","across","around","while","within","over","across","about","more","less",
+    "many","some","such","that","this","these","those","will","can","ability","able",
+    "work","working","environment","culture","company","role","position","positions",
+    "responsibilities","requirements","quality","practice","practices","success",
+    "successful","mission","growth","growing","improve","improving","improvement",
+    "ensure","ensuring","enable","enabling","support","supporting","help","drive",
+    "driving","make","making","deliver","delivering","delivered","develop","developing",
+    "developed","design","designing","designed","build","building","built","optimize",
+    "optimizing","optimization","maintain","maintaining","maintenance","testing","test",
+    "tests","automated","automation","secure","security","reliable","reliability",
+    "efficient","efficiency","performance","scalable","scalability","agile","scrum",
+    "product","products","applications","application","software","systems","system",
+    "domain","data","digital","global","international","patients","customer","clients"
+}
+
+ALIASES = {
+    "postgresql": "postgres",
+    "postgre": "postgres",
+    "postgress": "postgres",
+    "aws lambda": "aws-lambda",
+    "lambda": "aws-lambda",
+    "serverless": "aws-lambda",
+    "amazon web services": "aws",
+    "gcp": "google-cloud",
+    "google cloud": "google-cloud",
+    "ms sql": "sqlserver",
+    "mssql": "sqlserver",
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "k8s": "kubernetes",
+    "docker compose": "docker-compose",
+    "ci/cd": "ci-cd",
+    "ci\\cd": "ci-cd",
+    "rest": "rest-api",
+    "restful": "rest-api",
+    "graphql": "graph-ql"
+}
+
+# Plain English filler that shows up in free text but never in a CV keyword list;
+# only applied when extracting from descriptions, so CV normalization is unchanged.
+TEXT_STOPWORDS = {
+    "is","are","was","were","be","been","being","am","do","does","did","done","have",
+    "has","had","having","it","its","we","our","ours","us","you","your","yours","they",
+    "their","them","he","she","his","her","i","me","my","who","whom","which","what",
+    "when","where","why","how","all","any","each","every","both","either","not","no",
+    "nor","but","if","then","than","so","too","very","just","also","into","onto","out",
+    "up","down","off","per","via","etc","e.g","i.e","new","one","two","would","should",
+    "could","may","might","must","shall","other","others","own","same","there","here",
+    "get","gets","got","join","joining","looking","like","well","own","including",
+    "include","includes","based","within","without","under","after","before","between",
+    "through","during","year","years","day","days","week","weeks","month","months",
+}
+
+_TAG = re.compile(r"<[^>]+>")
+_SPACE = re.compile(r"\s+")
+# Keeps symbols that carry meaning in tech terms (c#, c++, node.js, .net, ci-cd) but
+# never lets a token end in '.' or '-', so sentence punctuation is dropped.
+_TOKEN = re.compile(r"(?<![a-z0-9])\.?[a-z0-9](?:[a-z0-9+#.-]*[a-z0-9+#])?")
+_PHRASES = sorted((k for k in ALIASES if not _WORD.fullmatch(k)), key=len, reverse=True)
+_PHRASE = re.compile(r"(?<![a-z0-9])(" + "|".join(re.escape(p) for p in _PHRASES) + r")(?![a-z0-9])")
+
+def strip_html(text: str) -> str:
+    return html.unescape(_TAG.sub(" ", text))
+
+def lemmatize_lite(tok: str) -> str:
+    for suf in ("ing", "ed", "es", "s"):
+        if len(tok) > 4 and tok.endswith(suf):
+            return tok[: -len(suf)]
+    return tok
+
+def normalize_term(term: str) -> Optional[str]:
+    term = term.lower().strip()
+    tokens = _WORD.findall(term)
+    if not tokens:
+        return None
+    norm = " ".join(tokens)
+
+    if norm in ALIASES:
+        norm = ALIASES[norm]
+
+    parts = []
+    for p in norm.split():
+        if p in STOPWORDS:
+            continue
+        p = lemmatize_lite(p)
+        if p and p not in STOPWORDS:
+            parts.append(p)
+
+    if not parts:
+        return None
+
+    return " ".join(parts)
+
+def normalize_keywords(keywords: Iterable[str]) -> Set[str]:
+    out: Set[str] = set()
+    for k in keywords:
+        norm = normalize_term(k)
+        if norm:
+            out.add(norm)
+    return out
+
+def extract_keywords(text: Optional[str]) -> Set[str]:
+    """
+    Raw keyword tokens of a free-text (possibly HTML) description: lowercased, tech
+    symbols kept, multi-word aliases ("amazon web services", "ci/cd") joined into
+    their canonical token, filler words and bare numbers dropped. Feed the result to
+    `normalize_keywords` for the form the matcher compares.
+    """
+    if not text:
+        return set()
+    text = _SPACE.sub(" ", strip_html(text).lower())
+    text = _PHRASE.sub(lambda m: ALIASES[m.group(1)], text)
+    out: Set[str] = set()
+    for tok in _TOKEN.findall(text):
+        if len(tok) < 2 or tok.isdigit() or tok in TEXT_STOPWORDS or tok in STOPWORDS:
+            continue
+        out.add(tok)
+    return out
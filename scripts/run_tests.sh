@@ -13,5 +13,6 @@ case "${1:-unit}" in
   unit)         exec pytest -v -rA --durations=10 tests/unit ;;
   integration)  exec pytest -v -rA --durations=10 tests/integration ;;
   all)          pytest -v -rA tests/unit; exec pytest -v -Ra tests/integration ;;
+  bench)        shift; PYTHONPATH="/app:${PYTHONPATH}" exec python -m benchmarks.bench_aggregate "$@" ;;
   *)            exec pytest "$@" ;;
 esac
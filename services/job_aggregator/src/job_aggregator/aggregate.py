@@ -1,50 +1,364 @@
 # job_aggregator/aggregate.py
 from __future__ import annotations
 
-import asyncio, httpx, sys, os
+import asyncio, httpx, sys, os, time
 
-from typing import List
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from datetime import datetime, timezone
 
-from .models import Job, Query
+from typing import Dict, List, Sequence, Tuple
+
+from agg_common import keywords as kw
+from .models import Job, Query, QueryStats, RunStats
 from providers import available_providers
-from .dedupe import dedupe
-from .storage import save_jobs
+from providers.base import Provider
+from providers.cache import get_cache
+from providers.resilience import CircuitOpenError
+from .compaction import stamp_seen
+from .dedupe import Deduper, NearDuplicateIndex, fingerprint
+from .snapshots import SnapshotDiff, decode, encode, get_store, snapshot_name
+from .corpus import CorpusDelta
+from .storage import close_jobs, refresh_jobs, stored_keys, stored_terms, write_jobs, classify_changes
+from . import config, http_client, metrics, watermarks
 
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+_DONE = object()
+
 def extract_keywords(text: str | None) -> set:
-    if not text:
-        return set()
-    words = {word.lower() for word in text.split() if len(word) > 3 and word.isalpha()}
-    return words
-
-@retry(wait=wait_exponential(min=0.5, max=4), stop=stop_after_attempt(3),
-       retry=retry_if_exception_type((httpx.HTTPError, asyncio.TimeoutError)))
-async def _run_provider(p, query: Query) -> List[Job]:
-    return await p.search(query)
-
-async def run(query: Query) -> List[Job]:
-    providers = available_providers()
-    tasks = [asyncio.create_task(_run_provider(p, query)) for p in providers]
-    results: List[Job] = []
-    for coro in asyncio.as_completed(tasks):
+    return kw.extract_keywords(text)
+
+def annotate_keywords(job: Job) -> None:
+    """Raw keywords (for the /jobs filter) plus the normalized set the matcher scores on."""
+    job.keywords = extract_keywords(job.description)
+    job.keywords_norm = kw.normalize_keywords(job.keywords)
+    job.keywords_version = kw.VERSION
+
+def _load_snapshot(name: str):
+    try:
+        return decode(get_store().load(name))
+    except Exception as e:
+        print(f"[warn] snapshot {name} unreadable, processing everything: {e}")
+        return {}
+
+async def _produce(p: Provider, query: Query, slots: asyncio.Semaphore, jobs: asyncio.Queue, stats: RunStats,
+                   snapshots: List[Tuple[Provider, Query, SnapshotDiff]] | None = None,
+                   marks: List[Tuple[Provider, Query, watermarks.Watermark]] | None = None,
+                   skip_unchanged: bool = True):
+    """
+    `snapshots` / `marks` collect the diff of a snapshot provider and the advanced
+    watermark of an incremental one once their stream was read to the end; None
+    disables them. Without `skip_unchanged` the diff only tracks removals and every
+    job goes down the pipeline.
+    """
+    key = query.key()
+    qs = stats.queries[key]
+    diff = None
+    if snapshots is not None and p.snapshot:
+        diff = SnapshotDiff(await asyncio.to_thread(_load_snapshot, snapshot_name(p.name, key)))
+    mark, newest, fetch = None, None, query
+    if marks is not None and p.incremental:
+        mark = await asyncio.to_thread(watermarks.load, p.name, key)
+        if (since := mark.since(time.time())) is not None:
+            fetch = query.model_copy(update={"since": since})
+        stats.watermarks[f"{p.name}:{key}"] = since.isoformat() if since else "full"
+    try:
+        async for job in p.stream(fetch, slots):
+            stats.providers[p.name] = stats.providers.get(p.name, 0) + 1
+            qs.providers[p.name] = qs.providers.get(p.name, 0) + 1
+            if mark is not None and job.posted_at is not None:
+                newest = max(newest or 0.0, watermarks.epoch(job.posted_at))
+            if diff is not None and not diff.observe(job) and skip_unchanged:
+                continue
+            await jobs.put((qs, job))
+        if diff is not None:
+            snapshots.append((p, query, diff))
+        if mark is not None:
+            marks.append((p, query, mark.advance(newest, full=fetch.since is None, now=time.time())))
+    except CircuitOpenError as e:
+        if p.name not in stats.skipped:
+            stats.skipped.append(p.name)
+            print(f"[warn] provider skipped: {e}")
+    except Exception as e:
+        print(f"[warn] provider failed: {e}")
+    finally:
+        if p.parse_stats["items"] or p.parse_stats["skipped"]:
+            stats.parse[p.name] = dict(p.parse_stats)
+        if p.http_stats["requests"]:
+            stats.http[p.name] = metrics.provider_http(p)
+
+async def _finish_snapshots(done: List[Tuple[Provider, Query, SnapshotDiff]], stats: RunStats,
+                            delta: CorpusDelta | None = None, queries: int = 1):
+    """
+    Closes postings that left a provider's dump and stores the new snapshots, but only
+    after every write went through: otherwise a job that failed to save would look
+    unchanged next time and never be retried. A dump that lost more than
+    AGG_SNAPSHOT_MAX_REMOVED of the previous one is treated as a provider glitch.
+
+    A posting is only closed when it is missing from every query of the provider in
+    this run (one that left the "python" dump may still be listed under "django"), so
+    nothing is closed or saved for a provider unless all `queries` of it finished.
+    """
+    now = datetime.now(timezone.utc)
+    by_provider: Dict[str, List[Tuple[Query, SnapshotDiff, List[str]]]] = {}
+    for p, q, diff in done:
+        removed = diff.removed()
+        stats.snapshots[f"{p.name}:{q.key()}"] = dict(diff.counts)
+        by_provider.setdefault(p.name, []).append((q, diff, removed))
+
+    for name, runs in by_provider.items():
+        if stats.writes.failed:
+            print(f"[warn] {name}: snapshot not saved, {stats.writes.failed} writes failed")
+            continue
+        if len(runs) < queries:
+            print(f"[warn] {name}: {queries - len(runs)} query dump(s) incomplete, not closing or saving")
+            continue
+        listed = {sid for _, diff, _ in runs for sid in diff.current}
+        gone: set[str] = set()
+        keep: List[Tuple[Query, SnapshotDiff]] = []
+        for q, diff, removed in runs:
+            if removed and len(removed) > config.snapshot_max_removed() * len(diff.previous):
+                print(f"[warn] {name}: {len(removed)}/{len(diff.previous)} postings gone, not closing or saving")
+                continue
+            gone.update(sid for sid in removed if sid not in listed)
+            keep.append((q, diff))
+        try:
+            if gone:
+                closed = await close_jobs([(name, sid) for sid in sorted(gone)], now)
+                stats.closed += len(closed)
+                if delta is not None:
+                    delta.removed.extend(closed.values())
+            for q, diff in keep:
+                await asyncio.to_thread(get_store().save, snapshot_name(name, q.key()), encode(diff.current))
+        except Exception as e:
+            print(f"[warn] {name}: snapshot update failed: {e}")
+
+async def _save_watermarks(done: List[Tuple[Provider, Query, watermarks.Watermark]], stats: RunStats):
+    """Like snapshots, a watermark only moves once everything fetched below it was written."""
+    if stats.writes.failed:
+        print(f"[warn] watermarks not advanced, {stats.writes.failed} writes failed")
+        return
+    for p, q, mark in done:
         try:
-            results.extend(await coro)
+            await asyncio.to_thread(watermarks.save, p.name, q.key(), mark)
         except Exception as e:
-            print(f"[warn] provider failed: {e}")
+            print(f"[warn] {p.name}: watermark update failed: {e}")
 
-    unique_jobs = dedupe(results)
+async def _close_when_done(producers: List[asyncio.Task], jobs: asyncio.Queue, clock: metrics.StageClock):
+    start = time.perf_counter()
+    await asyncio.gather(*producers, return_exceptions=True)
+    clock.lap("fetch", start)
+    await jobs.put(_DONE)
 
-    for job in unique_jobs:
-        job.keywords = extract_keywords(job.description)
+async def _cut_off_after(budget: float, producers: List[Tuple[asyncio.Task, Provider, Query]], stats: RunStats):
+    """Cancels producers still fetching once the budget is spent; what they already queued is still written."""
+    await asyncio.sleep(max(0.0, budget))
+    for task, p, q in producers:
+        if task.done():
+            continue
+        task.cancel()
+        stats.deadline_hit = True
+        if p.name not in stats.cut_off:
+            stats.cut_off.append(p.name)
+        qs = stats.queries[q.key()]
+        if p.name not in qs.cut_off:
+            qs.cut_off.append(p.name)
+    if stats.cut_off:
+        print(f"[warn] fetch budget of {budget:.1f}s spent, cut off: {', '.join(stats.cut_off)}")
 
-    if unique_jobs:
+async def _publish_corpus(delta: CorpusDelta, stats: RunStats):
+    try:
+        table = await asyncio.to_thread(delta.publish)
+    except Exception as e:
+        print(f"[warn] corpus stats not updated: {e}")
+        return
+    if table is not None:
+        stats.corpus_version = table.version
+
+async def _write_batches(batches: asyncio.Queue, stats: RunStats, clock: metrics.StageClock,
+                         delta: CorpusDelta | None = None):
+    while (item := await batches.get()) is not _DONE:
+        batch, deletes = item
+        t = time.perf_counter()
         try:
-            save_jobs(unique_jobs)
-            print(f"[info] Successfully saved {len(unique_jobs)} jobs to DynamoDB.")
+            changes = await asyncio.to_thread(classify_changes, batch)
+            t = clock.lap("classify", t)
+            stats.unchanged += len(changes["unchanged"])
+            stale = await refresh_jobs(changes["refreshed"])
+            changed = changes["inserted"] + changes["updated"] + stale
+            before = {}
+            if delta is not None:
+                before = stored_terms([(j.source, j.source_job_id) for j in changes["updated"]] + deletes)
+            result = await write_jobs(changed, deletes)
+            t = clock.lap("write", t)
+            if delta is not None and not result.failed:
+                delta.written(changes, deletes, before)
+            stats.writes.merge(result)
+            stats.inserted += len(changes["inserted"])
+            stats.updated += len(changes["updated"])
+            stats.refreshed += len(changes["refreshed"])
+            stats.deleted += len(deletes)
+            stats.written += len(changed) + len(changes["refreshed"]) - len(stale)
         except Exception as e:
+            stats.writes.failed += len(batch) + len(deletes)
             print(f"[ERROR] Failed to save jobs to DynamoDB: {e}")
 
-    return unique_jobs
\ No newline at end of file
+def unique_queries(query: Query | Sequence[Query]) -> List[Query]:
+    """
+    Drops repeated queries. Snapshots, watermarks and per-query stats are keyed by
+    Query.key() alone, so two queries with the same key that differ otherwise (page,
+    results_per_page, remote, ...) are rejected with a ValueError.
+    """
+    queries = [query] if isinstance(query, Query) else list(query)
+    seen: dict[str, Query] = {}
+    for q in queries:
+        first = seen.setdefault(q.key(), q)
+        if first != q:
+            diff = sorted(f for f in Query.model_fields if getattr(first, f) != getattr(q, f))
+            raise ValueError(f"queries for '{q.key()}' differ in {', '.join(diff)}")
+    return list(seen.values())
+
+async def run(query: Query | Sequence[Query], *, client: httpx.AsyncClient | None = None, stats: RunStats | None = None,
+              collect: bool | None = None, providers: List[Provider] | None = None,
+              budget: float | None = None) -> List[Job]:
+    """
+    Streams jobs from every provider through dedupe (plus optional cross-source
+    near-duplicate removal) -> keyword extraction -> batched writes of new or changed
+    jobs (by content fingerprint). Stages are linked by bounded queues, so writes
+    start with the first page and a slow stage applies back-pressure to fetching.
+    Jobs are only kept in memory (and returned) when `collect` is set, which defaults
+    to off for crawls.
+
+    `query` may be a list: every (provider, query) pair streams concurrently under the
+    same global request cap, and one deduper spans all of them, so a posting matched
+    by several queries is written once. Per-query counts land in `stats.queries`.
+
+    `budget` bounds the fetch phase in seconds: providers still fetching when it runs
+    out are cancelled and listed in `stats.cut_off`, and everything already fetched
+    is deduped and written as usual.
+
+    Full-dump providers (`Provider.snapshot`) are diffed against their previous dump
+    when jobs are not collected: only added / changed postings go down the pipeline
+    and removed ones are marked closed (AGG_SNAPSHOT=0 turns this off). Likewise
+    incremental providers only fetch postings newer than the (provider, query)
+    watermark, with a full crawl every AGG_WATERMARK_FULL_HOURS (AGG_WATERMARK=0
+    turns this off). Near-duplicate removal has to see every listed copy, stored ones
+    included, so with it on snapshots only close removed postings and watermarks are
+    not used; unchanged jobs still cost no write (content fingerprint).
+
+    With CORPUS_STATS_BUCKET set, the term changes of what was written are applied
+    to the shared document-frequency table once the run is done (job_aggregator.corpus).
+    """
+    started = time.perf_counter()
+    client = client or http_client.get_client()
+    stats = stats if stats is not None else RunStats()
+    clock = metrics.StageClock(stats)
+    queries = unique_queries(query)
+    collect = (not any(q.crawl for q in queries)) if collect is None else collect
+
+    providers = providers if providers is not None else available_providers(client)
+    for p in providers:
+        p.reset_stats()
+    for q in queries:
+        stats.queries.setdefault(q.key(), QueryStats())
+    cache = get_cache()
+    cache_before = cache.snapshot() if cache else {}
+    slots = asyncio.Semaphore(config.max_concurrency())
+    jobs: asyncio.Queue = asyncio.Queue(maxsize=config.stream_buffer())
+    batches: asyncio.Queue = asyncio.Queue(maxsize=2)
+
+    snapshots: List[Tuple[Provider, Query, SnapshotDiff]] | None = [] if config.snapshot_mode() and not collect else None
+    near_on = config.near_dedupe_enabled()
+    marks: List[Tuple[Provider, Query, watermarks.Watermark]] | None = (
+        [] if config.watermark_mode() and not collect and not near_on else None)
+    producers = [(asyncio.create_task(_produce(p, q, slots, jobs, stats, snapshots, marks, not near_on)), p, q)
+                 for q in queries for p in providers]
+    closer = asyncio.create_task(_close_when_done([t for t, _, _ in producers], jobs, clock))
+    delta = CorpusDelta() if config.corpus_stats_bucket() else None
+    writer = asyncio.create_task(_write_batches(batches, stats, clock, delta))
+    watchdog = asyncio.create_task(_cut_off_after(budget, producers, stats)) if budget is not None else None
+
+    deduper = Deduper()
+    near = NearDuplicateIndex(config.near_dedupe_threshold(), config.near_dedupe_num_perm(),
+                              config.source_priority()) if near_on else None
+    near_kept: Dict[Tuple[str, str], QueryStats] = {}  # kept by the near index -> query it was counted under
+    losers: List[Tuple[str, str]] = []  # dropped copies; deleted below if an earlier run stored them
+    batch_size = config.write_batch_size()
+    out: List[Job] = []
+    batch: List[Job] = []
+    deletes: List[Tuple[str, str]] = []
+    seen_at = datetime.now(timezone.utc)
+    try:
+        while (item := await jobs.get()) is not _DONE:
+            qs, job = item
+            stats.fetched += 1
+            qs.fetched += 1
+            t = time.perf_counter()
+            if not deduper.add(job):
+                qs.duplicates += 1
+                clock.lap("dedupe", t)
+                continue
+            if near is not None:
+                keep, superseded = near.add(job)
+                if superseded:
+                    stats.near_duplicates += 1
+                    deletes.append(superseded)
+                    batch = [j for j in batch if (j.source, j.source_job_id) != superseded]
+                    if collect:
+                        out = [j for j in out if (j.source, j.source_job_id) != superseded]
+                    stats.unique -= 1
+                    lost = near_kept.pop(superseded)
+                    lost.unique -= 1
+                    lost.duplicates += 1
+                if not keep:
+                    stats.near_duplicates += 1
+                    qs.duplicates += 1
+                    losers.append((job.source, job.source_job_id))
+                    clock.lap("dedupe", t)
+                    continue
+                near_kept[(job.source, job.source_job_id)] = qs
+            t = clock.lap("dedupe", t)
+            stats.unique += 1
+            qs.unique += 1
+            annotate_keywords(job)
+            t = clock.lap("keywords", t)
+            job.fingerprint = fingerprint(job)
+            stamp_seen(job, seen_at)
+            clock.lap("fingerprint", t)
+            if collect:
+                out.append(job)
+            batch.append(job)
+            if len(batch) >= batch_size:
+                await batches.put((batch, deletes))
+                batch, deletes = [], []
+        if losers:
+            try:
+                deletes.extend(await asyncio.to_thread(stored_keys, losers))
+            except Exception as e:
+                print(f"[warn] stored near-duplicates not checked, left in place: {e}")
+        if batch or deletes:
+            await batches.put((batch, deletes))
+        await batches.put(_DONE)
+        await writer
+        if snapshots:
+            t = time.perf_counter()
+            await _finish_snapshots(snapshots, stats, delta, len(queries))
+            clock.lap("snapshots", t)
+        if marks:
+            await _save_watermarks(marks, stats)
+        if delta:
+            await _publish_corpus(delta, stats)
+    finally:
+        for t in (*(t for t, _, _ in producers), closer, writer, watchdog):
+            if t is not None:
+                t.cancel()
+
+    if cache is not None:
+        stats.cache = cache.since(cache_before)
+    print(f"[info] Saved {stats.written} jobs to DynamoDB "
+          f"(inserted={stats.inserted} updated={stats.updated} refreshed={stats.refreshed} unchanged={stats.unchanged} "
+          f"closed={stats.closed} "
+          f"throttled={stats.writes.throttled} failed={stats.writes.failed}).")
+    clock.lap("total", started)
+    metrics.emit_run(stats)
+    return out
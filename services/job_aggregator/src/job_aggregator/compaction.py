@@ -0,0 +1,103 @@
+# job_aggregator/compaction.py
+
+from __future__ import annotations
+
+import asyncio, time
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+from agg_common import corpus_stats
+from . import config, corpus, metrics, storage
+from .models import CompactionStats, Job
+
+def _utc(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+def expires_at(last_seen: datetime, posted_at: datetime | None) -> int:
+    """TTL epoch: last seen + AGG_JOB_TTL_DAYS, capped by posted_at + AGG_JOB_MAX_AGE_DAYS."""
+    exp = _utc(last_seen) + timedelta(days=config.job_ttl_days())
+    max_age = config.job_max_age_days()
+    if posted_at is not None and max_age > 0:
+        exp = min(exp, _utc(posted_at) + timedelta(days=max_age))
+    return int(exp.timestamp())
+
+def stamp_seen(job: Job, now: datetime) -> None:
+    job.last_seen_at = now
+    job.expires_at = expires_at(now, job.posted_at)
+
+def classify_item(item: Dict[str, Any], now: float) -> str:
+    """'active', 'unseen', 'too_old' or 'legacy' for a projected jobs-table item."""
+    posted = storage._epoch(item.get("posted_at"))
+    max_age = config.job_max_age_days()
+    if posted is not None and max_age > 0 and now - posted > max_age * 86400:
+        return "too_old"
+    seen = storage._epoch(item.get("last_seen_at"))
+    if seen is None:
+        return "legacy"
+    return "unseen" if now - seen > config.job_ttl_days() * 86400 else "active"
+
+def _scan_pages():
+    kwargs: Dict[str, Any] = {
+        "ProjectionExpression": "#src, source_job_id, last_seen_at, posted_at, closed_at, "
+                                "keywords, keywords_norm, keywords_version",
+        "ExpressionAttributeNames": {"#src": "source"},
+        "ReturnConsumedCapacity": "TOTAL",
+    }
+    while True:
+        resp = storage.table.scan(**kwargs)
+        yield resp.get("Items", []), (resp.get("ConsumedCapacity") or {}).get("CapacityUnits", 0.0)
+        if "LastEvaluatedKey" not in resp:
+            return
+        kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+def _scan(stats: CompactionStats, now: float) -> Tuple[List[Tuple[str, str]], corpus_stats.CorpusStats]:
+    """The blocking part of `compact` (run off the event loop): keys to delete and the recount of the rest."""
+    drop_legacy = config.compact_legacy()
+    doomed: List[Tuple[str, str]] = []
+    recount = corpus_stats.CorpusStats()
+    for items, rcu in _scan_pages():
+        stats.consumed_rcu += rcu
+        for it in items:
+            stats.scanned += 1
+            status = classify_item(it, now)
+            setattr(stats, status, getattr(stats, status) + 1)
+            if status in ("unseen", "too_old") or (status == "legacy" and drop_legacy):
+                doomed.append((it["source"], it["source_job_id"]))
+            elif not it.get("closed_at"):
+                recount.apply(added=[corpus_stats.item_terms(it)])
+    return doomed, recount
+
+async def compact(now: float | None = None, *, dry_run: bool = False) -> CompactionStats:
+    """
+    Scans the key / timestamp projection of the jobs table and deletes jobs that were
+    not seen for AGG_JOB_TTL_DAYS or were posted more than AGG_JOB_MAX_AGE_DAYS ago.
+    The TTL attribute does the same lazily (deletion lags up to ~48h); this keeps scan
+    cost bounded by active postings without waiting for it. Items written before
+    last_seen_at existed are only dropped with AGG_COMPACT_LEGACY.
+
+    The same scan recounts the document-frequency table over the jobs that stay
+    listed (not deleted, not closed) and replaces the stored one, which undoes any
+    drift of the per-run deltas.
+    """
+    now = time.time() if now is None else now
+    stats = CompactionStats(dry_run=dry_run)
+    doomed, recount = await asyncio.to_thread(_scan, stats, now)
+
+    if doomed and not dry_run:
+        result = await storage.write_jobs([], doomed)
+        stats.failed = result.failed
+        stats.deleted = len(doomed) - result.failed
+    if not dry_run:
+        try:
+            table = await asyncio.to_thread(corpus.replace, recount)
+            stats.corpus_version = table.version if table else None
+        except Exception as e:
+            print(f"[warn] corpus stats recount not saved: {e}")
+    emit_metrics(stats)
+    return stats
+
+def emit_metrics(stats: CompactionStats) -> None:
+    """CloudWatch embedded-metric-format line, so corpus size is graphed over time from the logs alone."""
+    names = ["scanned", "active", "unseen", "too_old", "legacy", "deleted", "failed", "consumed_rcu"]
+    print(metrics.emf("JobAggregator/Corpus", {"Table": storage.table_name},
+                      {n: (getattr(stats, n), "Count") for n in names}))
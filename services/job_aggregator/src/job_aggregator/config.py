@@ -1,6 +1,6 @@
 # job_aggregator/config.py
 
-import os
+import json, os
 from agg_common.secrets_loader import get_secret
 
 _SECRETS_PREFIX = os.getenv('SECRETS_PREFIX', "")
@@ -9,4 +9,180 @@ def adzuna_app_id() -> str | None:
     return get_secret("adzuna_app_id", prefix=_SECRETS_PREFIX, default="")
 
 def adzuna_app_key() -> str | None:
-    return get_secret('adzuna_app_key', prefix=_SECRETS_PREFIX, default="")
\ No newline at end of file
+    return get_secret('adzuna_app_key', prefix=_SECRETS_PREFIX, default="")
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except (ValueError, TypeError):
+        return default
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except (ValueError, TypeError):
+        return default
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    val = os.getenv(name)
+    if val is None or val == "":
+        return default
+    return val.strip().lower() in {"1", "true", "yes", "on"}
+
+def _provider_env(provider: str, key: str) -> str:
+    return f"AGG_{provider.upper()}_{key}"
+
+def http_timeout() -> float:
+    return _env_float("AGG_HTTP_TIMEOUT", 20.0)
+
+def http_max_connections() -> int:
+    return _env_int("AGG_HTTP_MAX_CONNECTIONS", 20)
+
+def http_max_keepalive() -> int:
+    return _env_int("AGG_HTTP_MAX_KEEPALIVE", 10)
+
+def http_keepalive_expiry() -> float:
+    return _env_float("AGG_HTTP_KEEPALIVE_EXPIRY", 120.0)
+
+def http2_enabled() -> bool:
+    return _env_bool("AGG_HTTP2", False)
+
+def provider_timeout(provider: str, default: float) -> float:
+    return _env_float(_provider_env(provider, "TIMEOUT"), default)
+
+def provider_max_connections(provider: str, default: int) -> int:
+    return _env_int(_provider_env(provider, "MAX_CONNECTIONS"), default)
+
+def max_concurrency() -> int:
+    return _env_int("AGG_MAX_CONCURRENCY", 16)
+
+def max_pages() -> int:
+    return _env_int("AGG_MAX_PAGES", 40)
+
+def provider_concurrency(provider: str, default: int) -> int:
+    return _env_int(_provider_env(provider, "CONCURRENCY"), default)
+
+def stream_buffer() -> int:
+    return _env_int("AGG_STREAM_BUFFER", 500)
+
+def write_batch_size() -> int:
+    return _env_int("AGG_WRITE_BATCH_SIZE", 100)
+
+def near_dedupe_enabled() -> bool:
+    return _env_bool("AGG_NEAR_DEDUPE", False)
+
+def near_dedupe_threshold() -> float:
+    return _env_float("AGG_NEAR_DEDUPE_THRESHOLD", 0.8)
+
+def near_dedupe_num_perm() -> int:
+    return _env_int("AGG_NEAR_DEDUPE_NUM_PERM", 64)
+
+def providers() -> list[str]:
+    """AGG_PROVIDERS=remotive,adzuna selects the providers of a run; empty means the registry defaults."""
+    return [s.strip().lower() for s in os.getenv("AGG_PROVIDERS", "").split(",") if s.strip()]
+
+def source_priority() -> list[str]:
+    return [s.strip() for s in os.getenv("AGG_SOURCE_PRIORITY", "").split(",") if s.strip()]
+
+def http_cache_backend() -> str:
+    return (os.getenv("AGG_HTTP_CACHE") or "file").strip().lower()
+
+def http_cache_dir() -> str:
+    return os.getenv("AGG_HTTP_CACHE_DIR") or "/tmp/agg-http-cache"
+
+def http_cache_ttl() -> float:
+    return _env_float("AGG_HTTP_CACHE_TTL", 300.0)
+
+def http_cache_max_entries() -> int:
+    return _env_int("AGG_HTTP_CACHE_MAX_ENTRIES", 256)
+
+def provider_rate(provider: str, default: float) -> float:
+    return _env_float(_provider_env(provider, "RATE"), default)
+
+def provider_burst(provider: str, default: int) -> int:
+    return _env_int(_provider_env(provider, "BURST"), default)
+
+def breaker_threshold(provider: str) -> int:
+    return _env_int(_provider_env(provider, "BREAKER_THRESHOLD"), 3)
+
+def breaker_reset_timeout(provider: str) -> float:
+    return _env_float(_provider_env(provider, "BREAKER_RESET"), 120.0)
+
+def parse_mode(provider: str) -> str:
+    mode = os.getenv(_provider_env(provider, "PARSE_MODE")) or os.getenv("AGG_PARSE_MODE") or "strict"
+    return mode.strip().lower()
+
+def write_concurrency() -> int:
+    return _env_int("AGG_WRITE_CONCURRENCY", 8)
+
+def write_max_retries() -> int:
+    return _env_int("AGG_WRITE_MAX_RETRIES", 8)
+
+def write_backoff_cap() -> float:
+    return _env_float("AGG_WRITE_BACKOFF_CAP", 2.0)
+
+def crawl_plans() -> dict[str, list]:
+    """Named query lists, e.g. AGG_CRAWL_PLANS='{"ro-tech": ["python", {"q": "java", "location": "Cluj"}]}'."""
+    try:
+        plans = json.loads(os.getenv("AGG_CRAWL_PLANS") or "{}")
+    except ValueError:
+        return {}
+    return plans if isinstance(plans, dict) else {}
+
+def deadline_reserve() -> float:
+    """Seconds of the Lambda's remaining time kept back from fetching for the final writes and the response."""
+    return _env_float("AGG_DEADLINE_RESERVE", 8.0)
+
+def job_ttl_days() -> float:
+    """Days a job stays after it was last seen; drives the expires_at TTL attribute."""
+    return _env_float("AGG_JOB_TTL_DAYS", 30.0)
+
+def job_max_age_days() -> float:
+    """Days after posted_at a job is dropped even if still listed; 0 disables the cutoff."""
+    return _env_float("AGG_JOB_MAX_AGE_DAYS", 60.0)
+
+def last_seen_refresh_hours() -> float:
+    return _env_float("AGG_LAST_SEEN_REFRESH_HOURS", 24.0)
+
+def compact_legacy() -> bool:
+    """Whether compaction also drops items written before last_seen_at existed."""
+    return _env_bool("AGG_COMPACT_LEGACY", False)
+
+def descriptions_bucket() -> str | None:
+    """S3 bucket for offloaded descriptions; unset keeps them as a compressed item attribute."""
+    return os.getenv("AGG_DESCRIPTIONS_BUCKET") or None
+
+def snapshot_mode() -> bool:
+    return _env_bool("AGG_SNAPSHOT", True)
+
+def snapshot_dir() -> str:
+    return os.getenv("AGG_SNAPSHOT_DIR") or "/tmp/agg-snapshots"
+
+def snapshot_bucket() -> str | None:
+    """Keeps snapshots and watermarks in S3 (snapshots/ prefix) so they survive cold starts; unset uses AGG_SNAPSHOT_DIR."""
+    return os.getenv("AGG_SNAPSHOT_BUCKET") or None
+
+def snapshot_max_removed() -> float:
+    return _env_float("AGG_SNAPSHOT_MAX_REMOVED", 0.5)
+
+def closed_ttl_days() -> float:
+    """Days a closed posting stays in the table (hidden from readers) before TTL removes it."""
+    return _env_float("AGG_CLOSED_TTL_DAYS", 7.0)
+
+def metrics_enabled() -> bool:
+    """Embedded-metric-format log lines per run (job_aggregator.metrics)."""
+    return _env_bool("AGG_METRICS", True)
+
+def watermark_mode() -> bool:
+    return _env_bool("AGG_WATERMARK", True)
+
+def watermark_overlap_hours() -> float:
+    return _env_float("AGG_WATERMARK_OVERLAP_HOURS", 2.0)
+
+def watermark_full_hours() -> float:
+    """Hours between full crawls of an incremental (provider, query); must stay below AGG_JOB_TTL_DAYS."""
+    return _env_float("AGG_WATERMARK_FULL_HOURS", 24.0)
+
+def corpus_stats_bucket() -> str | None:
+    """Bucket of the shared term document-frequency table (agg_common.corpus_stats); unset disables it."""
+    return os.getenv("CORPUS_STATS_BUCKET") or None
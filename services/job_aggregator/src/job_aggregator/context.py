@@ -0,0 +1,81 @@
+# job_aggregator/context.py
+
+from __future__ import annotations
+
+import asyncio, time
+import httpx
+
+from typing import Awaitable, Dict, Iterable, List, TypeVar
+from providers import available_providers, default_providers
+from providers.base import Provider
+from . import http_client
+
+T = TypeVar("T")
+
+class AggregatorContext:
+    """
+    What a warm container keeps between invocations: one event loop, the pooled HTTP
+    client whose connections live on it, and the provider instances. Module-level
+    state elsewhere is kept the same way and also survives a context reset: the
+    response cache (providers.cache), limiter / breaker state (providers.resilience)
+    and the fingerprint / term maps of job_aggregator.storage.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.client: httpx.AsyncClient = http_client.new_client()
+        self._providers: Dict[str, Provider | None] = {}
+        self.invocations = 0
+        self.created_at = time.monotonic()
+
+    def providers(self, names: Iterable[str] | None = None) -> List[Provider]:
+        """Instances for `names` (default: the configured set), built once per context; None marks disabled ones."""
+        names = list(default_providers() if names is None else names)
+        for name in names:
+            if name not in self._providers:
+                built = available_providers(self.client, [name])
+                self._providers[name] = built[0] if built else None
+        return [p for n in names if (p := self._providers[n]) is not None]
+
+    @property
+    def warm(self) -> bool:
+        return self.invocations > 0
+
+    def run(self, aw: Awaitable[T]) -> T:
+        try:
+            return self.loop.run_until_complete(aw)
+        finally:
+            self.invocations += 1
+
+    def close(self) -> None:
+        if self.loop.is_closed():
+            return
+        try:
+            pending = [t for t in asyncio.all_tasks(self.loop) if not t.done()]
+            for t in pending:
+                t.cancel()
+            if pending:
+                self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.run_until_complete(self.client.aclose())
+            self.loop.run_until_complete(http_client.aclose())
+        except Exception as e:
+            print(f"[warn] context cleanup failed: {e}")
+        finally:
+            self.loop.close()
+
+# Rebuilt after a failed invocation.
+_context: AggregatorContext | None = None
+
+def get_context() -> AggregatorContext:
+    global _context
+    if _context is None or _context.loop.is_closed():
+        _context = AggregatorContext()
+    return _context
+
+def reset_context() -> None:
+    """Drops the loop, client and providers so the next invocation starts clean."""
+    global _context
+    if _context is not None:
+        _context.close()
+    _context = None
@@ -0,0 +1,52 @@
+# job_aggregator/corpus.py
+
+from __future__ import annotations
+
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+from agg_common import corpus_stats
+from . import config, storage
+from .models import Job
+
+Key = Tuple[str, str]
+
+class CorpusDelta:
+    """
+    Term-set changes of one run for the shared document-frequency table: jobs that
+    entered the listed corpus, and stored term sets that left it (rewritten with other
+    terms, deleted as near-duplicates or closed). Removals whose stored terms this
+    process never saw are left to the compaction recount.
+    """
+
+    def __init__(self):
+        self.added: List[FrozenSet[str]] = []
+        self.removed: List[FrozenSet[str]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed)
+
+    def written(self, changes: Dict[str, List[Job]], deletes: Iterable[Key], before: Dict[Key, FrozenSet[str]]):
+        """`before` is `storage.stored_terms` of the updated and deleted keys, read before the write."""
+        for job in changes["inserted"]:
+            self.added.append(frozenset(job.keywords_norm or ()))
+        for job in changes["updated"]:
+            old = before.get((job.source, job.source_job_id))
+            new = frozenset(job.keywords_norm or ())
+            if old is not None and old != new:
+                self.removed.append(old)
+                self.added.append(new)
+        self.removed.extend(before[k] for k in deletes if k in before)
+
+    def publish(self) -> corpus_stats.CorpusStats | None:
+        """Applies the delta to the stored table (conditional write); None without a bucket or a table yet."""
+        bucket = config.corpus_stats_bucket()
+        if not bucket or not self:
+            return None
+        return corpus_stats.update(storage._s3(), bucket, lambda s: s.apply(self.added, self.removed),
+                                   existing_only=True)
+
+def replace(stats: corpus_stats.CorpusStats) -> corpus_stats.CorpusStats | None:
+    """Overwrites the stored table with a full recount (compaction)."""
+    bucket = config.corpus_stats_bucket()
+    if not bucket:
+        return None
+    return corpus_stats.update(storage._s3(), bucket, lambda _: stats)
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import hashlib, json, re
+
+from array import array
 from urllib.parse import urlsplit, urlunsplit
-from typing import Iterable, List, Tuple
+from typing import Dict, Iterable, List, Sequence, Tuple
 from .models import Job
 
 def _norm_url(url: str) -> str:
@@ -13,13 +16,177 @@ def _norm_url(url: str) -> str:
 def signature(j: Job) -> Tuple[str, str, str | None]:
     return _norm_url(str(j.url)) or "", j.title.lower().strip(), (j.company or "").lower().strip() or None
 
-def dedupe(jobs: Iterable[Job]) -> List[Job]:
-    seen: set[Tuple[str, str, str | None]] = set()
-    out: List[Job] = []
-    for j in jobs:
+_CONTENT_FIELDS = ("title", "company", "location", "remote", "url", "description", "salary", "posted_at", "extras")
+
+def _hash(j: Job, fields: Tuple[str, ...]) -> str:
+    content = j.model_dump(mode="json", include=set(fields))
+    raw = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+def content_hash(j: Job) -> str:
+    """Hash of the fields the provider sent, whatever the pipeline has set on the job since."""
+    return _hash(j, _CONTENT_FIELDS)
+
+def fingerprint(j: Job) -> str:
+    """
+    Stable hash of the posting's content; keywords are left out since they derive from
+    it, but the normalizer version is in, so a new version rewrites stored keyword sets.
+    """
+    return _hash(j, _CONTENT_FIELDS + ("keywords_version",))
+
+class Deduper:
+    """Incremental form of `dedupe` for streams: only signatures are kept in memory."""
+
+    def __init__(self):
+        self.seen: set[Tuple[str, str, str | None]] = set()
+
+    def add(self, j: Job) -> bool:
         sig = signature(j)
-        if sig in seen:
+        if sig in self.seen:
+            return False
+        self.seen.add(sig)
+        return True
+
+def dedupe(jobs: Iterable[Job]) -> List[Job]:
+    d = Deduper()
+    return [j for j in jobs if d.add(j)]
+
+# --- near-duplicates (MinHash + LSH) ---
+
+_TAG = re.compile(r"<[^>]+>")
+_TOKEN = re.compile(r"[a-z0-9]+")
+_MASK64 = (1 << 64) - 1
+_DENSIFY_STEP = 0x9E3779B97F4A7C15
+_SHINGLE_SIZE = 3
+_MAX_TOKENS = 400
+
+def _shingles(j: Job) -> set[str]:
+    text = " ".join(filter(None, (j.title, j.company, j.description)))
+    tokens = _TOKEN.findall(_TAG.sub(" ", text).lower())[:_MAX_TOKENS]
+    if len(tokens) <= _SHINGLE_SIZE:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + _SHINGLE_SIZE]) for i in range(len(tokens) - _SHINGLE_SIZE + 1)}
+
+def minhash(shingles: Iterable[str], num_perm: int = 64) -> array:
+    """
+    One-permutation MinHash: each shingle is hashed once and lands in one of `num_perm`
+    bins, keeping the minimum per bin; empty bins borrow from the next filled bin
+    (rotation densification). Cost is linear in the number of shingles. Uses the
+    process-salted builtin hash, so signatures only compare within one process.
+    """
+    bins: List[int | None] = [None] * num_perm
+    for s in shingles:
+        h = hash(s) & _MASK64
+        b, v = h % num_perm, h // num_perm
+        cur = bins[b]
+        if cur is None or v < cur:
+            bins[b] = v
+    if all(v is None for v in bins):
+        return array("Q")
+
+    sig = array("Q", [0] * num_perm)
+    nxt, dist = None, 0
+    for i in reversed(range(2 * num_perm)):
+        idx = i % num_perm
+        if bins[idx] is not None:
+            nxt, dist = bins[idx], 0
+            sig[idx] = nxt
+        else:
+            dist += 1
+            if nxt is not None:
+                sig[idx] = (nxt + dist * _DENSIFY_STEP) & _MASK64
+    return sig
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) whose S-curve midpoint (1/b)^(1/r) is closest to `threshold`."""
+    best: Tuple[float, int, int] | None = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
             continue
-        seen.add(sig)
-        out.append(j)
-    return out
+        bands = num_perm // rows
+        err = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or err < best[0]:
+            best = (err, bands, rows)
+    return best[1], best[2]
+
+class NearDuplicateIndex:
+    """
+    Streaming near-duplicate detector across sources. Each job's MinHash signature is
+    split into LSH bands; only jobs sharing a band bucket are compared, so lookups stay
+    sub-quadratic. Of two matching jobs the one whose source ranks higher in `priority`
+    wins (earlier = better; unlisted sources rank last); ties go to the lower source
+    name, then source_job_id, so the same copy wins whatever order jobs arrive in.
+    Jobs from the same source are never collapsed.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, priority: Sequence[str] = ()):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self.priority = {s: i for i, s in enumerate(priority)}
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(self.bands)]
+        self._sigs: List[array] = []
+        self._keys: List[Tuple[str, str]] = []
+        self._alive: List[bool] = []
+
+    def _rank(self, key: Tuple[str, str]) -> Tuple[int, str, str]:
+        return self.priority.get(key[0], len(self.priority)), key[0], key[1]
+
+    def _band_keys(self, sig: array) -> Iterable[Tuple[int, int]]:
+        for b in range(self.bands):
+            yield b, hash(tuple(sig[b * self.rows:(b + 1) * self.rows]))
+
+    def _best_match(self, sig: array, source: str) -> int | None:
+        best, best_sim = None, self.threshold
+        seen: set[int] = set()
+        for b, h in self._band_keys(sig):
+            for idx in self._buckets[b].get(h, ()):
+                if idx in seen or not self._alive[idx] or self._keys[idx][0] == source:
+                    continue
+                seen.add(idx)
+                sim = similarity(sig, self._sigs[idx])
+                if sim >= best_sim:
+                    best, best_sim = idx, sim
+        return best
+
+    def _insert(self, sig: array, key: Tuple[str, str]):
+        idx = len(self._sigs)
+        self._sigs.append(sig)
+        self._keys.append(key)
+        self._alive.append(True)
+        for b, h in self._band_keys(sig):
+            self._buckets[b].setdefault(h, []).append(idx)
+
+    def add(self, j: Job) -> Tuple[bool, Tuple[str, str] | None]:
+        """Returns (keep, superseded): whether to keep `j`, and the key of a previously kept job it replaces."""
+        sig = minhash(_shingles(j), self.num_perm)
+        key = (j.source, j.source_job_id)
+        if not len(sig):
+            return True, None
+        match = self._best_match(sig, j.source)
+        if match is None:
+            self._insert(sig, key)
+            return True, None
+        kept = self._keys[match]
+        if self._rank(key) < self._rank(kept):
+            self._alive[match] = False
+            self._insert(sig, key)
+            return True, kept
+        return False, None
+
+def near_dedupe(jobs: Iterable[Job], threshold: float = 0.8, num_perm: int = 64,
+                priority: Sequence[str] = ()) -> List[Job]:
+    index = NearDuplicateIndex(threshold, num_perm, priority)
+    kept: Dict[Tuple[str, str], Job] = {}
+    for j in jobs:
+        keep, superseded = index.add(j)
+        if superseded:
+            kept.pop(superseded, None)
+        if keep:
+            kept[(j.source, j.source_job_id)] = j
+    return list(kept.values())
@@ -1,13 +1,57 @@
 # job_aggregator/handler.py
 
-import json, asyncio, sys, os
+import json, sys, os
 
-from .models import Query
-from .aggregate import run
+from typing import List
+from .models import Query, RunStats
+from .aggregate import run, unique_queries
+from .context import get_context, reset_context
+from .compaction import compact
+from providers import unknown_providers
+from . import config, metrics
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-def handler(event, _context):
+def _build_queries(raw: list, location: str | None, common: dict) -> List[Query]:
+    """Entries are plain search terms or {"q", "location", ...} overrides of the request-wide options."""
+    if not isinstance(raw, list):
+        raise ValueError("queries must be a list")
+    out = []
+    for r in raw:
+        if isinstance(r, str):
+            out.append(Query(q=r, location=location, **common))
+        else:
+            out.append(Query(**{**common, "location": location, **r}))
+    return unique_queries(out)
+
+def _fetch_budget(context) -> float | None:
+    remaining = getattr(context, "get_remaining_time_in_millis", None)
+    if remaining is None:
+        return None
+    return max(1.0, remaining() / 1000 - config.deadline_reserve())
+
+def _provider_names(raw) -> List[str] | None:
+    if not raw:
+        return None
+    names = raw.split(",") if isinstance(raw, str) else list(raw)
+    return [str(n).strip().lower() for n in names if str(n).strip()]
+
+def _compact(dry_run) -> dict:
+    """Scheduled with {"action": "compact"}; see compaction.compact."""
+    ctx = get_context()
+    try:
+        stats = ctx.run(compact(dry_run=str(dry_run or "").strip().lower() in {"1", "true", "yes"}))
+    except Exception as e:
+        print(f"[ERROR] compaction failed, resetting context: {e}")
+        reset_context()
+        raise
+    return {
+        "statusCode": 200,
+        "headers": {"content-type": "application/json"},
+        "body": json.dumps(stats.model_dump()),
+    }
+
+def handler(event, context):
     qsp = (event.get("queryStringParameters") or {}) if isinstance(event, dict) else {}
     body = event.get("body") if isinstance(event, dict) else None
 
@@ -17,9 +61,17 @@ def handler(event, _context):
 
     body = body or {}
 
+    # Scheduled events carry their fields at the top level, API calls in the body.
+    direct = event if isinstance(event, dict) else {}
+    if (body.get("action") or direct.get("action")) == "compact":
+        return _compact(body.get("dry_run") or direct.get("dry_run"))
+
     q = body.get("q") or qsp.get("q")
     loc = body.get("location") or qsp.get("location")
 
+    crawl = str(body.get("crawl") or qsp.get("crawl") or "").strip().lower() in {"1", "true", "yes"}
+    debug = str(body.get("debug") or qsp.get("debug") or "").strip().lower() in {"1", "true", "yes"}
+
     try:
         page = int(body.get("page") or qsp.get("page") or 1)
         per_page = int(body.get("per_page") or qsp.get("per_page") or 50)
@@ -27,15 +79,72 @@ def handler(event, _context):
         page = 1
         per_page = 50
 
-    if not q:
+    try:
+        max_pages = int(body.get("max_pages") or qsp.get("max_pages") or 0) or None
+    except (ValueError, TypeError):
+        max_pages = None
+
+    common = dict(page=page, results_per_page=per_page, crawl=crawl, max_pages=max_pages)
+    plan = body.get("plan") or qsp.get("plan")
+    raw = body.get("queries")
+    if plan:
+        raw = config.crawl_plans().get(plan)
+        if raw is None:
+            return {"statusCode": 400, "body": json.dumps({"error": f"unknown plan '{plan}'"})}
+
+    if raw:
+        try:
+            queries = _build_queries(raw, loc, common)
+        except (ValueError, TypeError) as e:
+            return {"statusCode": 400, "body": json.dumps({"error": f"invalid queries: {e}"})}
+    elif q:
+        queries = [Query(q=q, location=loc, **common)]
+    else:
         return {"statusCode": 400, "body": json.dumps({"error": "missing q"})}
 
-    query = Query(q=q, location=loc, page=page, results_per_page=per_page)
-    jobs = asyncio.run(run(query))
+    names = _provider_names(body.get("providers") or qsp.get("providers"))
+    if names and (unknown := unknown_providers(names)):
+        return {"statusCode": 400, "body": json.dumps({"error": f"unknown providers: {', '.join(unknown)}"})}
 
+    ctx = get_context()
+    stats = RunStats(warm=ctx.warm)
+    try:
+        jobs = ctx.run(run(queries, client=ctx.client, providers=ctx.providers(names), stats=stats,
+                           budget=_fetch_budget(context)))
+    except Exception as e:
+        print(f"[ERROR] aggregation failed, resetting context: {e}")
+        reset_context()
+        raise
+
+    if crawl or len(queries) > 1:
+        # A full crawl can exceed the Lambda response size limit; report a summary only.
+        summary = {"count": stats.unique, "stats": stats.model_dump()}
+        if not crawl:
+            summary["jobs"] = [j.model_dump(mode="json") for j in jobs]
+        if debug:
+            summary["metrics"] = metrics.summary(stats)
+        return {
+            "statusCode": 200,
+            "headers": {"content-type": "application/json"},
+            "body": json.dumps(summary),
+        }
+
+    if debug:
+        # Timings need an object body; debug callers get the summary shape with the jobs in it.
+        return {
+            "statusCode": 200,
+            "headers": {"content-type": "application/json"},
+            "body": json.dumps({"count": stats.unique, "jobs": [j.model_dump(mode="json") for j in jobs],
+                                "metrics": metrics.summary(stats)}),
+        }
+
+    headers = {"content-type": "application/json"}
+    if stats.cut_off:
+        # The plain list body has no room for stats; partial results are flagged here.
+        headers["x-agg-cut-off"] = ",".join(stats.cut_off)
     return {
         "statusCode": 200,
-        "headers": {"content-type": "application/json"},
+        "headers": headers,
         "body": json.dumps([j.model_dump(mode="json") for j in jobs]),
     }
 
@@ -0,0 +1,67 @@
+# job_aggregator/http_client.py
+
+from __future__ import annotations
+
+import asyncio
+import httpx
+
+from . import config
+
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2 support when installed)
+except ImportError:
+    h2 = None
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+# Closes of clients left behind by a loop change; referenced so they are not collected mid-close.
+_closing: set[asyncio.Task] = set()
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=config.http_max_connections(),
+        max_keepalive_connections=config.http_max_keepalive(),
+        keepalive_expiry=config.http_keepalive_expiry(),
+    )
+
+def new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=_limits(),
+        timeout=httpx.Timeout(config.http_timeout()),
+        http2=config.http2_enabled() and h2 is not None,
+        follow_redirects=True,
+    )
+
+async def _close_quietly(client: httpx.AsyncClient) -> None:
+    try:
+        await client.aclose()
+    except Exception as e:
+        print(f"[warn] stale http client not closed cleanly: {e}")
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide pooled client, creating it on first use.
+    Connections are bound to the event loop they were opened on, so a new
+    client is created whenever the running loop changes; the old one is
+    closed in the background on the new loop.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        if _client is not None and not _client.is_closed:
+            task = loop.create_task(_close_quietly(_client))
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
+        _client = new_client()
+        _client_loop = loop
+    return _client
+
+async def aclose() -> None:
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    pending = [t for t in _closing if t.get_loop() is loop]
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client, _client_loop = None, None
@@ -0,0 +1,85 @@
+# job_aggregator/metrics.py
+
+from __future__ import annotations
+
+import json, math, time
+
+from typing import Any, Dict, List, Tuple
+from . import config
+from .models import RunStats
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)], 2)
+    return {"p50": pick(0.50), "p95": pick(0.95), "max": round(ordered[-1], 2)}
+
+class StageClock:
+    """Accumulates wall time per pipeline stage into `RunStats.stages` (ms): `t = clock.lap("dedupe", t)`."""
+
+    def __init__(self, stats: RunStats):
+        self.stages = stats.stages
+
+    def lap(self, stage: str, since: float) -> float:
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - since) * 1000
+        return now
+
+def provider_http(p) -> Dict[str, float]:
+    """Request counters of one provider for this run, with latency percentiles instead of samples."""
+    return {**p.http_stats, **{f"latency_{k}_ms": v for k, v in percentiles(p.request_ms).items()}}
+
+def summary(stats: RunStats) -> Dict[str, Any]:
+    """What the debug flag of the handler returns: where the time of a run went."""
+    return {
+        "stages_ms": {k: round(v, 2) for k, v in stats.stages.items()},
+        "providers": stats.http,
+        "parse": stats.parse,
+        "dedupe_ratio": dedupe_ratio(stats),
+        "writes": {"batches": stats.writes.batches, "retries": stats.writes.retries,
+                   "throttled": stats.writes.throttled, "failed": stats.writes.failed,
+                   **{f"latency_{k}_ms": v for k, v in percentiles(stats.writes.batch_ms).items()}},
+    }
+
+def dedupe_ratio(stats: RunStats) -> float:
+    return round((stats.fetched - stats.unique) / stats.fetched, 4) if stats.fetched else 0.0
+
+def emf(namespace: str, dimensions: Dict[str, str], values: Dict[str, Tuple[float, str]]) -> str:
+    """One CloudWatch embedded-metric-format log line; `values` maps metric name -> (value, unit)."""
+    return json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": namespace,
+                "Dimensions": [list(dimensions)],
+                "Metrics": [{"Name": n, "Unit": unit} for n, (_, unit) in values.items()],
+            }],
+        },
+        **dimensions,
+        **{n: v for n, (v, _) in values.items()},
+    })
+
+def emit_run(stats: RunStats) -> None:
+    """A JobAggregator/Runs line for the run and one per provider; AGG_METRICS=0 turns them off."""
+    if not config.metrics_enabled():
+        return
+    write = percentiles(stats.writes.batch_ms)
+    run_values = {
+        "fetched": (stats.fetched, "Count"), "unique": (stats.unique, "Count"), "written": (stats.written, "Count"),
+        "dedupe_ratio": (dedupe_ratio(stats), "None"),
+        "write_p95_ms": (write["p95"], "Milliseconds"),
+        "write_throttled": (stats.writes.throttled, "Count"), "write_failed": (stats.writes.failed, "Count"),
+        **{f"{k}_ms": (round(v, 2), "Milliseconds") for k, v in stats.stages.items()},
+    }
+    print(emf("JobAggregator/Runs", {"Service": "job_aggregator"}, run_values))
+    for name, http in stats.http.items():
+        parse = stats.parse.get(name, {})
+        print(emf("JobAggregator/Runs", {"Provider": name}, {
+            "requests": (http["requests"], "Count"), "errors": (http["errors"], "Count"),
+            "bytes": (http["bytes"], "Bytes"),
+            "latency_p50_ms": (http["latency_p50_ms"], "Milliseconds"),
+            "latency_p95_ms": (http["latency_p95_ms"], "Milliseconds"),
+            "items": (parse.get("items", 0), "Count"), "skipped": (parse.get("skipped", 0), "Count"),
+        }))
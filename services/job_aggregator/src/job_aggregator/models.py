@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional, Any, Set
+from typing import Optional, Any, Set, List
 
 
 class Job(BaseModel):
@@ -15,9 +15,15 @@ class Job(BaseModel):
     url: HttpUrl
     description: Optional[str] = None
     keywords: Optional[Set[str]] = None
+    keywords_norm: Optional[Set[str]] = None
+    keywords_version: Optional[int] = None
     salary: Optional[str] = None
     posted_at: Optional[datetime] = None
     extras: dict[str, Any] = Field(default_factory=dict)
+    fingerprint: Optional[str] = None
+    last_seen_at: Optional[datetime] = None
+    expires_at: Optional[int] = None  # epoch seconds, the table's TTL attribute
+    closed_at: Optional[datetime] = None
 
 class Query(BaseModel):
     q: str
@@ -25,3 +31,74 @@ class Query(BaseModel):
     remote: Optional[bool] = None
     page: Optional[int] = 1
     results_per_page: Optional[int] = 50
+    crawl: bool = False
+    max_pages: Optional[int] = None
+    since: Optional[datetime] = None  # only postings from then on, for providers that filter by date
+
+    def key(self) -> str:
+        return f"{self.q}@{self.location}" if self.location else self.q
+
+class Page(BaseModel):
+    jobs: List[Job] = Field(default_factory=list)
+    total: Optional[int] = None
+
+class WriteStats(BaseModel):
+    items: int = 0
+    batches: int = 0
+    retries: int = 0
+    throttled: int = 0
+    failed: int = 0
+    batch_ms: List[float] = Field(default_factory=list)
+
+    def merge(self, other: "WriteStats") -> None:
+        self.items += other.items
+        self.batches += other.batches
+        self.retries += other.retries
+        self.throttled += other.throttled
+        self.failed += other.failed
+        self.batch_ms.extend(other.batch_ms)
+
+class QueryStats(BaseModel):
+    fetched: int = 0
+    unique: int = 0
+    duplicates: int = 0
+    providers: dict[str, int] = Field(default_factory=dict)
+    cut_off: List[str] = Field(default_factory=list)
+
+class RunStats(BaseModel):
+    warm: bool = False
+    fetched: int = 0
+    unique: int = 0
+    written: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    refreshed: int = 0
+    near_duplicates: int = 0
+    deleted: int = 0
+    closed: int = 0
+    providers: dict[str, int] = Field(default_factory=dict)
+    cache: dict[str, int] = Field(default_factory=dict)
+    skipped: List[str] = Field(default_factory=list)
+    parse: dict[str, dict[str, float]] = Field(default_factory=dict)
+    http: dict[str, dict[str, float]] = Field(default_factory=dict)
+    stages: dict[str, float] = Field(default_factory=dict)  # wall ms per pipeline stage
+    writes: WriteStats = Field(default_factory=WriteStats)
+    queries: dict[str, QueryStats] = Field(default_factory=dict)
+    deadline_hit: bool = False
+    cut_off: List[str] = Field(default_factory=list)
+    snapshots: dict[str, dict[str, int]] = Field(default_factory=dict)
+    watermarks: dict[str, str] = Field(default_factory=dict)  # "provider:query" -> since (ISO) or "full"
+    corpus_version: Optional[int] = None  # document-frequency table version this run wrote
+
+class CompactionStats(BaseModel):
+    scanned: int = 0
+    active: int = 0
+    unseen: int = 0       # last_seen_at older than the TTL
+    too_old: int = 0      # posted_at before the max-age cutoff
+    legacy: int = 0       # no last_seen_at (written before it existed)
+    deleted: int = 0
+    failed: int = 0
+    consumed_rcu: float = 0.0
+    dry_run: bool = False
+    corpus_version: Optional[int] = None
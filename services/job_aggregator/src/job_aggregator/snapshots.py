@@ -0,0 +1,122 @@
+# job_aggregator/snapshots.py
+
+from __future__ import annotations
+
+import gzip, hashlib, json, os, time
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Tuple
+from agg_common import keywords as kw
+from . import config
+from .dedupe import content_hash
+from .models import Job
+
+# source_job_id -> (content hash, epoch it was last passed on for processing)
+Snapshot = Dict[str, Tuple[str, float]]
+
+class SnapshotStore(ABC):
+    @abstractmethod
+    def load(self, name: str) -> bytes | None: ...
+
+    @abstractmethod
+    def save(self, name: str, data: bytes) -> None: ...
+
+class FileSnapshotStore(SnapshotStore):
+    """Under /tmp by default, which a cold start loses: everything is processed once more."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def load(self, name: str) -> bytes | None:
+        try:
+            return (self.root / name).read_bytes()
+        except OSError:
+            return None
+
+    def save(self, name: str, data: bytes) -> None:
+        tmp = self.root / f"{name}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, self.root / name)
+
+class S3SnapshotStore(SnapshotStore):
+    def __init__(self, bucket: str):
+        import boto3
+        self.bucket = bucket
+        self.s3 = boto3.client("s3")
+
+    def load(self, name: str) -> bytes | None:
+        try:
+            return self.s3.get_object(Bucket=self.bucket, Key=f"snapshots/{name}")["Body"].read()
+        except self.s3.exceptions.NoSuchKey:
+            return None
+
+    def save(self, name: str, data: bytes) -> None:
+        self.s3.put_object(Bucket=self.bucket, Key=f"snapshots/{name}", Body=data)
+
+_store: SnapshotStore | None = None
+
+def get_store() -> SnapshotStore:
+    global _store
+    if _store is None:
+        bucket = config.snapshot_bucket()
+        _store = S3SnapshotStore(bucket) if bucket else FileSnapshotStore(config.snapshot_dir())
+    return _store
+
+def snapshot_name(provider: str, query_key: str, suffix: str = ".json.gz") -> str:
+    return f"{provider}-{hashlib.sha1(query_key.encode('utf-8')).hexdigest()[:16]}{suffix}"
+
+def decode(data: bytes | None) -> Snapshot:
+    """An unreadable snapshot, or one from another keyword normalizer, counts as none."""
+    if not data:
+        return {}
+    try:
+        payload = json.loads(gzip.decompress(data))
+    except (OSError, ValueError):
+        return {}
+    if payload.get("version") != kw.VERSION:
+        return {}
+    return {k: (v[0], v[1]) for k, v in payload.get("jobs", {}).items()}
+
+def encode(snapshot: Snapshot) -> bytes:
+    payload = {"version": kw.VERSION, "jobs": snapshot}
+    return gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), mtime=0)
+
+class SnapshotDiff:
+    """
+    Diffs a full-dump provider response against the previous one in a single pass:
+    `observe` says whether a job is added / changed (process it) or unchanged (skip
+    it), and `removed` lists ids of the previous snapshot that were not observed.
+    Unchanged jobs are still passed on once per AGG_LAST_SEEN_REFRESH_HOURS, so their
+    last_seen_at / TTL keep moving.
+    """
+
+    def __init__(self, previous: Snapshot, now: float | None = None):
+        self.previous = previous
+        self.current: Snapshot = {}
+        self.now = time.time() if now is None else now
+        self.refresh = config.last_seen_refresh_hours() * 3600
+        self.counts = {"added": 0, "changed": 0, "unchanged": 0, "refreshed": 0, "removed": 0}
+
+    def observe(self, job: Job) -> bool:
+        h = content_hash(job)
+        prev = self.previous.get(job.source_job_id)
+        if prev is None:
+            status = "added"
+        elif prev[0] != h:
+            status = "changed"
+        elif self.now - prev[1] >= self.refresh:
+            status = "refreshed"
+        else:
+            self.counts["unchanged"] += 1
+            self.current[job.source_job_id] = prev
+            return False
+        self.counts[status] += 1
+        self.current[job.source_job_id] = (h, self.now)
+        return True
+
+    def removed(self) -> List[str]:
+        gone = [k for k in self.previous if k not in self.current]
+        self.counts["removed"] = len(gone)
+        return gone
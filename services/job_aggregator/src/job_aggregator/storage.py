@@ -1,10 +1,17 @@
 # job_aggregator/storage.py
 
 
-import boto3
-import os
-from typing import List
-from .models import Job
+import asyncio, boto3, os, random, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, FrozenSet, Iterable, List, Tuple
+from agg_common import corpus_stats, descriptions
+from boto3.dynamodb.types import TypeSerializer
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import ClientError
+from . import config
+from .models import Job, WriteStats
 
 table_name = os.environ.get('JOBS_TABLE_NAME')
 if not table_name:
@@ -12,22 +19,328 @@ if not table_name:
 
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(table_name)
+client = boto3.client('dynamodb', config=BotoConfig(max_pool_connections=max(10, config.write_concurrency())))
 
-def save_jobs(jobs: List[Job]):
-    if not jobs:
-        print("No jobs to save.")
+# (source, source_job_id) -> fingerprint last written or read.
+_fingerprints: Dict[Tuple[str, str], str | None] = {}
+# Same keys -> stored last_seen_at (epoch seconds); None for items written before it existed.
+_last_seen: Dict[Tuple[str, str], float | None] = {}
+# Same keys -> stored normalized terms, for corpus document-frequency deltas.
+_terms: Dict[Tuple[str, str], FrozenSet[str]] = {}
+# Keys looked up (or deleted) and known to have no stored item.
+_absent: set[Tuple[str, str]] = set()
+
+# Fingerprint of postings that left a snapshot provider (see close_jobs).
+_CLOSED_FINGERPRINT = "closed"
+
+_BATCH_GET_LIMIT = 100
+
+def _key(job: Job) -> Tuple[str, str]:
+    return job.source, job.source_job_id
+
+def _epoch(value: Any) -> float | None:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp() if value else None
+    except ValueError:
+        return None
+
+def _fetch_fingerprints(keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], str | None]:
+    found: Dict[Tuple[str, str], str | None] = {}
+    for i in range(0, len(keys), _BATCH_GET_LIMIT):
+        request = {table_name: {
+            "Keys": [{"source": s, "source_job_id": sid} for s, sid in keys[i:i + _BATCH_GET_LIMIT]],
+            "ProjectionExpression": "#src, source_job_id, fingerprint, last_seen_at, keywords, keywords_norm, keywords_version",
+            "ExpressionAttributeNames": {"#src": "source"},
+        }}
+        attempt = 0
+        while request:
+            if attempt > config.write_max_retries():
+                raise RuntimeError(f"{len(request[table_name]['Keys'])} keys still unprocessed after {attempt} attempts")
+            if attempt:
+                time.sleep(_backoff(attempt))
+            resp = dynamodb.batch_get_item(RequestItems=request)
+            for it in resp.get("Responses", {}).get(table_name, []):
+                key = (it["source"], it["source_job_id"])
+                found[key] = it.get("fingerprint")
+                _last_seen[key] = _epoch(it.get("last_seen_at"))
+                _terms[key] = frozenset(corpus_stats.item_terms(it))
+            request = resp.get("UnprocessedKeys") or None
+            attempt += 1
+    return found
+
+def stored_keys(keys: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """
+    The keys that have a stored item: answered from the local maps, with one projected
+    BatchGetItem for keys this process knows nothing about.
+    """
+    keys = list(dict.fromkeys(keys))
+    unknown = [k for k in keys if k not in _fingerprints and k not in _absent]
+    if unknown:
+        found = _fetch_fingerprints(unknown)
+        _fingerprints.update(found)
+        _absent.update(k for k in unknown if k not in found)
+    return [k for k in keys if k in _fingerprints]
+
+def _refresh_due(key: Tuple[str, str], now: float) -> bool:
+    """An unchanged job is rewritten anyway when its stored last_seen_at (and so its TTL) is getting old."""
+    if key not in _last_seen:
+        return False
+    seen = _last_seen[key]
+    return seen is None or now - seen >= config.last_seen_refresh_hours() * 3600
+
+def classify_changes(jobs: List[Job], now: float | None = None) -> Dict[str, List[Job]]:
+    """
+    Splits jobs into inserted / updated / unchanged by comparing their fingerprint with
+    the stored one. Known fingerprints come from the local map; the rest are read with a
+    projected BatchGetItem. If that read fails every unknown job is treated as changed.
+    Unchanged jobs whose last_seen_at is older than AGG_LAST_SEEN_REFRESH_HOURS go to
+    "refreshed", so refresh_jobs moves their last_seen_at / expires_at. A closed
+    posting that shows up again counts as inserted: it re-enters the listed corpus.
+    """
+    now = time.time() if now is None else now
+    out: Dict[str, List[Job]] = {"inserted": [], "updated": [], "unchanged": [], "refreshed": []}
+    missing = list({_key(j) for j in jobs if _key(j) not in _fingerprints})
+    stored: Dict[Tuple[str, str], str | None] = {}
+    lookup_ok = True
+    if missing:
+        try:
+            stored = _fetch_fingerprints(missing)
+        except Exception as e:
+            lookup_ok = False
+            print(f"[warn] fingerprint lookup failed, writing all: {e}")
+        _fingerprints.update(stored)
+
+    for j in jobs:
+        k = _key(j)
+        if k in _fingerprints and _fingerprints[k] == _CLOSED_FINGERPRINT:
+            status = "inserted"
+        elif k in _fingerprints:
+            status = "unchanged" if j.fingerprint and _fingerprints[k] == j.fingerprint else "updated"
+            if status == "unchanged" and _refresh_due(k, now):
+                status = "refreshed"
+        else:
+            status = "inserted" if lookup_ok else "updated"
+        out[status].append(j)
+    return out
+
+_BATCH_WRITE_LIMIT = 25
+_THROTTLE_CODES = {"ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded"}
+_serializer = TypeSerializer()
+_executor: ThreadPoolExecutor | None = None
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=config.write_concurrency(), thread_name_prefix="ddb-write")
+    return _executor
+
+def _to_dynamo(value: Any) -> Any:
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {k: _to_dynamo(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_dynamo(v) for v in value]
+    return value
+
+_s3_client = None
+
+def _s3():
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client('s3')
+    return _s3_client
+
+def _offload_description(job: Job, item_dict: Dict[str, Any]) -> None:
+    """
+    Replaces the inline HTML with a sanitized, gzip-compressed copy: an S3 object
+    (AGG_DESCRIPTIONS_BUCKET) referenced by description_ref, or else a binary
+    description_z attribute. Either way scans only pay for the listing fields.
+    """
+    text = item_dict.pop('description', None)
+    if not text:
         return
+    body = descriptions.compress(descriptions.sanitize_html(text))
+    bucket = config.descriptions_bucket()
+    if bucket:
+        key = descriptions.s3_key(job.source, job.source_job_id)
+        _s3().put_object(Bucket=bucket, Key=key, Body=body, ContentType="text/html; charset=utf-8",
+                         ContentEncoding="gzip")
+        item_dict['description_ref'] = descriptions.s3_ref(bucket, key)
+    else:
+        item_dict['description_z'] = body
+
+def _item(job: Job) -> Dict[str, Any]:
+    item_dict = job.model_dump(mode="json")
 
-    print(f"Attempting to save {len(jobs)} jobs to table '{table}'...")
+    if 'keywords' in item_dict and not item_dict['keywords']:
+        del item_dict['keywords']
+
+    _offload_description(job, item_dict)
+
+    return {k: _serializer.serialize(_to_dynamo(v)) for k, v in item_dict.items()}
+
+def _delete_request(key: Tuple[str, str]) -> dict:
+    return {"DeleteRequest": {"Key": {"source": {"S": key[0]}, "source_job_id": {"S": key[1]}}}}
+
+def _request_key(req: dict) -> Tuple[str, str]:
+    body = req.get("PutRequest", {}).get("Item") or req["DeleteRequest"]["Key"]
+    return body["source"]["S"], body["source_job_id"]["S"]
+
+def _backoff(attempt: int) -> float:
+    # full jitter: uniform(0, min(cap, base * 2^attempt))
+    return random.uniform(0, min(config.write_backoff_cap(), 0.05 * (2 ** attempt)))
+
+def _write_ops(ops: List[Tuple[str, Any]]) -> Dict[str, Any]:
+    """Builds the requests on the pool thread too, so description uploads run in parallel."""
+    requests = [{"PutRequest": {"Item": _item(arg)}} if op == "put" else _delete_request(arg) for op, arg in ops]
+    return _write_chunk(requests)
+
+def _write_chunk(requests: List[dict]) -> Dict[str, Any]:
+    """One BatchWriteItem of <= 25 requests, retrying UnprocessedItems and throttling errors. Runs on the pool."""
+    start = time.perf_counter()
+    pending, attempt, throttled = requests, 0, 0
+    while pending and attempt <= config.write_max_retries():
+        if attempt:
+            time.sleep(_backoff(attempt))
+        try:
+            resp = client.batch_write_item(RequestItems={table_name: pending})
+            unprocessed = resp.get("UnprocessedItems", {}).get(table_name, [])
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in _THROTTLE_CODES:
+                raise
+            unprocessed = pending
+        throttled += len(unprocessed)
+        pending = unprocessed
+        attempt += 1
+    return {
+        "ms": (time.perf_counter() - start) * 1000,
+        "retries": max(0, attempt - 1),
+        "throttled": throttled,
+        "failed": [_request_key(r) for r in pending],
+    }
+
+def _chunks(puts: Iterable[Job], deletes: Iterable[Tuple[str, str]]) -> List[List[Tuple[str, Any]]]:
+    ops = [("put", j) for j in puts] + [("delete", k) for k in deletes]
+    return [ops[i:i + _BATCH_WRITE_LIMIT] for i in range(0, len(ops), _BATCH_WRITE_LIMIT)]
+
+def _record(results: List[Dict[str, Any]], puts: List[Job], deletes: List[Tuple[str, str]]) -> WriteStats:
+    stats = WriteStats(items=len(puts) + len(deletes), batches=len(results))
+    failed: set[Tuple[str, str]] = set()
+    for r in results:
+        stats.batch_ms.append(round(r["ms"], 2))
+        stats.retries += r["retries"]
+        stats.throttled += r["throttled"]
+        failed.update(r["failed"])
+    stats.failed = len(failed)
+    for job in puts:
+        if _key(job) not in failed:
+            _absent.discard(_key(job))
+            _fingerprints[_key(job)] = job.fingerprint
+            _last_seen[_key(job)] = _epoch(job.last_seen_at) or time.time()
+            _terms[_key(job)] = frozenset(job.keywords_norm or ())
+    for k in deletes:
+        _fingerprints.pop(k, None)
+        _last_seen.pop(k, None)
+        _terms.pop(k, None)
+        if k not in failed:
+            _absent.add(k)
+    return stats
+
+def stored_terms(keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], FrozenSet[str]]:
+    """Normalized terms of the stored items, for the keys this process has read or written."""
+    return {k: _terms[k] for k in keys if k in _terms}
+
+async def write_jobs(puts: List[Job], deletes: List[Tuple[str, str]] = ()) -> WriteStats:
+    """
+    Puts `puts` and deletes `deletes` with BatchWriteItem calls of 25 run in parallel on
+    a thread pool (AGG_WRITE_CONCURRENCY), so the event loop is never blocked. Unprocessed
+    items are retried with jittered exponential backoff; whatever is still unprocessed
+    after AGG_WRITE_MAX_RETRIES is counted as failed.
+    """
+    deletes = list(deletes)
+    chunks = _chunks(puts, deletes)
+    if not chunks:
+        return WriteStats()
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(loop.run_in_executor(_pool(), _write_ops, c) for c in chunks))
+    return _record(results, puts, deletes)
+
+def _touch(job: Job) -> bool:
+    """False if the stored item no longer has the job's fingerprint (or is gone)."""
+    seen = job.model_dump(mode="json", include={"last_seen_at", "expires_at"})
     try:
-        with table.batch_writer() as batch:
-            for job in jobs:
-                item_dict = job.model_dump(mode="json")
+        table.update_item(
+            Key={"source": job.source, "source_job_id": job.source_job_id},
+            UpdateExpression="SET last_seen_at = :s, expires_at = :e",
+            ConditionExpression="fingerprint = :f",
+            ExpressionAttributeValues={":s": seen["last_seen_at"], ":e": seen["expires_at"], ":f": job.fingerprint},
+        )
+        return True
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            return False
+        raise
 
-                if 'keywords' in item_dict and not item_dict['keywords']:
-                    del item_dict['keywords']
+async def refresh_jobs(jobs: List[Job]) -> List[Job]:
+    """
+    Moves last_seen_at / expires_at of unchanged jobs with one UpdateItem each, so the
+    description is neither sanitized nor uploaded again and description_ref stays as
+    stored. Returns the jobs whose stored fingerprint moved meanwhile; those need a
+    full put.
+    """
+    if not jobs:
+        return []
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(loop.run_in_executor(_pool(), _touch, j) for j in jobs))
+    for job, ok in zip(jobs, results):
+        if ok:
+            _last_seen[_key(job)] = _epoch(job.last_seen_at) or time.time()
+    return [j for j, ok in zip(jobs, results) if not ok]
+
+def _close(key: Tuple[str, str], closed_at: str, expires_at: int) -> FrozenSet[str] | None:
+    """Terms of the posting it closed, or None if it was gone or closed already."""
+    try:
+        resp = table.update_item(
+            Key={"source": key[0], "source_job_id": key[1]},
+            UpdateExpression="SET closed_at = :c, expires_at = :e, fingerprint = :f",
+            ConditionExpression="attribute_exists(source_job_id) AND attribute_not_exists(closed_at)",
+            ExpressionAttributeValues={":c": closed_at, ":e": expires_at, ":f": _CLOSED_FINGERPRINT},
+            ReturnValues="ALL_OLD",
+        )
+        return frozenset(corpus_stats.item_terms(resp.get("Attributes") or {}))
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            return None
+        raise
+
+async def close_jobs(keys: List[Tuple[str, str]], now: datetime) -> Dict[Tuple[str, str], FrozenSet[str]]:
+    """
+    Marks postings that left their provider as closed: readers hide them and TTL drops
+    them after AGG_CLOSED_TTL_DAYS. The stored fingerprint is overwritten, so a posting
+    that comes back is rewritten whole (without closed_at). Returns the terms of the
+    postings actually closed.
+    """
+    if not keys:
+        return {}
+    loop = asyncio.get_running_loop()
+    expires = int(now.timestamp() + config.closed_ttl_days() * 86400)
+    results = await asyncio.gather(*(loop.run_in_executor(_pool(), _close, k, now.isoformat(), expires)
+                                     for k in keys))
+    for k in keys:
+        _fingerprints[k] = _CLOSED_FINGERPRINT
+        _terms.pop(k, None)
+    return {k: terms for k, terms in zip(keys, results) if terms is not None}
+
+def save_jobs(jobs: List[Job]) -> WriteStats:
+    if not jobs:
+        print("No jobs to save.")
+        return WriteStats()
 
-                batch.put_item(Item=item_dict)
-        print(f"[info] Successfully initiated batch write for {len(jobs)} jobs.")
-    except Exception as e:
-        raise e
+    print(f"Attempting to save {len(jobs)} jobs to table '{table_name}'...")
+    results = list(_pool().map(_write_ops, _chunks(jobs, ())))
+    stats = _record(results, jobs, [])
+    print(f"[info] Saved {len(jobs) - stats.failed} jobs ({stats.batches} batches, {stats.throttled} throttled).")
+    return stats
@@ -0,0 +1,50 @@
+# job_aggregator/watermarks.py
+
+from __future__ import annotations
+
+import json
+
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+from . import config
+from .snapshots import get_store, snapshot_name
+
+def epoch(dt: datetime) -> float:
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+class Watermark(NamedTuple):
+    """Newest posted_at ingested for a (provider, query) and when its last full crawl finished (epoch seconds)."""
+    posted_at: float | None = None
+    full_at: float | None = None
+
+    def since(self, now: float) -> datetime | None:
+        """
+        Lower posted_at bound for the next fetch, or None when it must be a full one:
+        no watermark yet, or the last full crawl is older than AGG_WATERMARK_FULL_HOURS.
+        Full crawls keep re-seeing older postings, so their last_seen_at / TTL move.
+        """
+        if self.posted_at is None or self.full_at is None:
+            return None
+        if now - self.full_at >= config.watermark_full_hours() * 3600:
+            return None
+        # Postings can be indexed a while after their creation date.
+        return datetime.fromtimestamp(self.posted_at, timezone.utc) - timedelta(hours=config.watermark_overlap_hours())
+
+    def advance(self, newest: float | None, *, full: bool, now: float) -> "Watermark":
+        posted = self.posted_at if newest is None else max(self.posted_at or 0.0, newest)
+        return Watermark(posted, now if full else self.full_at)
+
+def watermark_name(provider: str, query_key: str) -> str:
+    return snapshot_name(provider, query_key, ".watermark.json")
+
+def load(provider: str, query_key: str) -> Watermark:
+    """Missing or unreadable watermarks start over with a full crawl."""
+    try:
+        data = get_store().load(watermark_name(provider, query_key))
+        return Watermark(**json.loads(data)) if data else Watermark()
+    except Exception as e:
+        print(f"[warn] watermark {provider}:{query_key} unreadable, full crawl: {e}")
+        return Watermark()
+
+def save(provider: str, query_key: str, wm: Watermark) -> None:
+    get_store().save(watermark_name(provider, query_key), json.dumps(wm._asdict()).encode("utf-8"))
@@ -1,18 +1,48 @@
-from typing import List
+import httpx, importlib
 
+from typing import Callable, Dict, Iterable, List, NamedTuple, Type
+
+from job_aggregator import config
 from .base import Provider
-from .remotive import RemotiveProvider
-from .adzuna import AdzunaProvider
 
-def available_providers() -> List[Provider]:
-    out: List[Provider] = []
+class ProviderSpec(NamedTuple):
+    target: str                      # "module:Class", imported on first use
+    default: bool = True             # part of the run when AGG_PROVIDERS is unset
+    configured: Callable[[], bool] = lambda: True  # checked before importing the module
+
+# Declared by name so a provider's module is only imported when it is selected and
+# configured. That skips only the provider module itself: `providers.base` and its
+# httpx / tenacity imports are loaded by the pipeline either way.
+REGISTRY: Dict[str, ProviderSpec] = {
+    "remotive": ProviderSpec("providers.remotive:RemotiveProvider"),
+    "adzuna": ProviderSpec("providers.adzuna:AdzunaProvider", default=False,
+                           configured=lambda: bool(config.adzuna_app_id() and config.adzuna_app_key())),
+}
+
+_classes: Dict[str, Type[Provider]] = {}
 
-    all_provider_instances = [
-        RemotiveProvider(),
-        # AdzunaProvider(),
-    ]
+def provider_class(name: str) -> Type[Provider]:
+    if name not in _classes:
+        module, _, cls = REGISTRY[name].target.partition(":")
+        _classes[name] = getattr(importlib.import_module(module), cls)
+    return _classes[name]
 
-    for p in all_provider_instances:
+def default_providers() -> List[str]:
+    return config.providers() or [name for name, spec in REGISTRY.items() if spec.default]
+
+def unknown_providers(names: Iterable[str]) -> List[str]:
+    return [n for n in names if n not in REGISTRY]
+
+def available_providers(client: httpx.AsyncClient | None = None, names: Iterable[str] | None = None) -> List[Provider]:
+    out: List[Provider] = []
+    for name in (default_providers() if names is None else names):
+        spec = REGISTRY.get(name)
+        if spec is None:
+            print(f"[warn] unknown provider '{name}'")
+            continue
+        if not spec.configured():
+            continue
+        p = provider_class(name)(client)
         if p.enabled():
             out.append(p)
     return out
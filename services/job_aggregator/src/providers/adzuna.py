@@ -1,11 +1,11 @@
 # providers/adzuna.py
 
-import os, httpx
+import math, os, httpx
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List
 from job_aggregator import config
-from job_aggregator.models import Job, Query
+from job_aggregator.models import Job, Query, Page
 from .base import Provider
 
 ADZUNA_BASE = os.getenv("ADZUNA_API_BASE", "https://api.adzuna.com/v1/api/jobs")
@@ -26,14 +26,22 @@ def _parse_dt(s: str | None):
 
 class AdzunaProvider(Provider):
     name = "adzuna"
+    timeout = 20.0
+    rate_limit = 4.0
+    burst = 4
+    incremental = True
 
-    def __init__(self, *, country: str | None = None):
+    def __init__(self, client: httpx.AsyncClient | None = None, *, country: str | None = None):
+        super().__init__(client)
         self.country = country
 
     def enabled(self) -> bool:
         return bool(config.adzuna_app_id() and config.adzuna_app_key())
 
     async def search(self, query: Query) -> List[Job]:
+        return (await self.search_page(query)).jobs
+
+    async def search_page(self, query: Query) -> Page:
         app_id = config.adzuna_app_id()
         app_key = config.adzuna_app_key()
 
@@ -45,13 +53,19 @@ class AdzunaProvider(Provider):
             "what": query.q,
             "content-type": "application/json"
         }
+        if query.since is not None:
+            # Whole days only; the stream drops what is older than `since` itself.
+            since = query.since if query.since.tzinfo else query.since.replace(tzinfo=timezone.utc)
+            age = (datetime.now(timezone.utc) - since).total_seconds() / 86400
+            params["max_days_old"] = max(1, math.ceil(age))
+            params["sort_by"] = "date"
+
+        return await self.get_page(url, params, self._parse)
 
-        async with httpx.AsyncClient(timeout=20) as client:
-            r = await client.get(url, params=params)
-            r.raise_for_status()
-            data = r.json()
+    def _parse(self, content: bytes) -> Page:
+        data = self.decode(content)
 
-        jobs: List[Job] = []
+        rows: List[dict] = []
         for item in data.get("results", []):
             salary_min = item.get("salary_min")
             salary_max = item.get("salary_max")
@@ -61,7 +75,7 @@ class AdzunaProvider(Provider):
             elif salary_min:
                 salary_str = str(salary_min)
 
-            jobs.append(Job(
+            rows.append(dict(
                 source=self.name,
                 source_job_id=str(item["id"]),
                 title=(item["title"] or "").strip(),
@@ -75,4 +89,4 @@ class AdzunaProvider(Provider):
                 extras={"category": (item.get("category") or {}).get("label"),}
             ))
 
-        return jobs
\ No newline at end of file
+        return Page(jobs=self.build_jobs(rows), total=data.get("count"))
\ No newline at end of file
@@ -1,15 +1,211 @@
 # providers/base
 
 from __future__ import annotations
+
+import asyncio, contextlib, math, time
+import httpx
+
 from abc import ABC, abstractmethod
-from typing import List
-from job_aggregator.models import Query, Job
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
+from job_aggregator import config, http_client
+from job_aggregator.models import Query, Job, Page
+from . import parsing
+from .cache import ResponseCache, get_cache
+from .resilience import CircuitOpenError, TokenBucket, breaker_for, limiter_for
+
+def _is_outage(e: BaseException) -> bool:
+    """Errors that say the provider is unhealthy: transport failures, timeouts and 5xx."""
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code >= 500
+    return isinstance(e, (httpx.HTTPError, asyncio.TimeoutError))
+
+def _is_retryable(e: BaseException) -> bool:
+    if isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 429:
+        return True
+    return _is_outage(e)
+
+def _utc(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+def _retry_after(r: httpx.Response) -> float:
+    try:
+        return max(0.0, float(r.headers.get("retry-after", 1)))
+    except ValueError:
+        return 1.0
 
 class Provider(ABC):
     name: str
+    timeout: float = 15.0
+    max_connections: int = 4
+    rate_limit: float = 5.0
+    burst: int = 5
+    snapshot: bool = False  # every response is the full listing for the query (no paging / "since")
+    incremental: bool = False  # honours Query.since and returns the newest postings first
+
+    def __init__(self, client: httpx.AsyncClient | None = None, cache: ResponseCache | None = None):
+        self.client = client
+        self.cache = cache
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Called at the start of every run: stats are per run, provider instances are not."""
+        self.parse_stats: Dict[str, float] = {"decode_ms": 0.0, "validate_ms": 0.0, "items": 0, "skipped": 0}
+        self.http_stats: Dict[str, int] = {"requests": 0, "errors": 0, "not_modified": 0, "bytes": 0}
+        self.request_ms: List[float] = []
 
     @abstractmethod
     async def search(self, query: Query) -> List[Job]: ...
 
+    async def search_page(self, query: Query) -> Page:
+        return Page(jobs=await self.search(query))
+
+    def page_count(self, first: Page, query: Query) -> int:
+        if first.total is None or not query.results_per_page:
+            return 1
+        return max(1, math.ceil(first.total / query.results_per_page))
+
     def enabled(self) -> bool:
-        return True
\ No newline at end of file
+        return True
+
+    def decode(self, content: bytes) -> Any:
+        start = time.perf_counter()
+        data = parsing.loads(content)
+        self.parse_stats["decode_ms"] += (time.perf_counter() - start) * 1000
+        return data
+
+    def build_jobs(self, rows: List[dict]) -> List[Job]:
+        start = time.perf_counter()
+        jobs, skipped = parsing.build_jobs(rows, strict=config.parse_mode(self.name) == "strict")
+        self.parse_stats["validate_ms"] += (time.perf_counter() - start) * 1000
+        self.parse_stats["items"] += len(jobs)
+        self.parse_stats["skipped"] += skipped
+        if skipped:
+            print(f"[warn] {self.name} dropped {skipped} of {len(rows)} rows that failed validation")
+        return jobs
+
+    def limiter(self) -> TokenBucket:
+        return limiter_for(self.name, self.rate_limit, self.burst)
+
+    @retry(wait=wait_exponential(min=0.5, max=4), stop=stop_after_attempt(3),
+           retry=retry_if_exception(_is_retryable))
+    async def fetch_page(self, query: Query) -> Page:
+        breaker = breaker_for(self.name)
+        if not breaker.allow():
+            raise CircuitOpenError(self.name)
+        try:
+            page = await self.search_page(query)
+        except Exception as e:
+            if _is_outage(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        except BaseException:
+            breaker.release()  # cancelled, e.g. by the run deadline: says nothing about the provider
+            raise
+        breaker.record_success()
+        return page
+
+    async def stream(self, query: Query, slots: asyncio.Semaphore | None = None) -> AsyncIterator[Job]:
+        """
+        Yields jobs page by page as they arrive. In crawl mode pages 2..N are fetched
+        concurrently, but at most the provider's concurrency cap are in flight, so a
+        slow consumer holds back fetching instead of letting pages pile up in memory.
+        `slots` is the global cap shared with the other providers of the run.
+
+        With `query.since` on an incremental provider, postings older than it are
+        dropped and no further pages are scheduled once a page reaches them; a failed
+        page then fails the stream, since a gap would be skipped for good.
+        """
+        slots = slots or contextlib.nullcontext()
+        since = _utc(query.since) if self.incremental and query.since else None
+        behind = False
+
+        async def fetch(page: int) -> Page:
+            async with slots:
+                return await self.fetch_page(query.model_copy(update={"page": page}))
+
+        def newer(page: Page) -> List[Job]:
+            nonlocal behind
+            if since is None:
+                return page.jobs
+            keep = [j for j in page.jobs if j.posted_at is None or _utc(j.posted_at) >= since]
+            behind = behind or len(keep) < len(page.jobs)
+            return keep
+
+        first = await fetch(1 if query.crawl else (query.page or 1))
+        for job in newer(first):
+            yield job
+        if not query.crawl:
+            return
+
+        pages = min(self.page_count(first, query), query.max_pages or config.max_pages())
+        window = config.provider_concurrency(self.name, self.max_connections)
+        todo = iter(range(2, pages + 1))
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                while (len(pending) < window and not behind and breaker_for(self.name).state != "open"
+                       and (n := next(todo, None)) is not None):
+                    pending.add(asyncio.create_task(fetch(n)))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    try:
+                        page = t.result()
+                    except Exception as e:
+                        if since is not None:
+                            raise
+                        print(f"[warn] {self.name} page failed: {e}")
+                        continue
+                    for job in newer(page):
+                        yield job
+        finally:
+            for t in pending:
+                t.cancel()
+
+        print(f"[info] {self.name}: crawled {pages} page(s)")
+
+    def _request_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(config.provider_max_connections(self.name, self.max_connections))
+            self._slots_loop = loop
+        return self._slots
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        client = self.client or http_client.get_client()
+        timeout = config.provider_timeout(self.name, self.timeout)
+        await self.limiter().acquire()
+        async with self._request_slots():
+            start = time.perf_counter()
+            self.http_stats["requests"] += 1
+            try:
+                r = await client.get(url, timeout=timeout, **kwargs)
+            except Exception:
+                self.http_stats["errors"] += 1
+                raise
+            finally:
+                self.request_ms.append((time.perf_counter() - start) * 1000)
+        self.http_stats["bytes"] += len(r.content)
+        if r.status_code == 304:
+            self.http_stats["not_modified"] += 1
+        elif r.status_code >= 400:
+            self.http_stats["errors"] += 1
+        if r.status_code == 429:
+            self.limiter().pause(_retry_after(r))
+        if r.status_code != 304:  # answered from cache by the caller
+            r.raise_for_status()
+        return r
+
+    async def get_page(self, url: str, params: dict, parse: Callable[[bytes], Page]) -> Page:
+        cache = self.cache or get_cache()
+        if cache is None:
+            r = await self.get(url, params=params)
+            return parse(r.content)
+        return await cache.get_page(self, url, params, parse)
@@ -0,0 +1,172 @@
+# providers/cache.py
+
+from __future__ import annotations
+
+import hashlib, json, os, time
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+from pydantic import BaseModel
+from job_aggregator import config
+from job_aggregator.models import Page
+
+if TYPE_CHECKING:
+    from .base import Provider
+
+class CacheEntry(BaseModel):
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    stored_at: float
+    digest: str
+    content: bytes = b""
+
+class CacheStore(ABC):
+    @abstractmethod
+    def get(self, key: str) -> CacheEntry | None: ...
+
+    @abstractmethod
+    def set(self, key: str, entry: CacheEntry) -> None: ...
+
+    def touch(self, key: str, entry: CacheEntry) -> None:
+        self.set(key, entry)
+
+class MemoryStore(CacheStore):
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    def get(self, key: str) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class FileStore(CacheStore):
+    """Body and validators under `root` (default /tmp), on disk rather than in RAM."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        return self.root / f"{key}.meta.json", self.root / f"{key}.body"
+
+    def get(self, key: str) -> CacheEntry | None:
+        meta, body = self._paths(key)
+        try:
+            entry = CacheEntry.model_validate_json(meta.read_bytes())
+            entry.content = body.read_bytes()
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        meta, body = self._paths(key)
+        body.write_bytes(entry.content)
+        self.touch(key, entry)
+
+    def touch(self, key: str, entry: CacheEntry) -> None:
+        meta, _ = self._paths(key)
+        tmp = meta.with_suffix(".tmp")
+        tmp.write_text(entry.model_dump_json(exclude={"content"}))
+        os.replace(tmp, meta)
+
+class ResponseCache:
+    """
+    TTL + conditional-request cache for provider pages, keyed by (provider, url, params).
+    Within the TTL a page is served without a request; after it, the stored ETag /
+    Last-Modified are sent and a 304 reuses the cached page. Parsed pages are kept in
+    memory per body digest, so a hit or 304 skips parsing too;
+    callers get deep copies, since the pipeline edits the jobs it is handed.
+    """
+
+    def __init__(self, store: CacheStore, ttl: float, max_pages: int = 256):
+        self.store = store
+        self.ttl = ttl
+        self.max_pages = max_pages
+        self.stats: Dict[str, int] = {"hits": 0, "revalidated": 0, "misses": 0}
+        self._pages: OrderedDict[str, Tuple[str, Page]] = OrderedDict()
+
+    @staticmethod
+    def key(provider: str, url: str, params: dict) -> str:
+        raw = json.dumps([provider, url, sorted((k, str(v)) for k, v in params.items())])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+    def since(self, snapshot: Dict[str, int]) -> Dict[str, int]:
+        return {k: v - snapshot.get(k, 0) for k, v in self.stats.items()}
+
+    def _page(self, key: str, entry: CacheEntry, parse: Callable[[bytes], Page]) -> Page:
+        cached = self._pages.get(key)
+        if cached is not None and cached[0] == entry.digest:
+            self._pages.move_to_end(key)
+            return cached[1].model_copy(deep=True)
+        page = parse(entry.content)
+        self._remember(key, entry.digest, page)
+        return page
+
+    def _remember(self, key: str, digest: str, page: Page):
+        self._pages[key] = (digest, page.model_copy(deep=True))
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+    async def get_page(self, provider: Provider, url: str, params: dict,
+                       parse: Callable[[bytes], Page]) -> Page:
+        key = self.key(provider.name, url, params)
+        entry = self.store.get(key)
+        now = time.time()
+        if entry is not None and now - entry.stored_at < self.ttl:
+            self.stats["hits"] += 1
+            return self._page(key, entry, parse)
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        r = await provider.get(url, params=params, headers=headers)
+        if r.status_code == 304 and entry is not None:
+            self.stats["revalidated"] += 1
+            entry.stored_at = now
+            self.store.touch(key, entry)
+            return self._page(key, entry, parse)
+
+        self.stats["misses"] += 1
+        page = parse(r.content)
+        digest = hashlib.sha1(r.content).hexdigest()
+        self.store.set(key, CacheEntry(etag=r.headers.get("etag"), last_modified=r.headers.get("last-modified"),
+                                       stored_at=now, digest=digest, content=r.content))
+        self._remember(key, digest, page)
+        return page
+
+_cache: ResponseCache | None = None
+_cache_backend: str | None = None
+
+def _make_store(backend: str) -> CacheStore:
+    if backend == "memory":
+        return MemoryStore(config.http_cache_max_entries())
+    return FileStore(config.http_cache_dir())
+
+def get_cache() -> ResponseCache | None:
+    """Process-wide cache for the configured backend (AGG_HTTP_CACHE: file | memory | off)."""
+    global _cache, _cache_backend
+    backend = config.http_cache_backend()
+    if backend == "off":
+        return None
+    if _cache is None or _cache_backend != backend:
+        _cache = ResponseCache(_make_store(backend), config.http_cache_ttl(), config.http_cache_max_entries())
+        _cache_backend = backend
+    return _cache
@@ -0,0 +1,40 @@
+# providers/parsing.py
+
+from __future__ import annotations
+
+import json
+
+from typing import Any, List, Tuple
+from pydantic import TypeAdapter, ValidationError
+from job_aggregator.models import Job
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_JOB_LIST = TypeAdapter(List[Job])
+
+def loads(content: bytes) -> Any:
+    return orjson.loads(content) if orjson is not None else json.loads(content)
+
+def build_jobs(rows: List[dict], *, strict: bool) -> Tuple[List[Job], int]:
+    """
+    Returns (jobs, skipped). Strict mode, the default, validates row by row and lets
+    the first bad row fail the page, as providers always did. Fast mode (opt-in via
+    AGG_PARSE_MODE=fast) validates the whole page in one pydantic-core call and only
+    falls back to per-row validation, dropping bad rows, when that fails; the caller
+    counts and logs what was dropped.
+    """
+    if strict:
+        return [Job(**r) for r in rows], 0
+    try:
+        return _JOB_LIST.validate_python(rows), 0
+    except ValidationError:
+        jobs: List[Job] = []
+        for r in rows:
+            try:
+                jobs.append(Job.model_validate(r))
+            except ValidationError:
+                pass
+        return jobs, len(rows) - len(jobs)
@@ -1,10 +1,8 @@
 # providers/remotive
 
-import httpx
-
 from typing import List
 from .base import Provider
-from job_aggregator.models import Job, Query
+from job_aggregator.models import Job, Query, Page
 from datetime import datetime
 
 API = "https://remotive.com/api/remote-jobs"
@@ -18,25 +16,32 @@ def _parse_dt(s: str | None) -> datetime | None:
 
 class RemotiveProvider(Provider):
     name = "remotive"
+    timeout = 15.0
+    rate_limit = 1.0
+    burst = 2
+    snapshot = True
 
     async def search(self, query: Query) -> List[Job]:
+        return (await self.search_page(query)).jobs
+
+    async def search_page(self, query: Query) -> Page:
         params = {"search": query.q}
 
         if query.location:
             params["category"] = query.location
 
-        async with httpx.AsyncClient(timeout=15) as client:
-            r = await client.get(API, params=params)
-            r.raise_for_status()
-            data = r.json()
+        return await self.get_page(API, params, self._parse)
+
+    def _parse(self, content: bytes) -> Page:
+        data = self.decode(content)
 
-        jobs: List[Job] = []
+        rows: List[dict] = []
         for item in data.get("jobs", []):
             job_id = item.get("id")
             if not job_id:
                 continue
 
-            jobs.append(Job(
+            rows.append(dict(
                 source=self.name,
                 source_job_id=str(job_id),
                 title=(item.get("title") or "").strip(),
@@ -49,5 +54,5 @@ class RemotiveProvider(Provider):
                 salary=item.get("salary"),
             ))
 
-        return jobs
+        return Page(jobs=self.build_jobs(rows))
 
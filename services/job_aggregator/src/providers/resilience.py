@@ -0,0 +1,110 @@
+# providers/resilience.py
+
+from __future__ import annotations
+
+import asyncio, time
+
+from typing import Dict
+from job_aggregator import config
+
+class CircuitOpenError(Exception):
+    def __init__(self, provider: str):
+        super().__init__(f"circuit open for provider '{provider}'")
+        self.provider = provider
+
+class TokenBucket:
+    """
+    Paces requests to `rate` per second with bursts of up to `burst`. Holds no
+    event-loop objects, so one bucket can outlive the loop of a single invocation.
+    A rate <= 0 disables pacing.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def pause(self, seconds: float):
+        """Stops handing out tokens for `seconds`, e.g. on a 429 with Retry-After."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            if self.rate <= 0:
+                return
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; open -> half-open
+    once `reset_timeout` has passed, letting a single probe through; the probe's
+    outcome closes or re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 120.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+        return self.state == self.CLOSED
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self):
+        """A call that ended without a verdict (cancelled): lets the next call probe instead."""
+        self._probing = False
+
+_limiters: Dict[str, TokenBucket] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def limiter_for(provider: str, rate: float, burst: int) -> TokenBucket:
+    if provider not in _limiters:
+        _limiters[provider] = TokenBucket(config.provider_rate(provider, rate), config.provider_burst(provider, burst))
+    return _limiters[provider]
+
+def breaker_for(provider: str) -> CircuitBreaker:
+    if provider not in _breakers:
+        _breakers[provider] = CircuitBreaker(config.breaker_threshold(provider), config.breaker_reset_timeout(provider))
+    return _breakers[provider]
+
+def reset():
+    _limiters.clear()
+    _breakers.clear()
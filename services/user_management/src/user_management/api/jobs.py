@@ -1,9 +1,10 @@
-import os
+import os, time
 from typing import Any, Dict, List, Optional, Tuple
 
 import boto3
-from boto3.dynamodb.conditions import Attr, Or
+from boto3.dynamodb.conditions import And, Attr, Or
 from fastapi import APIRouter, HTTPException, Query
+from agg_common import descriptions
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
@@ -12,6 +13,13 @@ _JOBS_TABLE = os.environ.get("JOBS_TABLE_NAME")
 if not _JOBS_TABLE:
     raise RuntimeError("JOBS_TABLE_NAME env var is required")
 _table = _dynamo.Table(_JOBS_TABLE)
+_s3 = None
+
+def _s3_client():
+    global _s3
+    if _s3 is None:
+        _s3 = boto3.client("s3")
+    return _s3
 
 def _normalize_location(s: Optional[str]) -> Optional[str]:
     if not s:
@@ -42,7 +50,10 @@ def _build_filter(keywords: Optional[str], location: Optional[str]):
         loc_expr = Attr("location").contains(location)
         f = loc_expr if f is None else Or(f, loc_expr)
 
-    return f
+    # Jobs past their TTL linger until DynamoDB deletes them, closed ones until TTL; never list those.
+    active = And(Or(Attr("expires_at").not_exists(), Attr("expires_at").gt(int(time.time()))),
+                 Attr("closed_at").not_exists())
+    return active if f is None else And(active, f)
 
 def _scan_with_filter(FilterExpression, Limit: int = 1000):
     items: List[Dict[str, Any]] = []
@@ -94,3 +105,32 @@ def list_jobs(
     except Exception as e:
         print(f"[jobs] {type(e).__name__}: {e}", flush=True)
         raise HTTPException(status_code=500, detail="jobs_list_failed")
+
+@router.get("/{source}/{source_job_id}")
+def get_job(source: str, source_job_id: str):
+    """Job detail; the only place the (offloaded) description is loaded."""
+    try:
+        it = _table.get_item(Key={"source": source, "source_job_id": source_job_id}).get("Item")
+    except Exception as e:
+        print(f"[jobs] {type(e).__name__}: {e}", flush=True)
+        raise HTTPException(status_code=500, detail="job_get_failed")
+    if not it:
+        raise HTTPException(status_code=404, detail="job_not_found")
+
+    try:
+        description = descriptions.load(it, _s3_client() if it.get("description_ref") else None)
+    except Exception as e:
+        print(f"[jobs] description load failed for {source}:{source_job_id}: {e}", flush=True)
+        description = None
+
+    return {
+        "id": f"{source}:{source_job_id}",
+        "title": it.get("title"),
+        "company": it.get("company"),
+        "location": it.get("location"),
+        "url": it.get("url"),
+        "source": source,
+        "posted_at": it.get("posted_at"),
+        "salary": it.get("salary"),
+        "description": description,
+    }
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from user_management.auth_deps import CurrentUser, get_current_user
-from user_management.matcher.storage import get_cv_keywords_from_s3, get_all_jobs_for_scoring
+from user_management.matcher.storage import get_cv_keywords_from_s3, get_job_index
 from user_management.matcher.scoring import score_and_rank_jobs
 
 router = APIRouter(prefix="/match", tags=["match"])
@@ -16,8 +16,7 @@ def match_me(
     if not cv_keywords:
         raise HTTPException(status_code=404, detail="No CV keywords found")
 
-    jobs = get_all_jobs_for_scoring()
-    ranked = score_and_rank_jobs(cv_keywords, jobs)
-    return [j.model_dump(mode="json") for j in ranked[:limit]]
+    ranked = score_and_rank_jobs(cv_keywords, get_job_index(), k=limit)
+    return [j.model_dump(mode="json") for j in ranked]
 
 
@@ -4,7 +4,7 @@ import sys, os
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from .storage import get_all_jobs_for_scoring, get_cv_keywords_from_s3
+from .storage import get_job_index, get_cv_keywords_from_s3
 from .scoring import score_and_rank_jobs
 
 
@@ -17,13 +17,13 @@ def handler(event: Dict, _context):
         print(f"[info] Starting match process for user_id: {user_id}")
 
         cv_keywords = get_cv_keywords_from_s3(user_id)
-        all_jobs = get_all_jobs_for_scoring()
+        index = get_job_index()
 
         if not cv_keywords:
             return {"statusCode": 404, "body": json.dumps({"error": f"No CV keywords found for user {user_id}"})}
 
-        recommendations = score_and_rank_jobs(cv_keywords, all_jobs)
-        response_body = [job.model_dump(mode="json") for job in recommendations[:50]]
+        recommendations = score_and_rank_jobs(cv_keywords, index, k=50)
+        response_body = [job.model_dump(mode="json") for job in recommendations]
 
         return {
             "statusCode": 200,
@@ -0,0 +1,170 @@
+import heapq
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from agg_common.corpus_stats import CorpusStats, idf_weight
+from agg_common.keywords import VERSION as NORMALIZER_VERSION, normalize_keywords
+from .models import JobForScoring, ScoredJob
+
+Key = Tuple[str, str]
+
+def job_terms(job: JobForScoring) -> Set[str]:
+    """Normalized set written at ingest; items stored before that (or by an older normalizer) are normalized here."""
+    if job.keywords_norm is not None and job.keywords_version == NORMALIZER_VERSION:
+        return job.keywords_norm
+    return normalize_keywords(job.keywords)
+
+def _signature(job: JobForScoring):
+    """Cheap change check for `sync`: the keyword fields the terms derive from."""
+    return job.keywords_version, frozenset(job.keywords_norm or ()), frozenset(job.keywords)
+
+def top_k(scored: Iterable[Tuple[float, int, JobForScoring]], k: Optional[int] = None) -> List[ScoredJob]:
+    """
+    Best `k` of (score, position, job) by score, ties by position, through a bounded
+    heap (all of them, sorted, for k=None). Result models are built for those only.
+    """
+    key = lambda s: (-s[0], s[1])
+    best = sorted(scored, key=key) if k is None else heapq.nsmallest(k, scored, key=key)
+    return [ScoredJob(**job.model_dump(), score=score) for score, _, job in best]
+
+class JobIndex:
+    """
+    Inverted index over normalized job terms (term -> posting list of doc ids) with
+    document frequencies kept up to date, so ranking a CV only touches postings of
+    its own terms. Per-job idf weight sums are cached and recomputed lazily after the
+    corpus changed (idf depends on its size). Ranks exactly like the exhaustive
+    weighted Jaccard of `scoring`, ties in corpus order. Shared between request
+    threads, so mutations and ranking hold one lock.
+
+    `use_stats` switches idf to the persisted corpus table (agg_common.corpus_stats)
+    instead of the frequencies of the jobs held here.
+    """
+
+    def __init__(self, jobs: Iterable[JobForScoring] = ()):
+        self._ids: Dict[Key, int] = {}
+        self._docs: List[Optional[JobForScoring]] = []
+        self._terms: List[FrozenSet[str]] = []
+        self._sigs: List[object] = []
+        self._order: List[int] = []
+        self._free: List[int] = []
+        self.postings: Dict[str, Set[int]] = {}
+        self.df: Dict[str, int] = {}
+        self._idf: Optional[Dict[str, float]] = None
+        self._wsum: List[float] = []
+        self._stats: Optional[CorpusStats] = None
+        self.generation = 0  # bumped on every change; derived engines rebuild on a new one
+        self._lock = threading.RLock()
+        self.sync(jobs)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, job: JobForScoring, position: Optional[int] = None) -> None:
+        with self._lock:
+            self._add(job, position)
+
+    def _add(self, job: JobForScoring, position: Optional[int]) -> None:
+        key = (job.source, job.source_job_id)
+        if key in self._ids:
+            self._remove(key)
+        terms = frozenset(job_terms(job))
+        doc = self._free.pop() if self._free else len(self._docs)
+        if doc == len(self._docs):
+            self._docs.append(None)
+            self._terms.append(frozenset())
+            self._sigs.append(None)
+            self._order.append(0)
+            self._wsum.append(0.0)
+        self._docs[doc], self._terms[doc], self._sigs[doc] = job, terms, _signature(job)
+        self._order[doc] = len(self._ids) if position is None else position
+        self._ids[key] = doc
+        for t in terms:
+            self.postings.setdefault(t, set()).add(doc)
+            self.df[t] = self.df.get(t, 0) + 1
+        self._idf = None
+        self.generation += 1
+
+    def remove(self, key: Key) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: Key) -> None:
+        doc = self._ids.pop(key, None)
+        if doc is None:
+            return
+        for t in self._terms[doc]:
+            self.postings[t].discard(doc)
+            self.df[t] -= 1
+            if not self.df[t]:
+                del self.df[t], self.postings[t]
+        self._docs[doc], self._terms[doc], self._sigs[doc] = None, frozenset(), None
+        self._free.append(doc)
+        self._idf = None
+        self.generation += 1
+
+    def sync(self, jobs: Iterable[JobForScoring]) -> "JobIndex":
+        """Makes the index hold exactly `jobs`, in their order; only new or changed jobs are re-indexed."""
+        jobs = list(jobs)
+        with self._lock:
+            seen: Set[Key] = set()
+            for pos, job in enumerate(jobs):
+                key = (job.source, job.source_job_id)
+                seen.add(key)
+                doc = self._ids.get(key)
+                if doc is not None and self._sigs[doc] == _signature(job):
+                    self._docs[doc] = job
+                    self._order[doc] = pos
+                else:
+                    self._add(job, pos)
+            for key in [k for k in self._ids if k not in seen]:
+                self._remove(key)
+            self.generation += 1
+        return self
+
+    def use_stats(self, stats: Optional[CorpusStats]) -> None:
+        with self._lock:
+            self._stats = stats
+            self._idf = None
+            self.generation += 1
+
+    @property
+    def stats_version(self) -> Optional[int]:
+        return self._stats.version if self._stats is not None else None
+
+    def idf(self) -> Dict[str, float]:
+        with self._lock:
+            return self._ensure_idf()
+
+    def _ensure_idf(self) -> Dict[str, float]:
+        if self._idf is None:
+            if self._stats is not None:
+                self._idf = self._stats.idf()
+            else:
+                self._idf = {t: idf_weight(len(self._ids), d) for t, d in self.df.items()}
+            for doc in self._ids.values():
+                self._wsum[doc] = sum(self._idf.get(t, 1.0) for t in self._terms[doc])
+        return self._idf
+
+    def documents(self) -> Tuple[List[Tuple[JobForScoring, FrozenSet[str]]], Dict[str, float]]:
+        """(job, terms) pairs in corpus order and the idf they are scored with, read consistently."""
+        with self._lock:
+            docs = sorted(self._ids.values(), key=self._order.__getitem__)
+            return [(self._docs[d], self._terms[d]) for d in docs], self._ensure_idf()
+
+    def rank(self, input_keywords: Set[str], k: Optional[int] = None) -> List[ScoredJob]:
+        terms = normalize_keywords(input_keywords)
+        if not terms:
+            return []
+        scored: List[Tuple[float, int, JobForScoring]] = []
+        with self._lock:
+            idf = self._ensure_idf()
+            w_input = sum(idf.get(t, 1.0) for t in terms)
+            inter: Dict[int, float] = {}
+            for t in terms:
+                for doc in self.postings.get(t, ()):
+                    inter[doc] = inter.get(doc, 0.0) + idf.get(t, 1.0)
+
+            for doc, w_inter in inter.items():
+                w_union = w_input + self._wsum[doc] - w_inter
+                if w_union > 0.0 and w_inter > 0.0:
+                    scored.append((round(w_inter / w_union, 3), self._order[doc], self._docs[doc]))
+        return top_k(scored, k)
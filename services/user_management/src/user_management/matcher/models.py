@@ -11,6 +11,16 @@ class JobForScoring(BaseModel):
     company: Optional[str] = None
     url: str
     keywords: Set[str] = Field(default_factory=set)
+    keywords_norm: Optional[Set[str]] = Field(default=None, exclude=True)
+    keywords_version: Optional[int] = Field(default=None, exclude=True)
 
 class ScoredJob(JobForScoring):
     score: float = 0.0
+
+class CorpusScanStats(BaseModel):
+    segments: int = 0
+    pages: int = 0
+    scanned: int = 0
+    items: int = 0
+    consumed_rcu: float = 0.0
+    duration_ms: float = 0.0
@@ -0,0 +1,95 @@
+import threading
+import weakref
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from agg_common.keywords import normalize_keywords
+from .index import JobIndex, top_k
+from .models import JobForScoring, ScoredJob
+
+try:
+    import numpy as np
+    from scipy import sparse as sp
+except ImportError:
+    np = sp = None
+
+def available() -> bool:
+    return sp is not None
+
+class SparseEngine:
+    """
+    Weighted Jaccard over a CSR matrix: terms are interned to column ids, jobs are
+    binary rows in corpus order. The weighted intersections of a batch of CVs are
+    one sparse product (jobs x terms) @ (terms x CVs) with idf-weighted CV columns,
+    and union weights follow from the per-row idf sums. Same scores, rounding and
+    tie order as `JobIndex.rank`.
+    """
+
+    def __init__(self, docs: List[Tuple[JobForScoring, FrozenSet[str]]], idf: Dict[str, float]):
+        if sp is None:
+            raise RuntimeError("the sparse engine needs numpy and scipy")
+        self.jobs = [job for job, _ in docs]
+        self.idf = idf
+        self.vocab: Dict[str, int] = {}
+        indices: List[int] = []
+        indptr = [0]
+        for _, terms in docs:
+            indices.extend(self.vocab.setdefault(t, len(self.vocab)) for t in terms)
+            indptr.append(len(indices))
+        self.matrix = sp.csr_matrix(
+            (np.ones(len(indices)), np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(docs), len(self.vocab)),
+        )
+        weights = np.empty(len(self.vocab))
+        for t, col in self.vocab.items():
+            weights[col] = idf.get(t, 1.0)
+        self.weights = weights
+        self.row_sums = self.matrix @ weights
+
+    @classmethod
+    def from_index(cls, index: JobIndex) -> "SparseEngine":
+        docs, idf = index.documents()
+        return cls(docs, idf)
+
+    def rank(self, input_keywords: Set[str], k: Optional[int] = None) -> List[ScoredJob]:
+        return self.rank_many([input_keywords], k)[0]
+
+    def rank_many(self, keyword_sets: Iterable[Set[str]], k: Optional[int] = None) -> List[List[ScoredJob]]:
+        """Ranks several CVs against the corpus with a single matrix product; `k` caps each ranking."""
+        queries = [normalize_keywords(k) for k in keyword_sets]
+        rows: List[int] = []
+        cols: List[int] = []
+        vals: List[float] = []
+        w_input = np.zeros(len(queries))
+        for i, terms in enumerate(queries):
+            w_input[i] = sum(self.idf.get(t, 1.0) for t in terms)
+            for t in terms:
+                col = self.vocab.get(t)
+                if col is not None:
+                    rows.append(col)
+                    cols.append(i)
+                    vals.append(self.weights[col])
+        q = sp.csc_matrix((vals, (rows, cols)), shape=(len(self.vocab), len(queries)))
+        inter = (self.matrix @ q).tocsc()
+
+        out: List[List[ScoredJob]] = []
+        for i in range(len(queries)):
+            start, end = inter.indptr[i], inter.indptr[i + 1]
+            docs, w_inter = inter.indices[start:end], inter.data[start:end]
+            keep = w_inter > 0.0
+            docs, w_inter = docs[keep], w_inter[keep]
+            union = w_input[i] + self.row_sums[docs] - w_inter
+            scored = ((round(s, 3), d, self.jobs[d]) for s, d in zip((w_inter / union).tolist(), docs.tolist()))
+            out.append(top_k(scored, k))
+        return out
+
+# index -> (generation, engine); weak, so a freed index takes its engine along and never aliases another.
+_engines: "weakref.WeakKeyDictionary[JobIndex, Tuple[int, SparseEngine]]" = weakref.WeakKeyDictionary()
+_engines_lock = threading.Lock()
+
+def engine_for(index: JobIndex) -> SparseEngine:
+    """The engine of `index` as it is now; rebuilt only after the index changed."""
+    with _engines_lock:
+        cached = _engines.get(index)
+        if cached is None or cached[0] != index.generation:
+            cached = (index.generation, SparseEngine.from_index(index))
+            _engines[index] = cached
+        return cached[1]
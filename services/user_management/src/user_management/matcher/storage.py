@@ -1,7 +1,13 @@
-import boto3, os, json
-from typing import List, Set, Optional
+import boto3, os, json, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Set, Optional, Tuple
+from boto3.dynamodb.conditions import Attr, ConditionExpressionBuilder
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config as BotoConfig
 
-from .models import JobForScoring
+from agg_common import corpus_stats
+from .index import JobIndex
+from .models import CorpusScanStats, JobForScoring
 
 s3 = boto3.client('s3')
 dynamodb = boto3.resource('dynamodb')
@@ -49,7 +55,120 @@ def get_cv_keywords_from_s3(email: str) -> Set[str]:
     print(f"[info] No keywords found for {email} in {CV_BUCKET}")
     return set()
 
+def active_jobs_filter():
+    """Hides jobs past their TTL that DynamoDB has not deleted yet (it can lag up to ~48h) and closed postings."""
+    live = Attr("expires_at").not_exists() | Attr("expires_at").gt(int(time.time()))
+    return live & Attr("closed_at").not_exists()
+
+# What scoring reads; descriptions and the rest of each item never leave the table.
+SCORING_FIELDS = ("source", "source_job_id", "title", "company", "url", "keywords", "keywords_norm", "keywords_version")
+
+_deserializer = TypeDeserializer()
+_serializer = TypeSerializer()
+_scan_client = None
+
+def scan_segments() -> int:
+    return max(1, int(os.getenv("MATCH_SCAN_SEGMENTS", "4")))
+
+def _client():
+    """Low-level client for the corpus scan: unlike the table resource it is safe to share between threads."""
+    global _scan_client
+    if _scan_client is None:
+        _scan_client = boto3.client('dynamodb', config=BotoConfig(max_pool_connections=max(10, scan_segments())))
+    return _scan_client
+
+def _scan_request() -> Dict[str, Any]:
+    cond = ConditionExpressionBuilder().build_expression(active_jobs_filter())
+    names = dict(cond.attribute_name_placeholders)
+    names.update({f"#f{i}": f for i, f in enumerate(SCORING_FIELDS)})
+    return {
+        "TableName": JOBS_TABLE_NAME,
+        "ProjectionExpression": ", ".join(f"#f{i}" for i in range(len(SCORING_FIELDS))),
+        "FilterExpression": cond.condition_expression,
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": {k: _serializer.serialize(v) for k, v in cond.attribute_value_placeholders.items()},
+        "ReturnConsumedCapacity": "TOTAL",
+    }
+
+def _scan_segment(request: Dict[str, Any], segment: int, total: int) -> Tuple[List[JobForScoring], CorpusScanStats]:
+    """One segment to its last page; items become models page by page so raw pages do not pile up."""
+    kwargs = {**request, "Segment": segment, "TotalSegments": total} if total > 1 else dict(request)
+    jobs: List[JobForScoring] = []
+    stats = CorpusScanStats(segments=1)
+    while True:
+        resp = _client().scan(**kwargs)
+        stats.pages += 1
+        stats.scanned += resp.get("ScannedCount", 0)
+        stats.consumed_rcu += (resp.get("ConsumedCapacity") or {}).get("CapacityUnits", 0.0)
+        for it in resp.get("Items", []):
+            jobs.append(JobForScoring(**{k: _deserializer.deserialize(v) for k, v in it.items()}))
+        if "LastEvaluatedKey" not in resp:
+            return jobs, stats
+        kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+def scan_scoring_corpus(segments: Optional[int] = None) -> Tuple[List[JobForScoring], CorpusScanStats]:
+    """
+    All active jobs, projected to SCORING_FIELDS, through a parallel scan of
+    MATCH_SCAN_SEGMENTS segments that each follow LastEvaluatedKey to the end.
+    Jobs come back segment by segment, so the corpus order is stable between loads.
+    """
+    total = segments or scan_segments()
+    request = _scan_request()
+    started = time.perf_counter()
+    if total == 1:
+        parts = [_scan_segment(request, 0, 1)]
+    else:
+        with ThreadPoolExecutor(max_workers=total, thread_name_prefix="corpus-scan") as pool:
+            parts = list(pool.map(lambda seg: _scan_segment(request, seg, total), range(total)))
+
+    jobs: List[JobForScoring] = []
+    stats = CorpusScanStats(segments=total)
+    for part_jobs, part in parts:
+        jobs.extend(part_jobs)
+        stats.pages += part.pages
+        stats.scanned += part.scanned
+        stats.consumed_rcu += part.consumed_rcu
+    stats.items = len(jobs)
+    stats.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+    return jobs, stats
+
 def get_all_jobs_for_scoring() -> List[JobForScoring]:
-    resp = jobs_table.scan()
-    items = resp.get("Items", [])
-    return [JobForScoring(**it) for it in items]
\ No newline at end of file
+    jobs, stats = scan_scoring_corpus()
+    print(f"[info] corpus scan: {stats.items} jobs of {stats.scanned} scanned, {stats.pages} pages "
+          f"over {stats.segments} segments, {stats.consumed_rcu:.1f} RCU, {stats.duration_ms} ms")
+    return jobs
+
+# Re-synced from the table at most every MATCH_INDEX_TTL_SECONDS.
+_index = JobIndex()
+_index_synced_at: Optional[float] = None
+_corpus_etag: Optional[str] = None
+
+def _refresh_corpus_stats() -> None:
+    """
+    Loads the aggregator's document-frequency table (CORPUS_STATS_BUCKET) once, then
+    only when its ETag changed: the conditional GET of an unchanged table is a 304.
+    Without a table the index keeps counting frequencies itself.
+    """
+    global _corpus_etag
+    bucket = os.getenv("CORPUS_STATS_BUCKET")
+    if not bucket:
+        return
+    try:
+        stats, etag = corpus_stats.load(s3, bucket, _corpus_etag)
+    except Exception as e:
+        print(f"[warn] corpus stats unavailable, keeping current idf: {e}")
+        return
+    if etag != _corpus_etag:
+        _index.use_stats(stats)
+        _corpus_etag = etag
+
+def get_job_index() -> JobIndex:
+    """Inverted index of the active jobs; a sync only re-indexes jobs that are new or changed."""
+    global _index_synced_at
+    ttl = float(os.getenv("MATCH_INDEX_TTL_SECONDS", "300"))
+    now = time.monotonic()
+    if _index_synced_at is None or now - _index_synced_at >= ttl:
+        _index.sync(get_all_jobs_for_scoring())
+        _refresh_corpus_stats()
+        _index_synced_at = now
+    return _index
@@ -15,6 +15,11 @@ resource "aws_dynamodb_table" "jobs" {
     type = "S"
   }
 
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
   tags = {
     Project     = "JobAggregator"
     ManagedBy   = "Terraform"
@@ -16,9 +16,11 @@ resource "aws_iam_policy" "dynamodb_jobs_write" {
       Effect   = "Allow",
       Action   = [
         "dynamodb:DescribeTable",
+        "dynamodb:BatchGetItem",
         "dynamodb:PutItem",
         "dynamodb:UpdateItem",
-        "dynamodb:BatchWriteItem"
+        "dynamodb:BatchWriteItem",
+        "dynamodb:Scan"
       ],
       Resource = aws_dynamodb_table.jobs.arn
     }]
@@ -30,6 +32,54 @@ resource "aws_iam_role_policy_attachment" "agg_jobs_write_attach" {
   policy_arn = aws_iam_policy.dynamodb_jobs_write.arn
 }
 
+resource "aws_iam_policy" "job_descriptions_write" {
+  name   = var.prefix != "" ? "${var.prefix}-job-agg-descriptions-write" : "job-agg-descriptions-write"
+  policy = jsonencode({
+    Version = "2012-10-17",
+    Statement = [{
+      Effect   = "Allow",
+      Action   = ["s3:PutObject"],
+      Resource = "${aws_s3_bucket.job_descriptions.arn}/descriptions/*"
+    }]
+  })
+}
+
+resource "aws_iam_role_policy_attachment" "agg_descriptions_write_attach" {
+  role       = aws_iam_role.lambda.name
+  policy_arn = aws_iam_policy.job_descriptions_write.arn
+}
+
+# Full-dump provider snapshots and watermarks (job_aggregator.snapshots) and the term
+# document-frequency table (agg_common.corpus_stats). ListBucket turns a missing
+# object into NoSuchKey instead of AccessDenied.
+resource "aws_iam_policy" "agg_snapshots_rw" {
+  name   = var.prefix != "" ? "${var.prefix}-job-agg-snapshots-rw" : "job-agg-snapshots-rw"
+  policy = jsonencode({
+    Version = "2012-10-17",
+    Statement = [
+      {
+        Effect   = "Allow",
+        Action   = ["s3:GetObject", "s3:PutObject"],
+        Resource = [
+          "${aws_s3_bucket.job_descriptions.arn}/snapshots/*",
+          "${aws_s3_bucket.job_descriptions.arn}/corpus/*"
+        ]
+      },
+      {
+        Effect    = "Allow",
+        Action    = ["s3:ListBucket"],
+        Resource  = aws_s3_bucket.job_descriptions.arn,
+        Condition = { StringLike = { "s3:prefix" = ["snapshots/*", "corpus/*"] } }
+      }
+    ]
+  })
+}
+
+resource "aws_iam_role_policy_attachment" "agg_snapshots_rw_attach" {
+  role       = aws_iam_role.lambda.name
+  policy_arn = aws_iam_policy.agg_snapshots_rw.arn
+}
+
 resource "aws_iam_policy" "secrets" {
   name   = var.prefix != "" ? "${var.prefix}-job-agg-secrets-read" : "job-agg-secrets-read"
   policy = jsonencode({
@@ -55,3 +105,12 @@ resource "aws_lambda_permission" "events" {
   principal     = "events.amazonaws.com"
   source_arn    = aws_cloudwatch_event_rule.agg[0].arn
 }
+
+resource "aws_lambda_permission" "compaction_events" {
+  count         = var.compaction_schedule_expression != "" ? 1 : 0
+  statement_id  = "AllowEventBridgeInvokeCompaction"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.aggregator.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.compaction[0].arn
+}
@@ -39,6 +39,20 @@ resource "aws_iam_policy" "user_api_permissions" {
         Effect   = "Allow",
         Action   = ["s3:GetObject"],
         Resource = "${aws_s3_bucket.cv_uploads.arn}/cv_keywords/*"
+      },
+      {
+        Effect   = "Allow",
+        Action   = ["s3:GetObject"],
+        Resource = [
+          "${aws_s3_bucket.job_descriptions.arn}/descriptions/*",
+          "${aws_s3_bucket.job_descriptions.arn}/corpus/*"
+        ]
+      },
+      {
+        Effect    = "Allow",
+        Action    = ["s3:ListBucket"],
+        Resource  = aws_s3_bucket.job_descriptions.arn,
+        Condition = { StringLike = { "s3:prefix" = ["corpus/*"] } }
       }
     ]
   })
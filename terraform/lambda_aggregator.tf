@@ -15,6 +15,9 @@ resource "aws_lambda_function" "aggregator" {
       {
         SECRETS_PREFIX  = var.prefix
         JOBS_TABLE_NAME = aws_dynamodb_table.jobs.name
+        AGG_DESCRIPTIONS_BUCKET = aws_s3_bucket.job_descriptions.bucket
+        AGG_SNAPSHOT_BUCKET     = aws_s3_bucket.job_descriptions.bucket
+        CORPUS_STATS_BUCKET     = aws_s3_bucket.job_descriptions.bucket
       },
       var.lambda_env
     )
@@ -33,4 +36,18 @@ resource "aws_cloudwatch_event_target" "agg" {
   rule      = aws_cloudwatch_event_rule.agg[0].name
   target_id = "lambda"
   arn       = aws_lambda_function.aggregator.arn
+}
+
+resource "aws_cloudwatch_event_rule" "compaction" {
+  count               = var.compaction_schedule_expression != "" ? 1 : 0
+  name                = "${aws_lambda_function.aggregator.function_name}-compaction"
+  schedule_expression = var.compaction_schedule_expression
+}
+
+resource "aws_cloudwatch_event_target" "compaction" {
+  count     = var.compaction_schedule_expression != "" ? 1 : 0
+  rule      = aws_cloudwatch_event_rule.compaction[0].name
+  target_id = "lambda-compaction"
+  arn       = aws_lambda_function.aggregator.arn
+  input     = jsonencode({ action = "compact" })
 }
\ No newline at end of file
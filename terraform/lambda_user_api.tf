@@ -11,6 +11,7 @@ resource "aws_lambda_function" "user_api" {
       JOBS_TABLE_NAME = aws_dynamodb_table.jobs.name
       USERS_TABLE_NAME = aws_dynamodb_table.users.name
       CV_S3_BUCKET     = aws_s3_bucket.cv_uploads.bucket
+      CORPUS_STATS_BUCKET = aws_s3_bucket.job_descriptions.bucket
       JWT_SECRET_KEY   = aws_secretsmanager_secret_version.jwt_secret_initial_version.secret_string
     },
       var.lambda_env
@@ -0,0 +1,34 @@
+resource "aws_s3_bucket" "job_descriptions" {
+  bucket = var.prefix != "" ? "${var.prefix}-job-descriptions" : "job-descriptions"
+
+  tags = {
+    Project   = "JobAggregator"
+    ManagedBy = "Terraform"
+  }
+}
+
+resource "aws_s3_bucket_server_side_encryption_configuration" "job_descriptions" {
+  bucket = aws_s3_bucket.job_descriptions.id
+  rule {
+    apply_server_side_encryption_by_default { sse_algorithm = "AES256" }
+  }
+}
+
+resource "aws_s3_bucket_public_access_block" "job_descriptions" {
+  bucket = aws_s3_bucket.job_descriptions.id
+  block_public_acls = true
+  block_public_policy = true
+  ignore_public_acls = true
+  restrict_public_buckets = true
+}
+
+# Jobs leave the table after at most AGG_JOB_MAX_AGE_DAYS; their descriptions follow.
+resource "aws_s3_bucket_lifecycle_configuration" "job_descriptions" {
+  bucket = aws_s3_bucket.job_descriptions.id
+  rule {
+    id = "expire-descriptions"
+    status = "Enabled"
+    filter { prefix = "descriptions/" }
+    expiration { days = 90 }
+  }
+}
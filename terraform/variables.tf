@@ -34,6 +34,12 @@ variable "schedule_expression" {
   default     = ""
 }
 
+variable "compaction_schedule_expression" {
+  description = "EventBridge schedule for the jobs-table compaction run (e.g., 'rate(1 day)'). Leave empty to disable."
+  type        = string
+  default     = ""
+}
+
 variable "lambda_matcher_image_uri" {
   description = "The full URI of the Docker image in ECR for the job-matcher function."
   type        = string
@@ -18,3 +18,6 @@ def pytest_collection_modifyitems(config, items):
 def _test_env(monkeypatch):
     monkeypatch.setenv("ENV", "test")
     monkeypatch.setenv("LOG_LEVEL", "WARNING")
+    monkeypatch.setenv("JOBS_TABLE_NAME", os.getenv("JOBS_TABLE_NAME", "jobs-test"))
+    monkeypatch.setenv("AGG_HTTP_CACHE", "off")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", os.getenv("AWS_DEFAULT_REGION", "eu-central-1"))
@@ -0,0 +1,295 @@
+import asyncio
+import pytest
+
+from job_aggregator.models import Job, Query, Page, RunStats, WriteStats
+
+def make(url, title="Eng", company="Acme", source="x"):
+    return Job(source=source, source_job_id=url, title=title, company=company, location=None,
+               remote=None, url=url, description="python developer")
+
+@pytest.fixture
+def aggregate(monkeypatch):
+    from job_aggregator import aggregate
+    from providers import resilience
+    monkeypatch.setattr(resilience, "_limiters", {})
+    monkeypatch.setattr(resilience, "_breakers", {})
+    async def write_jobs(puts, deletes=()):
+        return WriteStats(items=len(puts) + len(deletes))
+
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+    monkeypatch.setattr(aggregate, "classify_changes", lambda jobs: {"inserted": jobs, "updated": [], "unchanged": [], "refreshed": []})
+    monkeypatch.setattr(aggregate, "stored_keys", lambda keys: list(keys))
+    return aggregate
+
+def paged_provider(name, total, per_page, delay=0.01):
+    from providers.base import Provider
+
+    class Paged(Provider):
+        max_connections = 3
+        rate_limit = 0
+
+        def __init__(self):
+            super().__init__()
+            self.name = name
+            self.active = 0
+            self.peak = 0
+            self.pages = []
+
+        async def search(self, query):
+            return (await self.search_page(query)).jobs
+
+        async def search_page(self, query):
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.pages.append(query.page)
+            await asyncio.sleep(delay)
+            self.active -= 1
+            start = (query.page - 1) * per_page
+            jobs = [make(f"https://{name}/{i}", source=name) for i in range(start, min(start + per_page, total))]
+            return Page(jobs=jobs, total=total)
+
+    return Paged()
+
+@pytest.mark.asyncio
+async def test_crawl_fetches_all_pages_with_bounded_concurrency(aggregate, monkeypatch):
+    p = paged_provider("paged", total=95, per_page=10)
+    monkeypatch.setattr(aggregate, "available_providers", lambda client=None: [p])
+
+    out = await aggregate.run(Query(q="python", results_per_page=10, crawl=True), collect=True)
+
+    assert len(out) == 95
+    assert sorted(p.pages) == list(range(1, 11))
+    assert p.peak <= 3
+
+@pytest.mark.asyncio
+async def test_crawl_respects_max_pages_and_global_cap(aggregate, monkeypatch):
+    monkeypatch.setenv("AGG_MAX_CONCURRENCY", "2")
+    a = paged_provider("a", total=100, per_page=10)
+    b = paged_provider("b", total=100, per_page=10)
+    monkeypatch.setattr(aggregate, "available_providers", lambda client=None: [a, b])
+
+    stats = RunStats()
+    out = await aggregate.run(Query(q="python", results_per_page=10, crawl=True, max_pages=4), stats=stats)
+
+    assert out == []
+    assert stats.unique == 80 and stats.providers == {"a": 40, "b": 40}
+    assert sorted(a.pages) == [1, 2, 3, 4]
+    assert a.peak <= 2 and b.peak <= 2
+
+@pytest.mark.asyncio
+async def test_single_page_mode_fetches_only_requested_page(aggregate, monkeypatch):
+    p = paged_provider("paged", total=95, per_page=10)
+    monkeypatch.setattr(aggregate, "available_providers", lambda client=None: [p])
+
+    out = await aggregate.run(Query(q="python", results_per_page=10))
+
+    assert len(out) == 10
+    assert p.pages == [1]
+
+@pytest.mark.asyncio
+async def test_streaming_writes_start_before_slow_provider_finishes(aggregate, monkeypatch):
+    monkeypatch.setenv("AGG_WRITE_BATCH_SIZE", "10")
+    fast = paged_provider("fast", total=30, per_page=10, delay=0)
+    slow = paged_provider("slow", total=10, per_page=10, delay=0.3)
+    writes = []
+
+    async def write_jobs(batch, deletes=()):
+        writes.append((len(batch), slow.active))
+        return WriteStats(items=len(batch))
+
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+    monkeypatch.setattr(aggregate, "available_providers", lambda client=None: [fast, slow])
+
+    stats = RunStats()
+    await aggregate.run(Query(q="python", results_per_page=10, crawl=True), stats=stats)
+
+    assert stats.written == 40
+    assert all(size <= 10 for size, _ in writes)
+    assert writes[0][1] == 1  # the slow provider's page was still in flight
+
+@pytest.mark.asyncio
+async def test_near_duplicate_stage_deletes_superseded_job(aggregate, monkeypatch):
+    from providers.base import Provider
+
+    desc = "senior python engineer building aws data pipelines with fastapi postgres docker and terraform for fintech"
+    monkeypatch.setenv("AGG_NEAR_DEDUPE", "true")
+    monkeypatch.setenv("AGG_NEAR_DEDUPE_THRESHOLD", "0.7")
+    monkeypatch.setenv("AGG_SOURCE_PRIORITY", "adzuna")
+    deleted = []
+
+    async def write_jobs(puts, deletes=()):
+        deleted.extend(deletes)
+        return WriteStats(items=len(puts) + len(deletes))
+
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+
+    class One(Provider):
+        def __init__(self, name, delay):
+            super().__init__()
+            self.name, self.delay = name, delay
+
+        async def search(self, query):
+            await asyncio.sleep(self.delay)
+            return [Job(source=self.name, source_job_id="1", title="Python Engineer", company="Acme",
+                        location=None, url=f"https://{self.name}.com/1", description=desc)]
+
+    monkeypatch.setattr(aggregate, "available_providers", lambda client=None: [One("remotive", 0), One("adzuna", 0.05)])
+
+    stats = RunStats()
+    out = await aggregate.run(Query(q="python"), stats=stats)
+
+    assert [j.source for j in out] == ["adzuna"]
+    assert deleted == [("remotive", "1")]
+    assert stats.unique == 1 and stats.near_duplicates == 1
+
+    # without a priority the lower source name wins either way, and the losing copy's row is deleted
+    monkeypatch.delenv("AGG_SOURCE_PRIORITY")
+    for first, second in (("remotive", "adzuna"), ("adzuna", "remotive")):
+        deleted.clear()
+        monkeypatch.setattr(aggregate, "available_providers",
+                            lambda client=None: [One(first, 0), One(second, 0.05)])
+        stats = RunStats()
+        out = await aggregate.run([Query(q="python"), Query(q="engineer")], stats=stats)
+        assert [j.source for j in out] == ["adzuna"] and deleted == [("remotive", "1")]
+        assert stats.unique == 1
+        assert sum(qs.unique for qs in stats.queries.values()) == 1
+        assert all(qs.fetched == qs.unique + qs.duplicates for qs in stats.queries.values())
+
+    # a losing copy that was never stored costs no delete
+    deleted.clear()
+    monkeypatch.setattr(aggregate, "stored_keys", lambda keys: [])
+    await aggregate.run(Query(q="python"))
+    assert deleted == []
+
+@pytest.mark.asyncio
+async def test_refreshed_jobs_are_touched_and_only_moved_ones_rewritten(aggregate, monkeypatch):
+    from providers.base import Provider
+
+    class Static(Provider):
+        name = "static"
+        rate_limit = 0
+
+        async def search(self, query):
+            return [make("https://static/1", source="static"), make("https://static/2", source="static")]
+
+    written, touched = [], []
+    async def write_jobs(puts, deletes=()):
+        written.extend(j.source_job_id for j in puts)
+        return WriteStats(items=len(puts))
+
+    async def refresh_jobs(jobs):
+        touched.extend(j.source_job_id for j in jobs)
+        return [j for j in jobs if j.source_job_id.endswith("2")]
+
+    monkeypatch.setattr(aggregate, "available_providers", lambda client=None: [Static()])
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+    monkeypatch.setattr(aggregate, "refresh_jobs", refresh_jobs)
+    monkeypatch.setattr(aggregate, "classify_changes",
+                        lambda jobs: {"inserted": [], "updated": [], "unchanged": [], "refreshed": jobs})
+    stats = RunStats()
+    await aggregate.run(Query(q="python"), stats=stats)
+
+    assert sorted(touched) == ["https://static/1", "https://static/2"]
+    assert written == ["https://static/2"]
+    assert stats.refreshed == 2 and stats.written == 2
+
+@pytest.mark.asyncio
+async def test_open_circuit_skips_provider_on_next_run(aggregate, monkeypatch):
+    import httpx
+    from providers.base import Provider
+
+    monkeypatch.setenv("AGG_DOWN_BREAKER_THRESHOLD", "2")
+    monkeypatch.setattr(Provider.fetch_page.retry, "sleep", lambda s: asyncio.sleep(0))
+
+    class Down(Provider):
+        name = "down"
+        rate_limit = 0
+        calls = 0
+
+        async def search(self, query):
+            Down.calls += 1
+            raise httpx.ConnectError("refused")
+
+    monkeypatch.setattr(aggregate, "available_providers", lambda client=None: [Down()])
+
+    first = RunStats()
+    await aggregate.run(Query(q="python"), stats=first)
+    assert Down.calls == 2  # the third attempt is short-circuited by the open breaker
+
+    second = RunStats()
+    await aggregate.run(Query(q="python"), stats=second)
+    assert Down.calls == 2 and second.skipped == ["down"]
+
+@pytest.mark.asyncio
+async def test_multi_query_dedupes_across_queries(aggregate, monkeypatch):
+    from providers.base import Provider
+
+    written = []
+    async def write_jobs(puts, deletes=()):
+        written.extend(puts)
+        return WriteStats(items=len(puts))
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+
+    class ByTerm(Provider):
+        name = "terms"
+        rate_limit = 0
+
+        async def search(self, query):
+            ids = {"python": [1, 2, 3], "django": [2, 3, 4]}[query.q]
+            return [make(f"https://terms/{i}", source="terms") for i in ids]
+
+    monkeypatch.setattr(aggregate, "available_providers", lambda client=None: [ByTerm()])
+
+    stats = RunStats()
+    queries = [Query(q="python"), Query(q="django"), Query(q="python")]
+    out = await aggregate.run(queries, stats=stats)
+
+    assert sorted(str(j.url) for j in out) == [f"https://terms/{i}" for i in range(1, 5)]
+    assert len(written) == stats.written == 4
+    assert stats.fetched == 6 and stats.unique == 4
+    assert set(stats.queries) == {"python", "django"}
+    assert sum(q.unique for q in stats.queries.values()) == 4
+    assert sum(q.duplicates for q in stats.queries.values()) == 2
+    assert all(q.fetched == 3 and q.providers == {"terms": 3} for q in stats.queries.values())
+
+@pytest.mark.asyncio
+async def test_budget_cuts_off_stragglers_and_flushes_fetched(aggregate, monkeypatch):
+    written = []
+    async def write_jobs(puts, deletes=()):
+        written.extend(puts)
+        return WriteStats(items=len(puts))
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+
+    fast = paged_provider("fast", total=30, per_page=10)
+    slow = paged_provider("slow", total=30, per_page=10, delay=30)
+    monkeypatch.setattr(aggregate, "available_providers", lambda client=None: [fast, slow])
+
+    stats = RunStats()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await aggregate.run(Query(q="python", crawl=True, results_per_page=10), stats=stats, budget=0.3)
+
+    assert loop.time() - start < 5
+    assert stats.deadline_hit and stats.cut_off == ["slow"]
+    assert stats.queries["python"].cut_off == ["slow"]
+    assert len(written) == stats.written == 30
+    assert {j.source for j in written} == {"fast"}
+
+@pytest.mark.asyncio
+async def test_run_reports_stage_timings_and_emits_emf(aggregate, monkeypatch, capsys):
+    import json
+
+    p = paged_provider("paged", total=20, per_page=10)
+    p.http_stats["requests"] = 2
+    p.request_ms.extend([5.0, 15.0])
+    monkeypatch.setattr(p, "reset_stats", lambda: None)
+
+    stats = RunStats()
+    await aggregate.run(Query(q="python", crawl=True, results_per_page=10), providers=[p], stats=stats)
+
+    assert {"fetch", "dedupe", "keywords", "fingerprint", "classify", "write", "total"} <= set(stats.stages)
+    assert stats.http["paged"]["latency_p95_ms"] == 15.0
+    lines = [json.loads(l) for l in capsys.readouterr().out.splitlines() if l.startswith('{"_aws"')]
+    run_line, provider_line = lines
+    assert run_line["fetched"] == 20 and run_line["dedupe_ratio"] == 0.0 and "write_ms" in run_line
+    assert provider_line["Provider"] == "paged" and provider_line["requests"] == 2
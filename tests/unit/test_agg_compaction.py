@@ -0,0 +1,113 @@
+import asyncio
+import json
+import pytest
+
+from datetime import datetime, timedelta, timezone
+from job_aggregator.models import Job, WriteStats
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+DAY = 86400
+
+@pytest.fixture
+def compaction(monkeypatch):
+    from job_aggregator import compaction
+    monkeypatch.setenv("AGG_JOB_TTL_DAYS", "30")
+    monkeypatch.setenv("AGG_JOB_MAX_AGE_DAYS", "60")
+    return compaction
+
+def test_stamp_seen_sets_ttl_capped_by_posting_age(compaction):
+    j = Job(source="x", source_job_id="1", title="Eng", company="Acme", location=None, url="https://x/1")
+    compaction.stamp_seen(j, NOW)
+    assert j.last_seen_at == NOW
+    assert j.expires_at == int((NOW + timedelta(days=30)).timestamp())
+
+    j.posted_at = NOW - timedelta(days=50)
+    compaction.stamp_seen(j, NOW)
+    assert j.expires_at == int((NOW + timedelta(days=10)).timestamp())
+
+def test_classify_item(compaction):
+    now = NOW.timestamp()
+    iso = lambda days: (NOW - timedelta(days=days)).isoformat()
+    assert compaction.classify_item({"last_seen_at": iso(1), "posted_at": iso(5)}, now) == "active"
+    assert compaction.classify_item({"last_seen_at": iso(31)}, now) == "unseen"
+    assert compaction.classify_item({"last_seen_at": iso(1), "posted_at": iso(61)}, now) == "too_old"
+    assert compaction.classify_item({"posted_at": None}, now) == "legacy"
+
+class FakeTable:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def scan(self, **kwargs):
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()  # scans run on a worker thread, not on the event loop
+        self.calls.append(kwargs)
+        i = len(self.calls) - 1
+        resp = {"Items": self.pages[i], "ConsumedCapacity": {"CapacityUnits": 0.5}}
+        if i + 1 < len(self.pages):
+            resp["LastEvaluatedKey"] = {"source": "x", "source_job_id": str(i)}
+        return resp
+
+@pytest.mark.asyncio
+async def test_compact_deletes_stale_jobs_and_emits_metrics(compaction, monkeypatch, capsys):
+    from job_aggregator import storage
+
+    iso = lambda days: (NOW - timedelta(days=days)).isoformat()
+    table = FakeTable([
+        [{"source": "x", "source_job_id": "a", "last_seen_at": iso(1)},
+         {"source": "x", "source_job_id": "b", "last_seen_at": iso(40)}],
+        [{"source": "x", "source_job_id": "c", "last_seen_at": iso(1), "posted_at": iso(90)},
+         {"source": "x", "source_job_id": "d"}],
+    ])
+    deleted = []
+    async def write_jobs(puts, deletes=()):
+        deleted.extend(deletes)
+        return WriteStats(items=len(deletes))
+
+    monkeypatch.setattr(storage, "table", table)
+    monkeypatch.setattr(storage, "write_jobs", write_jobs)
+
+    stats = await compaction.compact(NOW.timestamp())
+    assert deleted == [("x", "b"), ("x", "c")]
+    assert (stats.scanned, stats.active, stats.unseen, stats.too_old, stats.legacy, stats.deleted) == (4, 1, 1, 1, 1, 2)
+    assert stats.consumed_rcu == 1.0
+    assert table.calls[1]["ExclusiveStartKey"] == {"source": "x", "source_job_id": "0"}
+    assert "source" in table.calls[0]["ExpressionAttributeNames"].values()
+
+    emf = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert emf["scanned"] == 4 and emf["_aws"]["CloudWatchMetrics"][0]["Namespace"] == "JobAggregator/Corpus"
+
+    monkeypatch.setenv("AGG_COMPACT_LEGACY", "1")
+    table.calls.clear()
+    deleted.clear()
+    stats = await compaction.compact(NOW.timestamp(), dry_run=True)
+    assert deleted == [] and stats.deleted == 0 and stats.legacy == 1
+
+@pytest.mark.asyncio
+async def test_compact_recounts_corpus_stats_over_listed_jobs(compaction, monkeypatch):
+    from agg_common import corpus_stats
+    from agg_common.keywords import VERSION
+    from job_aggregator import corpus, storage
+
+    iso = lambda days: (NOW - timedelta(days=days)).isoformat()
+    norm = lambda *t: {"keywords_norm": set(t), "keywords_version": VERSION}
+    table = FakeTable([[
+        {"source": "x", "source_job_id": "a", "last_seen_at": iso(1), **norm("python", "aws")},
+        {"source": "x", "source_job_id": "b", "last_seen_at": iso(40), **norm("python")},
+        {"source": "x", "source_job_id": "c", "last_seen_at": iso(1), "closed_at": iso(0), **norm("java")},
+        {"source": "x", "source_job_id": "d", "last_seen_at": iso(1), "keywords": {"Python"}},
+    ]])
+    async def write_jobs(puts, deletes=()):
+        return WriteStats(items=len(deletes))
+    saved = []
+    def replace(stats):
+        saved.append(stats)
+        return corpus_stats.CorpusStats(version=7)
+
+    monkeypatch.setattr(storage, "table", table)
+    monkeypatch.setattr(storage, "write_jobs", write_jobs)
+    monkeypatch.setattr(corpus, "replace", replace)
+
+    stats = await compaction.compact(NOW.timestamp())
+    assert (saved[0].n, saved[0].df) == (2, {"python": 2, "aws": 1})
+    assert stats.corpus_version == 7
@@ -21,22 +21,77 @@ def test_signature_stable():
 async def test_aggregate_uses_all_sources(monkeypatch):
     from job_aggregator import aggregate
     from job_aggregator.models import Job, Query
+    from providers.base import Provider
 
     def make(url, title="Eng", company="Acme"):
         return Job(source="x", source_job_id=url, title=title, company=company,
                    location=None, remote=None, url=url, description=None)
 
-    class P1:
+    class P1(Provider):
         name = "p1"
         async def search(self, q): return [make("https://a/1")]
         def enabled(self): return True
 
-    class P2:
+    class P2(Provider):
         name = "p2"
         async def search(self, q): return [make("https://a/1"), make("https://a/2")]
         def enabled(self): return True
 
-    monkeypatch.setattr(aggregate, "available_providers", lambda: [P1(), P2()])
+    monkeypatch.setattr(aggregate, "available_providers", lambda client=None: [P1(), P2()])
 
     out = await aggregate.run(Query(q="python"))
     assert {str(j.url) for j in out} == {"https://a/1", "https://a/2"}
+
+DESC = ("We are hiring a backend engineer to build python services on aws with fastapi, "
+        "postgres and docker. You will own data pipelines, review code and mentor peers "
+        "in a distributed remote team across europe with flexible hours and equity.")
+
+def make_src(source, sid, title="Backend Engineer", company="Acme", description=DESC):
+    return Job(source=source, source_job_id=sid, title=title, company=company, location=None,
+               remote=None, url=f"https://{source}.com/{sid}", description=description)
+
+def test_near_dedupe_collapses_syndicated_posting():
+    from job_aggregator.dedupe import near_dedupe
+
+    a = make_src("remotive", "1")
+    b = make_src("adzuna", "9", title="Backend Engineer (Remote)", description="<p>" + DESC + "</p>")
+    c = make_src("adzuna", "10", title="Accountant", description="bookkeeping ledgers and payroll for a retail chain")
+    out = near_dedupe([a, b, c], threshold=0.7)
+    assert [(j.source, j.source_job_id) for j in out] == [("adzuna", "9"), ("adzuna", "10")]
+
+def test_near_dedupe_tie_does_not_depend_on_arrival_order():
+    from job_aggregator.dedupe import near_dedupe
+
+    a, b = make_src("remotive", "1"), make_src("adzuna", "9")
+    for jobs in ([a, b], [b, a]):
+        assert [(j.source, j.source_job_id) for j in near_dedupe(jobs, threshold=0.7)] == [("adzuna", "9")]
+
+def test_near_dedupe_source_priority_decides_winner():
+    from job_aggregator.dedupe import near_dedupe
+
+    a = make_src("remotive", "1")
+    b = make_src("adzuna", "9")
+    out = near_dedupe([a, b], threshold=0.7, priority=["adzuna", "remotive"])
+    assert [(j.source, j.source_job_id) for j in out] == [("adzuna", "9")]
+
+def test_near_dedupe_keeps_same_source_postings():
+    from job_aggregator.dedupe import near_dedupe
+
+    out = near_dedupe([make_src("adzuna", "1"), make_src("adzuna", "2")], threshold=0.7)
+    assert len(out) == 2
+
+def test_minhash_similarity_tracks_jaccard():
+    from job_aggregator.dedupe import minhash, similarity
+
+    a = {f"s{i}" for i in range(400)}
+    b = {f"s{i}" for i in range(100, 500)}  # jaccard 0.6
+    est = similarity(minhash(a, 256), minhash(b, 256))
+    assert 0.45 < est < 0.75
+    assert similarity(minhash(a, 64), minhash(a, 64)) == 1.0
+
+def test_lsh_params_match_threshold():
+    from job_aggregator.dedupe import lsh_params
+
+    bands, rows = lsh_params(0.8, 64)
+    assert bands * rows == 64
+    assert abs((1 / bands) ** (1 / rows) - 0.8) < 0.1
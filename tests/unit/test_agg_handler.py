@@ -0,0 +1,114 @@
+import asyncio
+import json
+import pytest
+
+from job_aggregator.models import Job
+
+class Named:
+    def __init__(self, name):
+        self.name = name
+
+@pytest.fixture
+def handler(monkeypatch):
+    from job_aggregator import handler, context
+    context.reset_context()
+    seen = []
+
+    async def run(queries, *, client=None, providers=None, stats=None, **_):
+        seen.append((asyncio.get_running_loop(), client, providers, stats.warm))
+        if queries[0].q == "boom":
+            raise RuntimeError("boom")
+        return [Job(source="x", source_job_id="1", title="Eng", company="Acme", location=None, url="https://x/1")]
+
+    monkeypatch.setattr(handler, "run", run)
+    monkeypatch.setattr(context, "available_providers", lambda client=None, names=None: [Named(n) for n in names])
+    handler.seen = seen
+    yield handler
+    context.reset_context()
+
+def test_warm_invocations_reuse_loop_client_and_providers(handler):
+    r1 = handler.handler({"queryStringParameters": {"q": "python"}}, None)
+    r2 = handler.handler({"queryStringParameters": {"q": "python"}}, None)
+    assert r1["statusCode"] == r2["statusCode"] == 200
+    assert len(json.loads(r2["body"])) == 1
+
+    (loop1, client1, prov1, warm1), (loop2, client2, prov2, warm2) = handler.seen
+    assert loop1 is loop2 and client1 is client2
+    assert prov1 and all(a is b for a, b in zip(prov1, prov2, strict=True))
+    assert (warm1, warm2) == (False, True)
+
+def test_failed_invocation_reinitializes_context(handler):
+    handler.handler({"queryStringParameters": {"q": "python"}}, None)
+    with pytest.raises(RuntimeError):
+        handler.handler({"queryStringParameters": {"q": "boom"}}, None)
+    handler.handler({"queryStringParameters": {"q": "python"}}, None)
+
+    first, failed, after = handler.seen
+    assert failed[0] is first[0]
+    assert first[0].is_closed()
+    assert after[0] is not first[0] and after[1] is not first[1]
+    assert after[3] is False
+
+def test_queries_list_and_named_plan(handler, monkeypatch):
+    monkeypatch.setenv("AGG_CRAWL_PLANS", json.dumps({"ro": ["python", {"q": "java", "location": "Cluj"}]}))
+    captured = []
+
+    async def run(queries, *, stats=None, **_):
+        captured.append(queries)
+        return []
+    monkeypatch.setattr(handler, "run", run)
+
+    r = handler.handler({"body": json.dumps({"queries": ["go", "rust"], "per_page": 20})}, None)
+    assert r["statusCode"] == 200 and json.loads(r["body"])["jobs"] == []
+    assert [(q.q, q.results_per_page) for q in captured[-1]] == [("go", 20), ("rust", 20)]
+
+    handler.handler({"queryStringParameters": {"plan": "ro", "crawl": "1"}}, None)
+    assert [(q.key(), q.crawl) for q in captured[-1]] == [("python", True), ("java@Cluj", True)]
+
+    assert handler.handler({"queryStringParameters": {"plan": "nope"}}, None)["statusCode"] == 400
+    assert handler.handler({"body": json.dumps({"queries": [{"location": "x"}]})}, None)["statusCode"] == 400
+
+    # repeats collapse; same key with other options would share snapshots and watermarks
+    handler.handler({"body": json.dumps({"queries": ["go", "go"]})}, None)
+    assert [q.q for q in captured[-1]] == ["go"]
+    r = handler.handler({"body": json.dumps({"queries": ["go", {"q": "go", "page": 2}]})}, None)
+    assert r["statusCode"] == 400 and "differ in page" in json.loads(r["body"])["error"]
+
+def test_budget_follows_lambda_remaining_time(handler, monkeypatch):
+    monkeypatch.setenv("AGG_DEADLINE_RESERVE", "8")
+    budgets = []
+
+    async def run(queries, *, stats=None, budget=None, **_):
+        budgets.append(budget)
+        stats.cut_off.append("slow")
+        return []
+    monkeypatch.setattr(handler, "run", run)
+
+    class LambdaContext:
+        def get_remaining_time_in_millis(self):
+            return 60_000
+
+    r = handler.handler({"queryStringParameters": {"q": "python"}}, LambdaContext())
+    assert budgets == [52.0]
+    assert r["headers"]["x-agg-cut-off"] == "slow"
+
+    handler.handler({"queryStringParameters": {"q": "python"}}, None)
+    assert budgets[-1] is None
+
+def test_event_selects_providers(handler):
+    handler.handler({"queryStringParameters": {"q": "python", "providers": "adzuna, remotive"}}, None)
+    handler.handler({"body": json.dumps({"q": "python", "providers": ["remotive"]})}, None)
+    assert [p.name for p in handler.seen[0][2]] == ["adzuna", "remotive"]
+    assert handler.seen[1][2] == [handler.seen[0][2][1]]
+
+    r = handler.handler({"queryStringParameters": {"q": "python", "providers": "remotive,monster"}}, None)
+    assert r["statusCode"] == 400 and "monster" in r["body"]
+
+def test_debug_flag_returns_metrics(handler):
+    plain = handler.handler({"queryStringParameters": {"q": "python"}}, None)
+    assert isinstance(json.loads(plain["body"]), list)
+
+    r = handler.handler({"queryStringParameters": {"q": "python", "debug": "1"}}, None)
+    body = json.loads(r["body"])
+    assert len(body["jobs"]) == 1
+    assert set(body["metrics"]) == {"stages_ms", "providers", "parse", "dedupe_ratio", "writes"}
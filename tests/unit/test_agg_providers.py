@@ -0,0 +1,197 @@
+import json
+import httpx
+import pytest
+
+from job_aggregator.models import Query
+
+REMOTIVE_PAYLOAD = {
+    "jobs": [
+        {"id": 1, "title": " Python Dev ", "company_name": "Acme", "url": "https://r/1",
+         "candidate_required_location": "EU", "publication_date": "2024-01-01T00:00:00Z"},
+        {"id": None, "title": "skipped", "company_name": "Acme", "url": "https://r/2"},
+    ]
+}
+
+@pytest.fixture(autouse=True)
+def _unpaced(monkeypatch):
+    from providers import resilience
+    monkeypatch.setattr(resilience, "_limiters", {})
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setenv("AGG_REMOTIVE_RATE", "0")
+
+@pytest.mark.asyncio
+async def test_get_client_is_reused_within_loop():
+    from job_aggregator import http_client
+
+    c1 = http_client.get_client()
+    c2 = http_client.get_client()
+    assert c1 is c2
+    await http_client.aclose()
+    assert http_client.get_client() is not c1
+    await http_client.aclose()
+
+def test_get_client_closes_client_of_previous_loop():
+    import asyncio
+    from job_aggregator import http_client
+
+    async def grab():
+        return http_client.get_client()
+
+    async def replace():
+        client = http_client.get_client()
+        await http_client.aclose()
+        return client
+
+    first = asyncio.run(grab())
+    second = asyncio.run(replace())
+    assert second is not first and first.is_closed and second.is_closed
+
+@pytest.mark.asyncio
+async def test_providers_receive_shared_client():
+    from providers import available_providers
+
+    async with httpx.AsyncClient() as client:
+        providers = available_providers(client)
+        assert providers and all(p.client is client for p in providers)
+
+@pytest.mark.asyncio
+async def test_remotive_search_uses_injected_client(monkeypatch):
+    from providers.remotive import RemotiveProvider
+
+    monkeypatch.setenv("AGG_REMOTIVE_TIMEOUT", "3")
+    seen = []
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json=REMOTIVE_PAYLOAD)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client:
+        jobs = await RemotiveProvider(client).search(Query(q="python"))
+
+    assert [j.source_job_id for j in jobs] == ["1"]
+    assert jobs[0].title == "Python Dev"
+    assert seen[0].url.params["search"] == "python"
+    assert seen[0].extensions["timeout"]["read"] == 3.0
+
+@pytest.mark.asyncio
+async def test_get_records_request_counters_and_latency():
+    from providers.remotive import RemotiveProvider
+
+    body = json.dumps(REMOTIVE_PAYLOAD).encode()
+    def respond(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client:
+        p = RemotiveProvider(client)
+        await p.search(Query(q="python"))
+        await p.search(Query(q="django"))
+
+    assert p.http_stats == {"requests": 2, "errors": 0, "not_modified": 0, "bytes": 2 * len(body)}
+    assert len(p.request_ms) == 2
+    p.reset_stats()
+    assert p.http_stats["requests"] == 0 and p.request_ms == []
+
+@pytest.mark.parametrize("backend", ["memory", "file"])
+@pytest.mark.asyncio
+async def test_response_cache_ttl_and_conditional_requests(backend, tmp_path, monkeypatch):
+    from providers.cache import FileStore, MemoryStore, ResponseCache
+    from providers.remotive import RemotiveProvider
+
+    store = MemoryStore() if backend == "memory" else FileStore(str(tmp_path))
+    cache = ResponseCache(store, ttl=60)
+    requests = []
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json=REMOTIVE_PAYLOAD, headers={"etag": '"v1"'})
+
+    parses = []
+    async with httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client:
+        p = RemotiveProvider(client, cache)
+        original = p._parse
+        monkeypatch.setattr(p, "_parse", lambda content: parses.append(1) or original(content))
+
+        first = await p.search(Query(q="python"))
+        first[0].keywords_version = 99                     # pipeline edits must not reach the cache
+        again = await p.search(Query(q="python"))         # fresh: no request at all
+        again[0].title = "edited"
+        cache.ttl = 0
+        revalidated = await p.search(Query(q="python"))   # stale: conditional request -> 304
+
+    assert [j.source_job_id for j in first] == [j.source_job_id for j in again] == [j.source_job_id for j in revalidated]
+    assert again[0].keywords_version is None and revalidated[0].title != "edited"
+    assert len(requests) == 2 and requests[1].headers["if-none-match"] == '"v1"'
+    assert len(parses) == 1
+    assert cache.stats == {"hits": 1, "revalidated": 1, "misses": 1}
+
+def test_file_store_round_trip(tmp_path):
+    from providers.cache import CacheEntry, FileStore
+
+    store = FileStore(str(tmp_path))
+    store.set("k", CacheEntry(etag='"x"', stored_at=1.0, digest="d", content=b"{}"))
+    entry = FileStore(str(tmp_path)).get("k")
+    assert entry.etag == '"x"' and entry.content == b"{}"
+    assert store.get("missing") is None
+
+def _rows(n, bad=()):
+    return [dict(source="x", source_job_id=str(i), title="Eng", company=None if i in bad else "Acme",
+                 location=None, url=f"https://x.com/{i}") for i in range(n)]
+
+def test_build_jobs_fast_mode_drops_invalid_rows():
+    from providers.parsing import build_jobs
+
+    jobs, skipped = build_jobs(_rows(5, bad={2}), strict=False)
+    assert [j.source_job_id for j in jobs] == ["0", "1", "3", "4"] and skipped == 1
+    assert str(jobs[0].url) == "https://x.com/0"
+
+def test_build_jobs_strict_mode_fails_page():
+    from pydantic import ValidationError
+    from providers.parsing import build_jobs
+
+    with pytest.raises(ValidationError):
+        build_jobs(_rows(3, bad={1}), strict=True)
+
+def test_parse_mode_defaults_to_strict_and_fast_mode_reports_drops(monkeypatch, capsys):
+    from pydantic import ValidationError
+    from providers.remotive import RemotiveProvider
+
+    monkeypatch.delenv("AGG_PARSE_MODE", raising=False)
+    p = RemotiveProvider()
+    with pytest.raises(ValidationError):
+        p.build_jobs(_rows(3, bad={1}))
+
+    monkeypatch.setenv("AGG_PARSE_MODE", "fast")
+    assert len(p.build_jobs(_rows(3, bad={1}))) == 2 and p.parse_stats["skipped"] == 1
+    assert "remotive dropped 1 of 3 rows" in capsys.readouterr().out
+
+@pytest.mark.parametrize("mode", ["fast", "strict"])
+def test_remotive_parse_modes_agree(mode, monkeypatch):
+    import json
+    from providers.remotive import RemotiveProvider
+
+    monkeypatch.setenv("AGG_PARSE_MODE", mode)
+    p = RemotiveProvider()
+    page = p._parse(json.dumps(REMOTIVE_PAYLOAD).encode())
+    assert [(j.source_job_id, j.title, j.posted_at.year) for j in page.jobs] == [("1", "Python Dev", 2024)]
+    assert p.parse_stats["items"] == 1 and p.parse_stats["decode_ms"] >= 0
+
+def test_registry_imports_only_selected_configured_providers(monkeypatch):
+    import sys
+    import providers
+
+    monkeypatch.setattr(providers, "_classes", {})
+    monkeypatch.delitem(sys.modules, "providers.adzuna", raising=False)
+    monkeypatch.delenv("AGG_PROVIDERS", raising=False)
+
+    assert [p.name for p in providers.available_providers()] == ["remotive"]
+    assert "providers.adzuna" not in sys.modules
+
+    monkeypatch.setenv("AGG_PROVIDERS", "remotive,adzuna")
+    monkeypatch.setitem(providers.REGISTRY, "adzuna", providers.REGISTRY["adzuna"]._replace(configured=lambda: False))
+    assert [p.name for p in providers.available_providers()] == ["remotive"]
+    assert "providers.adzuna" not in sys.modules
+
+    assert providers.unknown_providers(["remotive", "monster"]) == ["monster"]
+    assert providers.available_providers(names=["monster"]) == []
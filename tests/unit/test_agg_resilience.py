@@ -0,0 +1,72 @@
+import asyncio
+import time
+import pytest
+
+from providers.resilience import CircuitBreaker, TokenBucket
+
+def test_circuit_breaker_transitions(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    b = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    b.record_failure()
+    assert b.allow() and b.state == "closed"
+    b.record_failure()
+    assert b.state == "open" and not b.allow()
+
+    now[0] += 31
+    assert b.allow() and b.state == "half_open"
+    assert not b.allow()  # only one probe at a time
+    b.record_failure()
+    assert b.state == "open"
+
+    now[0] += 31
+    assert b.allow()
+    b.record_success()
+    assert b.state == "closed" and b.allow()
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=20, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+    elapsed = time.monotonic() - start
+    assert 0.08 <= elapsed < 0.5
+
+@pytest.mark.asyncio
+async def test_token_bucket_pause_delays_acquire():
+    bucket = TokenBucket(rate=0, burst=1)
+    bucket.pause(0.05)
+    start = time.monotonic()
+    await bucket.acquire()
+    assert time.monotonic() - start >= 0.04
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_does_not_wedge_the_breaker(monkeypatch):
+    from job_aggregator.models import Query
+    from providers import resilience
+    from providers.base import Provider
+
+    started = asyncio.Event()
+
+    class Hanging(Provider):
+        name = "hanging"
+
+        async def search(self, query):
+            started.set()
+            await asyncio.sleep(60)
+            return []
+
+    resilience.reset()
+    breaker = resilience.breaker_for("hanging")
+    breaker.state, breaker.opened_at = breaker.OPEN, time.monotonic() - breaker.reset_timeout
+
+    probe = asyncio.create_task(Hanging().fetch_page(Query(q="x")))
+    await started.wait()
+    assert breaker.state == "half_open" and not breaker.allow()
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    assert breaker.allow()  # the next call gets to probe
+    resilience.reset()
@@ -0,0 +1,238 @@
+import pytest
+
+from job_aggregator.models import Job, Query, RunStats, WriteStats
+
+def make(sid, title="Eng"):
+    return Job(source="dump", source_job_id=sid, title=title, company="Acme", location=None,
+               url=f"https://dump/{sid}", description="python developer")
+
+@pytest.fixture
+def snapshots(monkeypatch, tmp_path):
+    from job_aggregator import snapshots
+    monkeypatch.setattr(snapshots, "_store", snapshots.FileSnapshotStore(str(tmp_path)))
+    return snapshots
+
+def test_diff_classifies_added_changed_unchanged_removed(snapshots):
+    first = snapshots.SnapshotDiff({}, now=1000.0)
+    assert all(first.observe(make(s)) for s in "abc")
+
+    prev = snapshots.decode(snapshots.encode(first.current))
+    diff = snapshots.SnapshotDiff(prev, now=2000.0)
+    assert diff.observe(make("a")) is False
+    assert diff.observe(make("b", title="Senior Eng")) is True
+    assert diff.observe(make("d")) is True
+    assert diff.removed() == ["c"]
+    assert diff.counts == {"added": 1, "changed": 1, "unchanged": 1, "refreshed": 0, "removed": 1}
+    assert diff.current["a"] == prev["a"]
+
+def test_diff_passes_unchanged_on_once_refresh_is_due(snapshots, monkeypatch):
+    monkeypatch.setenv("AGG_LAST_SEEN_REFRESH_HOURS", "1")
+    first = snapshots.SnapshotDiff({}, now=0.0)
+    first.observe(make("a"))
+    diff = snapshots.SnapshotDiff(first.current, now=3600.0)
+    assert diff.observe(make("a")) is True
+    assert diff.counts["refreshed"] == 1 and diff.current["a"][1] == 3600.0
+
+def test_decode_drops_snapshots_of_another_normalizer_version(snapshots, monkeypatch):
+    data = snapshots.encode({"a": ("h", 1.0)})
+    monkeypatch.setattr(snapshots.kw, "VERSION", snapshots.kw.VERSION + 1)
+    assert snapshots.decode(data) == {}
+    assert snapshots.decode(b"not gzip") == {}
+
+@pytest.fixture
+def aggregate(monkeypatch, snapshots):
+    from job_aggregator import aggregate
+    from providers import resilience
+    monkeypatch.setattr(resilience, "_limiters", {})
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(aggregate, "classify_changes", lambda jobs: {"inserted": jobs, "updated": [], "unchanged": [], "refreshed": []})
+    monkeypatch.setattr(aggregate, "stored_keys", lambda keys: list(keys))
+    return aggregate
+
+def dump_provider(listing):
+    from providers.base import Provider
+
+    class Dump(Provider):
+        name = "dump"
+        rate_limit = 0
+        snapshot = True
+
+        async def search(self, query):
+            return [make(sid, title) for sid, title in listing]
+
+    return Dump()
+
+@pytest.mark.asyncio
+async def test_run_skips_unchanged_and_closes_removed(aggregate, monkeypatch):
+    written, closed = [], []
+    async def write_jobs(puts, deletes=()):
+        written.extend(puts)
+        return WriteStats(items=len(puts))
+    async def close_jobs(keys, now):
+        closed.extend(keys)
+        return {k: frozenset() for k in keys}
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+    monkeypatch.setattr(aggregate, "close_jobs", close_jobs)
+
+    listing = [("1", "Eng"), ("2", "Eng"), ("3", "Eng")]
+    await aggregate.run(Query(q="python", crawl=True), providers=[dump_provider(listing)])
+    assert len(written) == 3 and closed == []
+
+    written.clear()
+    listing = [("1", "Eng"), ("2", "Staff Eng"), ("4", "Eng")]
+    stats = RunStats()
+    await aggregate.run(Query(q="python", crawl=True), providers=[dump_provider(listing)], stats=stats)
+
+    assert sorted(j.source_job_id for j in written) == ["2", "4"]
+    assert closed == [("dump", "3")] and stats.closed == 1
+    assert stats.snapshots["dump:python"] == {"added": 1, "changed": 1, "unchanged": 1, "refreshed": 0, "removed": 1}
+
+@pytest.mark.asyncio
+async def test_failed_writes_keep_previous_snapshot(aggregate, monkeypatch, snapshots):
+    async def write_jobs(puts, deletes=()):
+        return WriteStats(items=len(puts), failed=len(puts))
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+
+    await aggregate.run(Query(q="python", crawl=True), providers=[dump_provider([("1", "Eng")])])
+
+    assert snapshots.get_store().load(snapshots.snapshot_name("dump", "python")) is None
+
+@pytest.mark.asyncio
+async def test_disabled_snapshot_mode_processes_everything(aggregate, monkeypatch):
+    written = []
+    async def write_jobs(puts, deletes=()):
+        written.extend(puts)
+        return WriteStats(items=len(puts))
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+    monkeypatch.setenv("AGG_SNAPSHOT", "0")
+
+    for _ in range(2):
+        await aggregate.run(Query(q="python", crawl=True), providers=[dump_provider([("1", "Eng")])])
+    assert len(written) == 2
+
+@pytest.mark.asyncio
+async def test_collected_runs_return_the_full_listing(aggregate, monkeypatch):
+    async def write_jobs(puts, deletes=()):
+        return WriteStats(items=len(puts))
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+
+    for _ in range(2):
+        out = await aggregate.run(Query(q="python"), providers=[dump_provider([("1", "Eng"), ("2", "Eng")])])
+        assert len(out) == 2
+
+def test_diff_ignores_fields_the_pipeline_sets(snapshots):
+    from job_aggregator.aggregate import annotate_keywords
+
+    first = snapshots.SnapshotDiff({}, now=1000.0)
+    first.observe(make("a"))
+    annotated = make("a")
+    annotate_keywords(annotated)
+    assert snapshots.SnapshotDiff(first.current, now=1000.0).observe(annotated) is False
+
+@pytest.mark.asyncio
+async def test_unchanged_listing_served_from_http_cache_is_skipped(aggregate, monkeypatch):
+    import httpx
+    from providers import cache
+    from providers.remotive import RemotiveProvider
+
+    monkeypatch.setenv("AGG_HTTP_CACHE", "memory")
+    monkeypatch.setenv("AGG_REMOTIVE_RATE", "0")
+    monkeypatch.setattr(cache, "_cache", None)
+    written = []
+    async def write_jobs(puts, deletes=()):
+        written.extend(puts)
+        return WriteStats(items=len(puts))
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+
+    payload = {"jobs": [{"id": i, "title": "Eng", "company_name": "Acme", "url": f"https://r/{i}",
+                         "description": "python developer"} for i in (1, 2)]}
+    def respond(request):
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json=payload, headers={"etag": '"v1"'})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client:
+        p = RemotiveProvider(client)
+        await aggregate.run(Query(q="python", crawl=True), providers=[p])
+        assert len(written) == 2
+
+        for ttl in (300, 0):  # a TTL hit, then a 304: both hand back the cached parse
+            cache.get_cache().ttl = ttl
+            written.clear()
+            stats = RunStats()
+            await aggregate.run(Query(q="python", crawl=True), providers=[p], stats=stats)
+            assert written == [] and stats.snapshots["remotive:python"]["unchanged"] == 2
+    assert cache.get_cache().stats["hits"] == 1 and cache.get_cache().stats["revalidated"] == 1
+
+@pytest.mark.asyncio
+async def test_posting_still_listed_under_another_query_is_not_closed(aggregate, monkeypatch):
+    from providers.base import Provider
+
+    closed = []
+    async def write_jobs(puts, deletes=()):
+        return WriteStats(items=len(puts))
+    async def close_jobs(keys, now):
+        closed.extend(keys)
+        return {k: frozenset() for k in keys}
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+    monkeypatch.setattr(aggregate, "close_jobs", close_jobs)
+
+    listings = {"python": ["1", "2", "3"], "django": ["2", "3", "4"]}
+
+    class Dump(Provider):
+        name = "dump"
+        rate_limit = 0
+        snapshot = True
+
+        async def search(self, query):
+            return [make(sid) for sid in listings[query.q]]
+
+    queries = [Query(q="python", crawl=True), Query(q="django", crawl=True)]
+    await aggregate.run(queries, providers=[Dump()])
+
+    listings = {"python": ["1", "3"], "django": ["2", "3", "4"]}  # "2" left python but is still under django
+    stats = RunStats()
+    await aggregate.run(queries, providers=[Dump()], stats=stats)
+    assert closed == [] and stats.snapshots["dump:python"]["removed"] == 1
+
+    listings = {"python": ["1", "3"], "django": ["3", "4"]}  # now it is gone from both
+    await aggregate.run(queries, providers=[Dump()])
+    assert closed == [("dump", "2")]
+
+@pytest.mark.asyncio
+async def test_near_dedupe_sees_unchanged_snapshot_jobs(aggregate, monkeypatch):
+    from providers.base import Provider
+
+    desc = "senior python engineer building aws data pipelines with fastapi postgres docker and terraform for fintech"
+    monkeypatch.setenv("AGG_NEAR_DEDUPE", "true")
+    monkeypatch.setenv("AGG_NEAR_DEDUPE_THRESHOLD", "0.7")
+    written, deleted, queried = [], [], []
+    async def write_jobs(puts, deletes=()):
+        written.extend((j.source, j.source_job_id) for j in puts)
+        deleted.extend(deletes)
+        return WriteStats(items=len(puts) + len(deletes))
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+
+    class Source(Provider):
+        rate_limit = 0
+
+        def __init__(self, name, sid, snapshot=False, incremental=False):
+            super().__init__()
+            self.name, self.sid, self.snapshot, self.incremental = name, sid, snapshot, incremental
+
+        async def search(self, query):
+            queried.append(query.since)
+            return [Job(source=self.name, source_job_id=self.sid, title="Python Engineer", company="Acme",
+                        location=None, url=f"https://{self.name}.com/{self.sid}", description=desc)]
+
+    await aggregate.run(Query(q="python", crawl=True), providers=[Source("remotive", "1", snapshot=True)])
+    assert written == [("remotive", "1")]
+
+    # remotive:1 is unchanged in its snapshot, but the new adzuna copy must still be compared with it
+    written.clear()
+    stats = RunStats()
+    await aggregate.run(Query(q="python", crawl=True), stats=stats,
+                        providers=[Source("remotive", "1", snapshot=True), Source("adzuna", "9", incremental=True)])
+    assert ("adzuna", "9") in written and ("remotive", "1") not in written
+    assert deleted == [("remotive", "1")]
+    assert stats.watermarks == {} and queried[-1] is None
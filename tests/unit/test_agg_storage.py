@@ -0,0 +1,250 @@
+import pytest
+
+from job_aggregator.models import Job
+from job_aggregator.dedupe import fingerprint
+
+def make(sid, title="Eng", description="python"):
+    j = Job(source="x", source_job_id=sid, title=title, company="Acme", location=None,
+            url=f"https://x.com/{sid}", description=description)
+    j.fingerprint = fingerprint(j)
+    return j
+
+@pytest.fixture
+def storage(monkeypatch):
+    from job_aggregator import storage
+    monkeypatch.setattr(storage, "_fingerprints", {})
+    return storage
+
+def test_fingerprint_ignores_keywords_but_tracks_content():
+    a, b = make("1"), make("1")
+    b.keywords = {"python"}
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint(make("1", description="java"))
+
+def test_classify_changes_uses_stored_fingerprints(storage, monkeypatch):
+    same, changed, new = make("1"), make("2", title="Senior Eng"), make("3")
+    calls = []
+
+    def fetch(keys):
+        calls.append(sorted(keys))
+        return {("x", "1"): same.fingerprint, ("x", "2"): make("2").fingerprint}
+
+    monkeypatch.setattr(storage, "_fetch_fingerprints", fetch)
+    out = storage.classify_changes([same, changed, new])
+
+    assert out["unchanged"] == [same]
+    assert out["updated"] == [changed]
+    assert out["inserted"] == [new]
+    assert calls == [[("x", "1"), ("x", "2"), ("x", "3")]]
+
+class FakeResource:
+    """BatchGetItem stand-in that leaves every key after the first unprocessed for `rounds` calls."""
+
+    def __init__(self, rounds):
+        self.rounds = rounds
+        self.calls = 0
+
+    def batch_get_item(self, RequestItems):
+        (table, req), = RequestItems.items()
+        self.calls += 1
+        keys, rest = (req["Keys"][:1], req["Keys"][1:]) if self.rounds else (req["Keys"], [])
+        self.rounds = max(0, self.rounds - 1)
+        resp = {"Responses": {table: [{**k, "fingerprint": "f"} for k in keys]}}
+        if rest:
+            resp["UnprocessedKeys"] = {table: {**req, "Keys": rest}}
+        return resp
+
+def test_fetch_fingerprints_backs_off_on_unprocessed_keys(storage, monkeypatch):
+    import time
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    monkeypatch.setenv("AGG_WRITE_MAX_RETRIES", "3")
+    keys = [("x", str(i)) for i in range(3)]
+
+    monkeypatch.setattr(storage, "dynamodb", FakeResource(rounds=2))
+    assert storage._fetch_fingerprints(keys) == {k: "f" for k in keys}
+    assert len(sleeps) == 2
+
+    monkeypatch.setattr(storage, "dynamodb", FakeResource(rounds=100))
+    with pytest.raises(RuntimeError):
+        storage._fetch_fingerprints([("x", str(i)) for i in range(10)])
+    assert storage.dynamodb.calls == 4  # the first try plus AGG_WRITE_MAX_RETRIES
+
+class FakeClient:
+    """BatchWriteItem stand-in that leaves the first `unprocessed` requests of each call unprocessed."""
+
+    def __init__(self, unprocessed=0, rounds=1):
+        self.calls = []
+        self.unprocessed = unprocessed
+        self.rounds = rounds
+
+    def batch_write_item(self, RequestItems):
+        (table, reqs), = RequestItems.items()
+        self.calls.append(len(reqs))
+        if self.rounds > 0 and self.unprocessed:
+            self.rounds -= 1
+            return {"UnprocessedItems": {table: reqs[:self.unprocessed]}}
+        return {"UnprocessedItems": {}}
+
+def test_classify_changes_hits_local_map_after_save(storage, monkeypatch):
+    monkeypatch.setattr(storage, "client", FakeClient())
+    monkeypatch.setattr(storage, "_fetch_fingerprints", lambda keys: pytest.fail("unexpected lookup"))
+
+    j = make("1")
+    storage.save_jobs([j])
+    assert storage.classify_changes([make("1")])["unchanged"] == [make("1")]
+
+def test_classify_changes_writes_all_when_lookup_fails(storage, monkeypatch):
+    def boom(keys):
+        raise RuntimeError("throttled")
+
+    monkeypatch.setattr(storage, "_fetch_fingerprints", boom)
+    out = storage.classify_changes([make("1"), make("2")])
+    assert len(out["updated"]) == 2 and not out["unchanged"]
+
+@pytest.mark.asyncio
+async def test_write_jobs_shards_batches_and_retries_unprocessed(storage, monkeypatch):
+    fake = FakeClient(unprocessed=3, rounds=2)
+    monkeypatch.setattr(storage, "client", fake)
+    monkeypatch.setattr(storage, "_backoff", lambda attempt: 0)
+
+    jobs = [make(str(i)) for i in range(60)]
+    stats = await storage.write_jobs(jobs, [("x", "gone")])
+
+    assert sorted(fake.calls) == [3, 3, 11, 25, 25]
+    assert stats.items == 61 and stats.batches == 3 and len(stats.batch_ms) == 3
+    assert stats.throttled == 6 and stats.retries == 2 and stats.failed == 0
+    assert storage._fingerprints[("x", "0")] == jobs[0].fingerprint
+
+@pytest.mark.asyncio
+async def test_write_jobs_reports_items_left_unprocessed(storage, monkeypatch):
+    monkeypatch.setenv("AGG_WRITE_MAX_RETRIES", "1")
+    monkeypatch.setattr(storage, "client", FakeClient(unprocessed=2, rounds=99))
+    monkeypatch.setattr(storage, "_backoff", lambda attempt: 0)
+
+    jobs = [make(str(i)) for i in range(5)]
+    stats = await storage.write_jobs(jobs)
+
+    assert stats.failed == 2
+    assert ("x", "0") not in storage._fingerprints and ("x", "4") in storage._fingerprints
+
+def test_classify_changes_refreshes_stale_last_seen(storage, monkeypatch):
+    monkeypatch.setenv("AGG_LAST_SEEN_REFRESH_HOURS", "24")
+    fresh, stale, legacy = make("1"), make("2"), make("3")
+    now = 1_000_000.0
+
+    def fetch(keys):
+        storage._last_seen.update({("x", "1"): now - 3600, ("x", "2"): now - 2 * 86400, ("x", "3"): None})
+        return {k: j.fingerprint for k, j in ((("x", "1"), fresh), (("x", "2"), stale), (("x", "3"), legacy))}
+
+    monkeypatch.setattr(storage, "_last_seen", {})
+    monkeypatch.setattr(storage, "_fetch_fingerprints", fetch)
+    out = storage.classify_changes([fresh, stale, legacy], now=now)
+    assert out["unchanged"] == [fresh]
+    assert out["refreshed"] == [stale, legacy]
+
+@pytest.mark.asyncio
+async def test_refresh_jobs_updates_only_last_seen(storage, monkeypatch):
+    from datetime import datetime, timezone
+    from botocore.exceptions import ClientError
+    from job_aggregator.compaction import stamp_seen
+
+    calls = []
+    def update_item(Key, **kwargs):
+        calls.append((Key["source_job_id"], kwargs))
+        if Key["source_job_id"] == "moved":
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+        return {}
+
+    monkeypatch.setattr(storage.table, "update_item", update_item)
+    monkeypatch.setattr(storage, "_s3_client", object())  # any upload would fail
+    monkeypatch.setattr(storage, "_last_seen", {})
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    same, moved = make("1", description="<p>long</p>"), make("moved")
+    for j in (same, moved):
+        stamp_seen(j, now)
+
+    assert await storage.refresh_jobs([same, moved]) == [moved]
+    kwargs = dict(calls)["1"]
+    assert kwargs["UpdateExpression"] == "SET last_seen_at = :s, expires_at = :e"
+    assert kwargs["ExpressionAttributeValues"] == {":s": now.isoformat().replace("+00:00", "Z"),
+                                                   ":e": same.expires_at, ":f": same.fingerprint}
+    assert storage._last_seen == {("x", "1"): now.timestamp()}
+
+def test_item_offloads_description(storage, monkeypatch):
+    from agg_common import descriptions
+
+    class FakeS3:
+        objects = {}
+
+        def put_object(self, Bucket, Key, Body, **kwargs):
+            self.objects[(Bucket, Key)] = Body
+
+    j = make("1", description="<p>python</p><script>x()</script>")
+    monkeypatch.delenv("AGG_DESCRIPTIONS_BUCKET", raising=False)
+    item = storage._item(j)
+    assert "description" not in item
+    assert descriptions.decompress(item["description_z"]["B"]) == "<p>python</p>"
+
+    s3 = FakeS3()
+    monkeypatch.setenv("AGG_DESCRIPTIONS_BUCKET", "descs")
+    monkeypatch.setattr(storage, "_s3_client", s3)
+    item = storage._item(j)
+    assert "description_z" not in item and "description" not in item
+    assert item["description_ref"]["S"] == "s3://descs/descriptions/x/1.html.gz"
+    assert descriptions.decompress(s3.objects[("descs", "descriptions/x/1.html.gz")]) == "<p>python</p>"
+
+@pytest.mark.asyncio
+async def test_close_jobs_marks_closed_and_skips_missing(storage, monkeypatch):
+    from datetime import datetime, timezone
+    from botocore.exceptions import ClientError
+
+    from agg_common.keywords import VERSION
+
+    calls = []
+    def update_item(Key, **kwargs):
+        calls.append((Key["source_job_id"], kwargs["ExpressionAttributeValues"]))
+        if Key["source_job_id"] == "gone":
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+        return {"Attributes": {"keywords_norm": {"python"}, "keywords_version": VERSION}}
+
+    monkeypatch.setattr(storage.table, "update_item", update_item)
+    monkeypatch.setenv("AGG_CLOSED_TTL_DAYS", "1")
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    assert await storage.close_jobs([("x", "1"), ("x", "gone")], now) == {("x", "1"): frozenset({"python"})}
+    values = dict(calls)["1"]
+    assert values[":e"] == int(now.timestamp()) + 86400 and values[":f"] == "closed"
+    # a posting that comes back is rewritten whole, dropping closed_at, and re-enters the corpus
+    assert storage.classify_changes([make("1")])["inserted"][0].source_job_id == "1"
+
+def test_corpus_delta_tracks_term_changes(storage, monkeypatch):
+    from job_aggregator.corpus import CorpusDelta
+
+    def terms(job, *t):
+        job.keywords_norm = set(t)
+        return job
+
+    new, changed, same = terms(make("1"), "python"), terms(make("2"), "java"), terms(make("3"), "aws")
+    before = {("x", "2"): frozenset({"cobol"}), ("x", "3"): frozenset({"aws"}), ("x", "9"): frozenset({"go"})}
+    delta = CorpusDelta()
+    delta.written({"inserted": [new], "updated": [changed, same, terms(make("4"), "rust")]}, [("x", "9")], before)
+    assert delta.added == [frozenset({"python"}), frozenset({"java"})]
+    assert delta.removed == [frozenset({"cobol"}), frozenset({"go"})]
+
+def test_stored_keys_reads_each_unknown_key_once(storage, monkeypatch):
+    monkeypatch.setattr(storage, "_absent", set())
+    storage._fingerprints[("x", "1")] = "f"
+    calls = []
+    def fetch(keys):
+        calls.append(sorted(keys))
+        return {("x", "2"): "g"}
+    monkeypatch.setattr(storage, "_fetch_fingerprints", fetch)
+
+    keys = [("x", "1"), ("x", "2"), ("x", "3")]
+    assert storage.stored_keys(keys) == [("x", "1"), ("x", "2")]
+    assert storage.stored_keys(keys) == [("x", "1"), ("x", "2")]
+    assert calls == [[("x", "2"), ("x", "3")]]  # misses are remembered too
+
+    storage._record([], [], [("x", "1")])  # deleted
+    assert storage.stored_keys(keys) == [("x", "2")] and len(calls) == 1
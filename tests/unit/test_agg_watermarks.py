@@ -0,0 +1,119 @@
+import pytest
+
+from datetime import datetime, timedelta, timezone
+from job_aggregator.models import Job, Query, Page, RunStats, WriteStats
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+def make(i, posted):
+    return Job(source="dated", source_job_id=str(i), title="Eng", company="Acme", location=None,
+               url=f"https://dated/{i}", posted_at=posted)
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    from job_aggregator import snapshots
+    monkeypatch.setattr(snapshots, "_store", snapshots.FileSnapshotStore(str(tmp_path)))
+    return snapshots._store
+
+def test_since_requires_a_recent_full_crawl(monkeypatch):
+    from job_aggregator.watermarks import Watermark
+
+    monkeypatch.setenv("AGG_WATERMARK_FULL_HOURS", "24")
+    monkeypatch.setenv("AGG_WATERMARK_OVERLAP_HOURS", "1")
+    now = NOW.timestamp()
+    assert Watermark().since(now) is None
+    assert Watermark(posted_at=now - 600, full_at=now - 25 * 3600).since(now) is None
+    assert Watermark(posted_at=now - 600, full_at=now - 3600).since(now) == NOW - timedelta(seconds=600 + 3600)
+
+    wm = Watermark(posted_at=100.0, full_at=50.0)
+    assert wm.advance(200.0, full=False, now=300.0) == Watermark(200.0, 50.0)
+    assert wm.advance(None, full=True, now=300.0) == Watermark(100.0, 300.0)
+
+def dated_provider(per_page=10, total=50, fail_page=None):
+    from providers.base import Provider
+
+    class Dated(Provider):
+        name = "dated"
+        rate_limit = 0
+        incremental = True
+        max_connections = 1
+
+        def __init__(self):
+            super().__init__()
+            self.pages = []
+            self.queries = []
+
+        async def search(self, query):
+            return (await self.search_page(query)).jobs
+
+        async def search_page(self, query):
+            self.pages.append(query.page)
+            self.queries.append(query)
+            if query.page == fail_page:
+                raise ValueError("bad page")
+            start = (query.page - 1) * per_page
+            # newest first, one posting per hour
+            jobs = [make(i, NOW - timedelta(hours=i)) for i in range(start, min(start + per_page, total))]
+            return Page(jobs=jobs, total=total)
+
+    return Dated()
+
+@pytest.mark.asyncio
+async def test_stream_stops_paginating_behind_since():
+    p = dated_provider()
+    q = Query(q="python", crawl=True, results_per_page=10, since=NOW - timedelta(hours=14, minutes=30))
+    jobs = [j async for j in p.stream(q)]
+    assert [j.source_job_id for j in jobs] == [str(i) for i in range(15)]
+    assert sorted(p.pages) == [1, 2]
+
+@pytest.mark.asyncio
+async def test_incremental_stream_fails_on_missing_page():
+    p = dated_provider(fail_page=2)
+    q = Query(q="python", crawl=True, results_per_page=10, since=NOW - timedelta(hours=30))
+    with pytest.raises(ValueError):
+        [j async for j in p.stream(q)]
+
+@pytest.mark.asyncio
+async def test_adzuna_requests_max_days_old_sorted_by_date(monkeypatch):
+    import httpx
+    from providers import adzuna
+
+    seen = []
+    def respond(request):
+        seen.append(request.url.params)
+        return httpx.Response(200, json={"results": [], "count": 0})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client:
+        p = adzuna.AdzunaProvider(client)
+        await p.search(Query(q="python"))
+        await p.search(Query(q="python", since=datetime.now(timezone.utc) - timedelta(hours=30)))
+
+    assert "max_days_old" not in seen[0] and "sort_by" not in seen[0]
+    assert seen[1]["max_days_old"] == "2" and seen[1]["sort_by"] == "date"
+
+@pytest.mark.asyncio
+async def test_run_advances_watermark_and_fetches_incrementally(monkeypatch, store):
+    from job_aggregator import aggregate, watermarks
+    from providers import resilience
+
+    monkeypatch.setattr(resilience, "_limiters", {})
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(aggregate, "classify_changes", lambda jobs: {"inserted": jobs, "updated": [], "unchanged": [], "refreshed": []})
+    async def write_jobs(puts, deletes=()):
+        return WriteStats(items=len(puts))
+    monkeypatch.setattr(aggregate, "write_jobs", write_jobs)
+    monkeypatch.setenv("AGG_WATERMARK_OVERLAP_HOURS", "0")
+
+    query = Query(q="python", crawl=True, results_per_page=10)
+    full = dated_provider()
+    stats = RunStats()
+    await aggregate.run(query, providers=[full], stats=stats)
+    assert stats.watermarks == {"dated:python": "full"} and sorted(full.pages) == [1, 2, 3, 4, 5]
+    assert watermarks.load("dated", "python").posted_at == NOW.timestamp()
+
+    again = dated_provider()
+    stats = RunStats()
+    await aggregate.run(query, providers=[again], stats=stats)
+    assert stats.watermarks == {"dated:python": NOW.isoformat()}
+    assert again.pages == [1] and again.queries[0].since == NOW
+    assert stats.fetched == 1
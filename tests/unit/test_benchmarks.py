@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_aggregate import _percentiles, compare
+from benchmarks.fake_provider import FakeConfig, FakeProviderServer, synthetic_row
+
+
+def test_percentiles():
+    assert _percentiles([]) == {"n": 0, "p50": 0.0, "p95": 0.0}
+    stats = _percentiles([float(i) for i in range(1, 101)])
+    assert stats == {"n": 100, "p50": 50.0, "p95": 95.0}
+
+
+def test_synthetic_rows_are_deterministic():
+    cfg = FakeConfig(desc_words=30)
+    assert synthetic_row(5, cfg) == synthetic_row(5, cfg)
+    assert synthetic_row(5, cfg) != synthetic_row(6, cfg)
+
+
+def test_fake_server_pages_and_errors():
+    import httpx
+
+    with FakeProviderServer(FakeConfig(total=120, per_page=50, latency_ms=0)) as server:
+        r = httpx.get(f"{server.base_url}/ro/search/3", params={"results_per_page": 50})
+        data = r.json()
+        assert data["count"] == 120 and len(data["results"]) == 20
+
+    with FakeProviderServer(FakeConfig(latency_ms=0, error_rate=1.0)) as server:
+        assert httpx.get(f"{server.base_url}/ro/search/1").status_code == 503
+        assert server.errors == 1
+
+
+def test_compare_flags_throughput_regression(capsys):
+    base = {"commit": "a", "params": {}, "jobs_per_sec": 100.0, "peak_rss_mb": 100.0,
+            "stages": {"page": {"p50": 10.0, "p95": 20.0}}}
+    assert compare({**base, "commit": "b", "jobs_per_sec": 95.0}, base, tolerance=0.10)
+    assert not compare({**base, "commit": "c", "jobs_per_sec": 80.0}, base, tolerance=0.10)
+    assert "regressed" in capsys.readouterr().out
+
+
+@pytest.mark.slow
+def test_bench_end_to_end(tmp_path):
+    pytest.importorskip("moto")
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(ROOT), *map(str, ROOT.glob("services/*/src")),
+                                                      *map(str, ROOT.glob("libs/*/src"))])}
+    subprocess.run([sys.executable, "-m", "benchmarks.bench_aggregate", "--total", "120", "--per-page", "40",
+                    "--latency-ms", "0", "--repeat", "1", "--out", str(tmp_path)],
+                   cwd=ROOT, env=env, check=True, capture_output=True)
+    result = json.loads(next(tmp_path.glob("*.json")).read_text())
+    assert result["runs"][0]["written"] == 120
+    assert {"page", "parse", "annotate_keywords", "write_batch"} <= set(result["stages"])
@@ -0,0 +1,57 @@
+import pytest
+
+from agg_common import corpus_stats as cs
+
+BUCKET = "corpus-stats-test"
+
+@pytest.fixture
+def s3(monkeypatch):
+    import boto3
+    from moto import mock_aws
+
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    monkeypatch.delenv("AWS_ENDPOINT_URL", raising=False)
+    with mock_aws():
+        client = boto3.client("s3")
+        client.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": "eu-central-1"})
+        yield client
+
+def test_apply_counts_added_and_removed_term_sets():
+    stats = cs.CorpusStats()
+    stats.apply(added=[{"python", "aws"}, {"python"}])
+    stats.apply(removed=[{"python", "aws"}])
+    assert (stats.n, stats.df) == (1, {"python": 1})
+    assert stats.idf()["python"] == cs.idf_weight(1, 1)
+
+def test_item_terms_prefers_current_ingest_set():
+    from agg_common.keywords import VERSION
+    assert cs.item_terms({"keywords_norm": {"k8s"}, "keywords_version": VERSION, "keywords": {"java"}}) == {"k8s"}
+    assert cs.item_terms({"keywords_norm": {"k8s"}, "keywords_version": VERSION - 1, "keywords": {"Java"}}) == {"java"}
+
+def test_update_bumps_version_and_etag_gates_reloads(s3):
+    assert cs.load(s3, BUCKET) == (None, None)
+    assert cs.update(s3, BUCKET, lambda s: s.apply(added=[{"python"}]), existing_only=True) is None
+
+    first = cs.update(s3, BUCKET, lambda s: s.apply(added=[{"python"}]))
+    stats, etag = cs.load(s3, BUCKET)
+    assert first.version == stats.version == 1 and stats.df == {"python": 1}
+    assert cs.load(s3, BUCKET, etag) == (None, etag)
+
+    cs.update(s3, BUCKET, lambda s: s.apply(added=[{"aws"}]), existing_only=True)
+    stats, new_etag = cs.load(s3, BUCKET, etag)
+    assert new_etag != etag and stats.version == 2 and stats.n == 2
+
+def test_update_retries_when_another_writer_got_in_first(s3):
+    cs.update(s3, BUCKET, lambda s: s.apply(added=[{"python"}]))
+    calls = []
+
+    def change(stats):
+        calls.append(stats.version)
+        if len(calls) == 1:
+            cs.update(s3, BUCKET, lambda s: s.apply(added=[{"java"}]))
+        stats.apply(added=[{"aws"}])
+
+    result = cs.update(s3, BUCKET, change)
+    assert calls == [1, 2]
+    assert result.version == 3 and result.df == {"python": 1, "java": 1, "aws": 1}
@@ -0,0 +1,43 @@
+import io
+
+from agg_common import descriptions
+
+
+def test_sanitize_keeps_formatting_and_drops_active_content():
+    raw = ('<div class="x" onclick="steal()"><p>Build  <b>APIs</b></p>\n\n <script>alert(1)</script>'
+           '<a href="javascript:alert(1)">x</a> <a href="https://acme.io/apply" target="_blank">apply</a> 5 &lt; 6'
+           '<img src="https://t.io/pixel.gif"><style>p{}</style></div>')
+    out = descriptions.sanitize_html(raw)
+    assert out == ('<p>Build <b>APIs</b></p>\n<a>x</a> '
+                   '<a href="https://acme.io/apply" rel="nofollow noopener">apply</a> 5 &lt; 6')
+
+
+def test_compressed_round_trip_is_smaller():
+    text = "<p>python aws docker</p>" * 200
+    blob = descriptions.compress(text)
+    assert len(blob) < len(text) / 10
+    assert descriptions.decompress(blob) == text
+    assert descriptions.compress(text) == blob  # deterministic, so unchanged uploads are identical
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+
+def test_load_resolves_every_storage_form():
+    s3 = FakeS3()
+    key = descriptions.s3_key("remotive", "a/1")
+    assert key == "descriptions/remotive/a%2F1.html.gz"
+    s3.put_object(Bucket="b", Key=key, Body=descriptions.compress("<p>from s3</p>"))
+
+    assert descriptions.load({"description": "<p>legacy</p>"}) == "<p>legacy</p>"
+    assert descriptions.load({"description_z": descriptions.compress("<p>z</p>")}) == "<p>z</p>"
+    assert descriptions.load({"description_ref": descriptions.s3_ref("b", key)}, s3) == "<p>from s3</p>"
+    assert descriptions.load({"title": "no description"}) is None
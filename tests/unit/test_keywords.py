@@ -0,0 +1,28 @@
+from agg_common.keywords import extract_keywords, normalize_keywords, strip_html
+
+
+def test_extract_keeps_tech_terms():
+    text = "We use C#, C++ and node.js on AWS. Experience with k8s and .NET is a plus!"
+    kws = extract_keywords(text)
+    assert {"c#", "c++", "node.js", "aws", "k8s", ".net"} <= kws
+    assert not {"we", "is", "a", "experience", "plus", "aws."} & kws
+
+
+def test_extract_strips_html_and_joins_phrases():
+    text = "<p>Build <b>CI/CD</b> pipelines on Amazon Web Services &amp; Google Cloud</p> since 2019"
+    kws = extract_keywords(text)
+    assert {"ci-cd", "aws", "google-cloud", "pipelines"} <= kws
+    assert not any("<" in k or "&" in k for k in kws)
+    assert "2019" not in kws
+    assert strip_html("<li>a &lt; b</li>").strip() == "a < b"
+
+
+def test_extract_empty():
+    assert extract_keywords(None) == set()
+    assert extract_keywords("") == set()
+
+
+def test_normalize_applies_aliases_and_lemmas():
+    assert normalize_keywords({"PostgreSQL"}) == normalize_keywords({"postgres"})
+    assert normalize_keywords({"k8s"}) == normalize_keywords({"Kubernetes"})
+    assert normalize_keywords({"JS", "Design", "testing"}) == {"javascript"}
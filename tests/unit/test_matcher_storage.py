@@ -0,0 +1,71 @@
+import time
+import pytest
+
+@pytest.fixture
+def storage(monkeypatch):
+    monkeypatch.setenv("CV_S3_BUCKET", "cv-test")
+    from user_management.matcher import storage
+    monkeypatch.setattr(storage, "_scan_client", None)
+    return storage
+
+def test_corpus_scan_reads_every_page_of_every_segment(storage, monkeypatch):
+    import boto3
+    from moto import mock_aws
+
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    monkeypatch.delenv("AWS_ENDPOINT_URL", raising=False)
+    with mock_aws():
+        boto3.client("dynamodb").create_table(
+            TableName=storage.JOBS_TABLE_NAME, BillingMode="PAY_PER_REQUEST",
+            KeySchema=[{"AttributeName": "source", "KeyType": "HASH"},
+                       {"AttributeName": "source_job_id", "KeyType": "RANGE"}],
+            AttributeDefinitions=[{"AttributeName": "source", "AttributeType": "S"},
+                                  {"AttributeName": "source_job_id", "AttributeType": "S"}])
+        table = boto3.resource("dynamodb").Table(storage.JOBS_TABLE_NAME)
+        with table.batch_writer() as batch:
+            for i in range(300):  # ~1.5 MB with the descriptions: more than one scan page
+                item = {"source": "s", "source_job_id": str(i), "title": f"Job {i}", "url": f"http://s/{i}",
+                        "keywords": {"python"}, "description": "x" * 5000, "keywords_version": 1}
+                if i % 10 == 0:
+                    item["closed_at"] = "2025-06-01T00:00:00+00:00"
+                if i % 10 == 1:
+                    item["expires_at"] = int(time.time()) - 60
+                batch.put_item(Item=item)
+
+        single, stats = storage.scan_scoring_corpus(1)
+        assert stats.pages > 1 and stats.scanned == 300 and stats.items == 240 and stats.consumed_rcu > 0
+        parallel, stats = storage.scan_scoring_corpus(3)
+        assert stats.segments == 3 and stats.items == 240
+        assert {j.source_job_id for j in parallel} == {j.source_job_id for j in single}
+        assert parallel[0].keywords == {"python"} and parallel[0].keywords_version == 1
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+
+    def scan(self, **kwargs):
+        self.calls.append(kwargs)
+        seg, page = kwargs["Segment"], int(kwargs.get("ExclusiveStartKey", {}).get("p", 0))
+        resp = {"Items": [{"source": {"S": "s"}, "source_job_id": {"S": f"{seg}-{page}"}, "title": {"S": "t"},
+                           "url": {"S": "u"}, "keywords": {"SS": ["go"]}}],
+                "ScannedCount": 2, "ConsumedCapacity": {"CapacityUnits": 0.5}}
+        if page == 0:
+            resp["LastEvaluatedKey"] = {"p": "1"}
+        return resp
+
+def test_corpus_scan_projects_scoring_fields(storage, monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(storage, "_scan_client", client)
+    monkeypatch.setenv("MATCH_SCAN_SEGMENTS", "2")
+
+    jobs = storage.get_all_jobs_for_scoring()
+    assert [j.source_job_id for j in jobs] == ["0-0", "0-1", "1-0", "1-1"]
+
+    first = client.calls[0]
+    assert first["TotalSegments"] == 2 and first["ReturnConsumedCapacity"] == "TOTAL"
+    projected = {first["ExpressionAttributeNames"][p.strip()] for p in first["ProjectionExpression"].split(",")}
+    assert projected == set(storage.SCORING_FIELDS) and "description" not in projected
+    assert "closed_at" in first["ExpressionAttributeNames"].values()
+    _, stats = storage.scan_scoring_corpus()
+    assert (stats.pages, stats.scanned, stats.consumed_rcu) == (4, 8, 2.0)
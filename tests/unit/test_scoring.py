@@ -62,3 +62,147 @@ def test_score_and_rank_no_matching_jobs(sample_jobs):
     ranked_jobs = score_and_rank_jobs(cv_keywords, sample_jobs)
 
     assert len(ranked_jobs) == 0
+
+
+def test_score_uses_stored_normalized_keywords(sample_jobs):
+    from agg_common.keywords import VERSION, normalize_keywords
+
+    ingested = [j.model_copy(update={"keywords_norm": normalize_keywords(j.keywords), "keywords_version": VERSION})
+                for j in sample_jobs]
+    cv_keywords = {"Python", "APIs", "AWS"}
+
+    expected = [(j.source_job_id, j.score) for j in score_and_rank_jobs(cv_keywords, sample_jobs)]
+    got = [(j.source_job_id, j.score) for j in score_and_rank_jobs(cv_keywords, ingested)]
+    assert got == expected
+
+    stale = sample_jobs[0].model_copy(update={"keywords_norm": {"cobol"}, "keywords_version": VERSION - 1})
+    ranked = score_and_rank_jobs({"python"}, [stale])
+    assert ranked[0].score == score_and_rank_jobs({"python"}, [sample_jobs[0]])[0].score
+    assert "keywords_norm" not in ranked[0].model_dump()
+
+
+def _random_corpus(rng, n, vocab):
+    return [JobForScoring(source="r", source_job_id=str(i), title=f"Job {i}", url=f"http://r/{i}",
+                          keywords=set(rng.sample(vocab, rng.randint(0, 8))))
+            for i in range(n)]
+
+
+def test_index_ranking_matches_exhaustive_scoring():
+    import random
+    from user_management.matcher.scoring import rank_exhaustive
+
+    rng = random.Random(7)
+    vocab = ["python", "java", "aws", "docker", "kubernetes", "sql", "react", "node.js", "c++", "go",
+             "terraform", "spark", "django", "flask", "apis", "linux", "git", "scala", "rust", "kafka"]
+    jobs = _random_corpus(rng, 300, vocab)
+    for _ in range(25):
+        cv = set(rng.sample(vocab + ["cobol"], rng.randint(1, 6)))
+        expected = [(j.source_job_id, j.score) for j in rank_exhaustive(cv, jobs)]
+        assert [(j.source_job_id, j.score) for j in score_and_rank_jobs(cv, jobs)] == expected
+
+
+def test_index_sync_reindexes_only_changes():
+    from user_management.matcher.index import JobIndex
+    from user_management.matcher.scoring import rank_exhaustive
+
+    jobs = [JobForScoring(source="s", source_job_id=str(i), title="t", url=f"http://s/{i}", keywords=kws)
+            for i, kws in enumerate([{"python", "aws"}, {"python"}, {"java"}, {"aws", "docker"}])]
+    index = JobIndex(jobs)
+    updated = [jobs[3], jobs[0].model_copy(update={"keywords": {"java", "spring"}}), jobs[2],
+               JobForScoring(source="s", source_job_id="9", title="t", url="http://s/9", keywords={"python"})]
+    index.sync(updated)
+
+    assert len(index) == 4 and "aws" in index.postings and index.df["java"] == 2
+    assert index.postings["python"] == {index._ids[("s", "9")]}
+    for cv in ({"python"}, {"java", "aws"}, {"docker"}):
+        expected = [(j.source_job_id, j.score) for j in rank_exhaustive(cv, updated)]
+        assert [(j.source_job_id, j.score) for j in index.rank(cv)] == expected
+
+
+def test_index_scores_with_persisted_corpus_stats(sample_jobs):
+    from agg_common.corpus_stats import CorpusStats
+    from user_management.matcher.index import JobIndex
+    from user_management.matcher.scoring import rank_exhaustive
+
+    stats = CorpusStats(n=100, df={"python": 60, "api": 5, "aws": 30, "docker": 10}, version=3)
+    index = JobIndex(sample_jobs)
+    local = [(j.source_job_id, j.score) for j in index.rank({"python", "aws"})]
+    index.use_stats(stats)
+    assert index.stats_version == 3
+    got = [(j.source_job_id, j.score) for j in index.rank({"python", "aws"})]
+    assert got == [(j.source_job_id, j.score) for j in rank_exhaustive({"python", "aws"}, sample_jobs, stats.idf())]
+    assert got != local
+
+
+def test_sparse_engine_ranks_like_the_index():
+    pytest.importorskip("scipy")
+    import random
+    from agg_common.corpus_stats import CorpusStats
+    from user_management.matcher.index import JobIndex
+    from user_management.matcher.sparse import SparseEngine
+
+    rng = random.Random(11)
+    vocab = ["python", "java", "aws", "docker", "kubernetes", "sql", "react", "go", "spark", "kafka", "rust"]
+    index = JobIndex(_random_corpus(rng, 200, vocab))
+    cvs = [set(rng.sample(vocab + ["cobol"], rng.randint(1, 5))) for _ in range(20)] + [set()]
+
+    def pairs(ranked):
+        return [(j.source_job_id, j.score) for j in ranked]
+
+    for stats in (None, CorpusStats(n=500, df={"python": 300, "aws": 40, "rust": 2}, version=1)):
+        index.use_stats(stats)
+        engine = SparseEngine.from_index(index)
+        batch = engine.rank_many(cvs)
+        for cv, ranked in zip(cvs, batch):
+            assert pairs(ranked) == pairs(index.rank(cv))
+            assert pairs(engine.rank(cv)) == pairs(ranked)
+
+
+def test_match_engine_selection(sample_jobs, monkeypatch):
+    pytest.importorskip("scipy")
+    from user_management.matcher import sparse
+    from user_management.matcher.index import JobIndex
+
+    index = JobIndex(sample_jobs)
+    monkeypatch.setenv("MATCH_ENGINE", "sparse")
+    first = sparse.engine_for(index)
+    assert score_and_rank_jobs({"python", "aws"}, index) == index.rank({"python", "aws"})
+    assert sparse.engine_for(index) is first
+
+    index.sync(sample_jobs[:2])
+    assert sparse.engine_for(index) is not first
+    assert [j.source_job_id for j in score_and_rank_jobs({"python", "aws"}, index)] == ["1", "2"]
+    assert score_and_rank_jobs({"python", "aws"}, index) == index.rank({"python", "aws"})
+
+    with pytest.raises(ValueError):
+        score_and_rank_jobs({"python"}, index, engine="faiss")
+
+
+@pytest.mark.parametrize("engine", ["index", "sparse"])
+def test_top_k_is_the_head_of_the_full_ranking(engine):
+    if engine == "sparse":
+        pytest.importorskip("scipy")
+    import random
+    from user_management.matcher.index import JobIndex
+
+    rng = random.Random(3)
+    vocab = ["python", "java", "aws", "docker", "sql", "go", "git", "rust"]  # few terms: many ties
+    index = JobIndex(_random_corpus(rng, 150, vocab))
+    for cv in ({"python"}, {"python", "aws"}, {"java", "sql", "docker"}):
+        full = score_and_rank_jobs(cv, index, engine=engine)
+        for k in (1, 7, 50, 1000):
+            assert score_and_rank_jobs(cv, index, engine=engine, k=k) == full[:k]
+    assert score_and_rank_jobs({"python"}, index, engine=engine, k=0) == []
+
+
+def test_sparse_engine_is_not_shared_between_job_lists():
+    pytest.importorskip("scipy")
+
+    def job(i, kws):
+        return JobForScoring(source="s", source_job_id=i, title="t", url=f"http://s/{i}", keywords=kws)
+
+    for _ in range(20):  # throwaway indexes get freed and their ids reused
+        first = score_and_rank_jobs({"python"}, [job("a", {"python"})], engine="sparse")
+        second = score_and_rank_jobs({"python"}, [job("b", {"python", "go"})], engine="sparse")
+        assert [j.source_job_id for j in first] == ["a"]
+        assert [j.source_job_id for j in second] == ["b"]